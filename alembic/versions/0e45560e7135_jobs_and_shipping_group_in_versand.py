@@ -0,0 +1,47 @@
+"""jobs table and shipping group status IN_VERSAND
+
+Revision ID: 0e45560e7135
+Revises: f5349ba2f7b6
+Create Date: 2026-10-16 11:04:27.519360
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0e45560e7135'
+down_revision: Union[str, None] = 'f5349ba2f7b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Neuer Enum-Wert muss außerhalb der Migrations-Transaktion angelegt werden
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE status ADD VALUE IF NOT EXISTS 'IN_VERSAND' AFTER 'OFFEN'")
+
+    op.create_table('jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('job_type', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Enum('WARTEND', 'LAEUFT', 'ERLEDIGT', 'FEHLGESCHLAGEN', name='jobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_status_run_after', table_name='jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
+    # Postgres kann Enum-Werte nicht entfernen → offene Versände zurück auf OFFEN
+    op.execute("UPDATE shipping_groups SET status = 'OFFEN' WHERE status = 'IN_VERSAND'")
@@ -0,0 +1,42 @@
+"""trigram and lower(name) indexes for article search
+
+Revision ID: 7cfcb7067a1d
+Revises: bcdf574e30e2
+Create Date: 2026-10-16 18:47:36.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7cfcb7067a1d'
+down_revision: Union[str, None] = 'bcdf574e30e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY → keine Schreibsperre auf articles im laufenden Betrieb
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_articles_name_trgm', 'articles', ['name'], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_articles_name_lower', 'articles', [sa.text('lower(name)')], unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_articles_name_lower', table_name='articles', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_articles_name_trgm', table_name='articles', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,46 @@
+"""reservation_bookings and sync_states for incremental reservation sync
+
+Revision ID: a360ece3cd0c
+Revises: ab1e042025b6
+Create Date: 2026-10-16 16:40:51.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a360ece3cd0c'
+down_revision: Union[str, None] = 'ab1e042025b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reservation_bookings',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('forecast_date', sa.Date(), nullable=False),
+    # Enum existiert bereits (reservation_summaries)
+    sa.Column('time_slot', postgresql.ENUM('MITTAG', 'ABEND', name='timeslot', create_type=False), nullable=False),
+    sa.Column('people', sa.Integer(), nullable=False),
+    sa.Column('counted', sa.Boolean(), nullable=False),
+    sa.Column('synced_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reservation_bookings_date_slot', 'reservation_bookings', ['forecast_date', 'time_slot'], unique=False)
+
+    op.create_table('sync_states',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('watermark', sa.DateTime(), nullable=True),
+    sa.Column('last_full_sync_on', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_states')
+    op.drop_index('ix_reservation_bookings_date_slot', table_name='reservation_bookings')
+    op.drop_table('reservation_bookings')
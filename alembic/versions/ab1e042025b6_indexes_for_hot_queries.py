@@ -0,0 +1,54 @@
+"""indexes for hot query predicates
+
+Revision ID: ab1e042025b6
+Revises: 0e45560e7135
+Create Date: 2026-10-16 14:12:08.331902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ab1e042025b6'
+down_revision: Union[str, None] = '0e45560e7135'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial-where)
+INDEXES = [
+    ('ix_orders_active_drafted_on', 'orders', [sa.text('drafted_on DESC'), sa.text('id DESC')], 'is_active'),
+    ('ix_orders_department_status', 'orders', ['department_id', 'status'], 'is_active'),
+    ('ix_orders_creator_id', 'orders', ['creator_id'], None),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], None),
+    ('ix_order_items_article_id', 'order_items', ['article_id'], None),
+    ('ix_order_items_shipping_group_id', 'order_items', ['shipping_group_id'], None),
+    ('ix_shipping_groups_supplier_delivery_status', 'shipping_groups', ['supplier_id', 'delivery_date', 'status'], None),
+    ('ix_shipping_groups_open', 'shipping_groups', ['supplier_id', 'delivery_date'], "status = 'OFFEN'"),
+    ('ix_shipping_groups_open_delivery_date', 'shipping_groups', ['delivery_date'], "status = 'OFFEN'"),
+    ('ix_activity_logs_entity', 'activity_logs', ['entity_id', 'entity_type', 'timestamp'], None),
+    ('ix_departments_parent_id', 'departments', ['parent_id'], None),
+    ('ix_article_suppliers_article_supplier', 'article_suppliers', ['article_id', 'supplier_id'], None),
+    ('ix_article_suppliers_supplier_id', 'article_suppliers', ['supplier_id'], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY → keine Schreibsperre auf den Tabellen im laufenden Betrieb
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
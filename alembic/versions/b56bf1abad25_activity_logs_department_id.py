@@ -0,0 +1,51 @@
+"""department_id on activity_logs for the activity feed
+
+Revision ID: b56bf1abad25
+Revises: 7cfcb7067a1d
+Create Date: 2026-10-16 19:32:04.517236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b56bf1abad25'
+down_revision: Union[str, None] = '7cfcb7067a1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('activity_logs', sa.Column('department_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'activity_logs_department_id_fkey', 'activity_logs', 'departments', ['department_id'], ['id']
+    )
+    # Bestehende Einträge: Department der Bestellung übernehmen
+    op.execute("""
+        UPDATE activity_logs AS a
+        SET department_id = o.department_id
+        FROM orders AS o
+        WHERE a.entity_type = 'order' AND a.entity_id = o.id
+    """)
+    # CONCURRENTLY → keine Schreibsperre auf activity_logs im laufenden Betrieb
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_activity_logs_department_timestamp', 'activity_logs',
+            ['department_id', sa.text('timestamp DESC'), sa.text('id DESC')], unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_activity_logs_department_timestamp', table_name='activity_logs',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_constraint('activity_logs_department_id_fkey', 'activity_logs', type_='foreignkey')
+    op.drop_column('activity_logs', 'department_id')
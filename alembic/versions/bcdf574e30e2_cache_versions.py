@@ -0,0 +1,30 @@
+"""cache_versions for the versioned master-data cache
+
+Revision ID: bcdf574e30e2
+Revises: a360ece3cd0c
+Create Date: 2026-10-16 18:05:12.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcdf574e30e2'
+down_revision: Union[str, None] = 'a360ece3cd0c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cache_versions')
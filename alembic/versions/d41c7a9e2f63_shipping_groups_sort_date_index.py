@@ -0,0 +1,37 @@
+"""expression index for the shipping group overview sort order
+
+Revision ID: d41c7a9e2f63
+Revises: b56bf1abad25
+Create Date: 2026-10-16 23:05:12.418093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c7a9e2f63'
+down_revision: Union[str, None] = 'b56bf1abad25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY → keine Schreibsperre auf shipping_groups im laufenden Betrieb
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_shipping_groups_sort_date', 'shipping_groups',
+            [sa.text("coalesce(delivery_date, '9999-12-31'::date) DESC"), sa.text('id DESC')], unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_shipping_groups_sort_date', table_name='shipping_groups',
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,49 @@
+"""department_closure
+
+Revision ID: f5349ba2f7b6
+Revises: 6721a2d2770e
+Create Date: 2026-10-16 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5349ba2f7b6'
+down_revision: Union[str, None] = '6721a2d2770e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('department_closure',
+    sa.Column('ancestor_id', sa.UUID(), nullable=False),
+    sa.Column('descendant_id', sa.UUID(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['departments.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['departments.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_department_closure_descendant_depth', 'department_closure', ['descendant_id', 'depth'], unique=False)
+
+    # Bestehende Hierarchie übernehmen (nur aktive Bereiche)
+    op.execute("""
+        WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM departments WHERE is_active = true
+            UNION ALL
+            SELECT tree.ancestor_id, child.id, tree.depth + 1
+            FROM tree
+            JOIN departments child ON child.parent_id = tree.descendant_id
+            WHERE child.is_active = true
+        )
+        INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM tree
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_department_closure_descendant_depth', table_name='department_closure')
+    op.drop_table('department_closure')
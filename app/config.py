@@ -4,6 +4,12 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000
     
 
     # Auth/JWT
@@ -11,6 +17,10 @@ class Settings(BaseSettings):
     refresh_token_expire_days: int = 7
     temp_token_expire_minutes: int = 3
     jwt_algorithm: str = 'HS256'
+    principal_cache_ttl_seconds: int = 60
+    password_bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
     secret_key: str
     
     # Mail config
@@ -23,6 +33,14 @@ class Settings(BaseSettings):
     # App
     app_name: str = 'TraumGmbH Bestellsystem'
     debug: bool = False
+    # Bearer-Token für GET /metrics (leer = Endpunkt abgeschaltet)
+    metrics_token: str = ""
+    # Ab so vielen gleichen Statements pro Request wird ein N+1-Muster gemeldet
+    query_repeat_threshold: int = 5
+    # Wie oft andere Prozesse die Stammdaten-Version prüfen
+    master_data_check_seconds: float = 2.0
+    # Artikelsuche: Artikel aus Bestellungen der letzten X Tage stehen weiter oben
+    article_search_recent_days: int = 30
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -34,6 +52,14 @@ class Settings(BaseSettings):
     teburio_url: str = ""
     teburio_token: str = ""
     teburio_location_id: str = ""
+    teburio_concurrency: int = 4
+    teburio_chunk_days: int = 7
+    teburio_timeout_seconds: float = 30.0
+    reservation_forecast_days: int = 14
+
+    # Bestellvorschläge
+    forecast_history_days: int = 180
+    forecast_full_refit_days: int = 7
 
     # Absender für PDFs
     company_name: str = "Firma"
@@ -45,5 +71,12 @@ class Settings(BaseSettings):
     #2FA
     two_factor_issuer: str
 
+    # Hintergrund-Jobs (PDF + Email)
+    job_max_attempts: int = 5
+    job_retry_base_seconds: int = 30
+    job_poll_interval_seconds: float = 2.0
+    job_stale_after_minutes: int = 15
+    pdf_render_workers: int = 4
+
 
 settings = Settings()
\ No newline at end of file
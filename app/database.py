@@ -1,11 +1,114 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, exc, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from prometheus_client import Counter, Gauge, Histogram
 
 from app.config import settings
 
-engine = create_engine(settings.database_url)
+
+# ============ POOL-METRIKEN ============
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Wartezeit auf eine Verbindung aus dem Pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts, die nach pool_timeout ohne Verbindung abgebrochen wurden"
+)
+# Zustand des Pools, bei mehreren Workern über alle laufenden Worker summiert
+POOL_SIZE = Gauge("db_pool_size", "Konfigurierte Pool-Größe", ["pool"], multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Aktuell ausgeliehene Verbindungen", ["pool"], multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Verbindungen über pool_size hinaus (negativ = freie Plätze im Pool)", ["pool"], multiprocess_mode="livesum")
+POOL_CHECKED_IN = Gauge("db_pool_checked_in", "Freie Verbindungen im Pool", ["pool"], multiprocess_mode="livesum")
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool, der die Wartezeit beim Checkout misst und seinen Zustand meldet."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+            self._report_state()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report_state()
+
+    def _report_state(self):
+        # Gauges werden bei Checkout/Checkin gesetzt statt beim Scrapen gelesen,
+        # weil Callback-Gauges im Multiprozess-Modus nicht aggregiert werden
+        POOL_SIZE.labels(pool=self.metrics_label).set(self.size())
+        POOL_CHECKED_OUT.labels(pool=self.metrics_label).set(self.checkedout())
+        POOL_OVERFLOW.labels(pool=self.metrics_label).set(self.overflow())
+        POOL_CHECKED_IN.labels(pool=self.metrics_label).set(self.checkedin())
+
+
+class MeteredAsyncQueuePool(MeteredQueuePool, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _connect_args() -> dict:
+    if settings.db_statement_timeout_ms > 0:
+        return {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return {}
+
+
+engine = create_engine(
+    settings.database_url,
+    poolclass=MeteredQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args=_connect_args()
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# ============ ASYNC ENGINE ============
+# Für die Hot-Paths der API (asyncpg). Skripte und Worker nutzen weiter SessionLocal.
+
+def async_database_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def _async_connect_args() -> dict:
+    if settings.db_statement_timeout_ms > 0:
+        return {"server_settings": {"statement_timeout": str(settings.db_statement_timeout_ms)}}
+    return {}
+
+
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    poolclass=MeteredAsyncQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args=_async_connect_args()
+)
+# expire_on_commit=False: nach dem Commit keine impliziten (im Async-Kontext verbotenen) Nachlade-Queries
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+for _pool in (engine.pool, async_engine.pool):
+    _pool._report_state()
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -14,4 +117,9 @@ def get_db():
    try:
        yield db
    finally:
-       db.close()
\ No newline at end of file
+       db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,27 +1,39 @@
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
-from app.routers import auth, article, article_groups, users, department, supplier, orders, delivery_days, article_supplier, shipping_groups, approver_supplier, order_items, storage_location, article_storage_location, roles, activities, reservations, department_supplier
+from app.routers import auth, article, article_groups, users, department, supplier, orders, delivery_days, article_supplier, shipping_groups, approver_supplier, order_items, storage_location, article_storage_location, roles, activities, reservations, department_supplier, forecast
 from app.config import settings
 from app.utils.logging_config import setup_logging
-from app.middleware.logging_middleware import log_requests
+from app.middleware.timing_middleware import RequestTimingMiddleware
 
 
 from app.utils.rate_limit import limiter
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.metrics import render_metrics, mark_process_dead, require_metrics_token
 
 logger = setup_logging()
 logger.info("Application starting...")
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+        yield
+        mark_process_dead()
+
+
+app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
 
 app.state.limiter = limiter
-app.middleware("http")(log_requests)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,8 +41,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 app.add_middleware(SlowAPIMiddleware)
+# Zuletzt hinzugefügt = äußerste Middleware, misst also auch CORS und Rate-Limit
+app.add_middleware(RequestTimingMiddleware)
 
 app.include_router(auth.router)
 app.include_router(article.router)
@@ -50,6 +65,7 @@ app.include_router(article_storage_location.router)
 app.include_router(activities.router)
 app.include_router(reservations.router)
 app.include_router(department_supplier.router)
+app.include_router(forecast.router)
 
 @app.get("/")
 def root() -> dict:
@@ -57,4 +73,8 @@ def root() -> dict:
 
 @app.get("/health")
 def health() -> dict:
-        return {"status": "ok"}
\ No newline at end of file
+        return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+def metrics() -> Response:
+        return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -1,21 +0,0 @@
-import time
-import logging
-from fastapi import Request
-
-
-logger = logging.getLogger("app")
-
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-
-    response = await call_next(request)
-
-    duration = time.time() - start_time
-
-    logger.info(
-        f"{request.method} {request.url.path} "
-        f"- Status: {response.status_code} "
-        f"- Duration: {duration:.3f}s"
-    )
-
-    return response
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Laufzeit-Metriken pro Route.
+
+Reine ASGI-Middleware (kein BaseHTTPMiddleware, kein Umweg über
+call_next). Gemessen wird monoton bis zur vollständig gesendeten Antwort.
+Als Label dient das Routen-Template (/articles/{id}), nicht der echte Pfad,
+damit die Anzahl der Zeitreihen begrenzt bleibt. Pro Request wird außerdem
+festgehalten, wie viele Statements in wie viel DB-Zeit gelaufen sind.
+
+Wiederholte Statement-Formen (N+1) werden geloggt und gezählt; mit
+debug=True stehen Anzahl und Wiederholungen zusätzlich in Response-Headern.
+"""
+import logging
+import time
+
+from prometheus_client import Counter, Histogram
+
+from app.config import settings
+from app.utils.query_stats import RequestStats, start_request, end_request
+
+logger = logging.getLogger("app")
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Dauer der Requests pro Route",
+    labelnames=("method", "route", "status")
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL-Statements pro Request",
+    labelnames=("method", "route"),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250)
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Zeit in der Datenbank pro Request",
+    labelnames=("method", "route")
+)
+
+REQUEST_REPEATED_QUERIES = Counter(
+    "http_request_repeated_queries_total",
+    "Requests mit wiederholten Statement-Formen (Verdacht auf N+1)",
+    labelnames=("method", "route")
+)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+REPEATED_QUERIES_HEADER = "X-DB-Repeated-Queries"
+
+# Label für Requests ohne passende Route (404), damit beliebige Pfade keine neuen Zeitreihen erzeugen
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _debug_headers(stats: RequestStats) -> list[tuple[bytes, bytes]]:
+    repeated = stats.repeated(settings.query_repeat_threshold)
+    return [
+        (QUERY_COUNT_HEADER.lower().encode(), str(stats.queries).encode()),
+        (REPEATED_QUERIES_HEADER.lower().encode(), str(sum(count for _, count in repeated)).encode())
+    ]
+
+
+def _report_repeated(stats: RequestStats, method: str, route: str):
+    repeated = stats.repeated(settings.query_repeat_threshold)
+    if not repeated:
+        return
+    REQUEST_REPEATED_QUERIES.labels(method=method, route=route).inc()
+    for shape, count in repeated:
+        logger.warning("N+1 verdächtig: %s %s - %dx %.300s", method, route, count, shape)
+
+
+def route_template(scope) -> str:
+    # FastAPI legt die gematchte Route beim Routing in den Scope
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats, token = start_request()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.debug:
+                    message = {**message, "headers": [*message.get("headers", []), *_debug_headers(stats)]}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            end_request(token)
+            method = scope["method"]
+            route = route_template(scope)
+            REQUEST_SECONDS.labels(method=method, route=route, status=str(status)).observe(duration)
+            REQUEST_DB_QUERIES.labels(method=method, route=route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(method=method, route=route).observe(stats.db_seconds)
+            _report_repeated(stats, method, route)
+            logger.info(
+                "%s %s - Status: %s - Duration: %.3fs - DB: %d queries, %.3fs",
+                method, scope["path"], status, duration, stats.queries, stats.db_seconds
+            )
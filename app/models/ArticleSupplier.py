@@ -1,4 +1,4 @@
-from sqlalchemy import String, Numeric, Column, ForeignKey
+from sqlalchemy import String, Numeric, Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 
@@ -15,4 +15,9 @@ class ArticleSupplier(Base):
     price = Column(Numeric(10, 2), nullable=True)
     unit = Column(String(100), nullable=False)
     article = relationship("Article")
-    supplier = relationship("Supplier")
\ No newline at end of file
+    supplier = relationship("Supplier")
+
+    __table_args__ = (
+        Index('ix_article_suppliers_article_supplier', 'article_id', 'supplier_id'),
+        Index('ix_article_suppliers_supplier_id', 'supplier_id'),
+    )
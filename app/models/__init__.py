@@ -14,4 +14,8 @@ from app.models.activity_log import ActivityLog
 from app.models.delivery_days import DeliveryDay
 from app.models.DepartmentSupplier import DepartmentSupplier
 from app.models.article_group import ArticleGroup
-from app.models.reservation import ReservationSummary
\ No newline at end of file
+from app.models.reservation import ReservationSummary, ReservationBooking
+from app.models.sync_state import SyncState
+from app.models.cache_version import CacheVersion
+from app.models.department_closure import DepartmentClosure
+from app.models.job import Job, JobStatus
@@ -1,7 +1,7 @@
 import uuid
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, Text, ForeignKey, String
+from sqlalchemy import Column, DateTime, Enum, Text, ForeignKey, String, Index
 from sqlalchemy.dialects.postgresql import UUID, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -32,11 +32,18 @@ class ActivityLog(Base):
     entity_id = Column(UUID(as_uuid=True), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     user = relationship("User")
+    # Beim Schreiben mitgegeben (Department der Bestellung), damit der Feed ohne Join auf orders auskommt
+    department_id = Column(UUID(as_uuid=True), ForeignKey("departments.id"), nullable=True)
     timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     action_type = Column(Enum(ActionType), nullable=False)
     description = Column(Text, nullable=False)
     old_value = Column(Text, nullable=True)
     new_value = Column(Text, nullable=True)
     details = Column(JSON, nullable=True)
-    
 
+    __table_args__ = (
+        # Verlauf einer einzelnen Bestellung
+        Index('ix_activity_logs_entity', 'entity_id', 'entity_type', 'timestamp'),
+        # Activity-Feed: Index-Range-Scan pro Department, Keyset über (timestamp, id)
+        Index('ix_activity_logs_department_timestamp', 'department_id', timestamp.desc(), id.desc()),
+    )
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String, Boolean, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, ForeignKey, Text, Index, DDL, event, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -15,4 +15,15 @@ class Article(Base):
     article_group = relationship("ArticleGroup")
     notes = Column(Text, nullable=True)
     unit = Column(String(100), nullable=False)
-    is_active = Column(Boolean, nullable=False)
\ No newline at end of file
+    is_active = Column(Boolean, nullable=False)
+
+    __table_args__ = (
+        # Artikelsuche: ILIKE '%…%' und Trigramm-Ähnlichkeit (pg_trgm)
+        Index('ix_articles_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        # Duplikatprüfung beim Anlegen
+        Index('ix_articles_name_lower', func.lower(name)),
+    )
+
+
+# Der Trigramm-Index braucht die Extension, auch bei create_all (Tests)
+event.listen(Article.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.database import Base
+
+
+class CacheVersion(Base):
+    """
+    Versionszähler für prozesslokale Caches.
+    Schreibende Prozesse erhöhen ihn in derselben Transaktion wie die
+    Änderung, alle anderen laden neu, sobald sie eine neue Version sehen.
+    """
+    __tablename__ = "cache_versions"
+
+    name = Column(String(100), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Boolean
+from sqlalchemy import Column, String, ForeignKey, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -14,4 +14,8 @@ class Department(Base):
     parent_id = Column(UUID(as_uuid=True), ForeignKey("departments.id"), nullable=True)
 
     parent = relationship("Department", remote_side=[id], back_populates="children")
-    children = relationship("Department", back_populates="parent")
\ No newline at end of file
+    children = relationship("Department", back_populates="parent")
+
+    __table_args__ = (
+        Index('ix_departments_parent_id', 'parent_id'),
+    )
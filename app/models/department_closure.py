@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer, PrimaryKeyConstraint, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+class DepartmentClosure(Base):
+    """
+    Closure-Tabelle der Department-Hierarchie.
+    Enthält für jedes aktive Department eine Zeile (self, self, 0) und eine Zeile
+    pro aktivem Nachfahren (ancestor, descendant, Abstand).
+    Wird über app.services.department_service gepflegt.
+    """
+    __tablename__ = "department_closure"
+
+    ancestor_id = Column(UUID(as_uuid=True), ForeignKey("departments.id"), nullable=False)
+    descendant_id = Column(UUID(as_uuid=True), ForeignKey("departments.id"), nullable=False)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+        Index('ix_department_closure_descendant_depth', 'descendant_id', 'depth'),
+    )
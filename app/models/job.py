@@ -0,0 +1,38 @@
+import uuid
+import enum
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, Enum, Text, Index
+from sqlalchemy.dialects.postgresql import UUID, JSON
+
+from app.database import Base
+
+
+class JobStatus(enum.Enum):
+    WARTEND = "WARTEND"
+    LAEUFT = "LAEUFT"
+    ERLEDIGT = "ERLEDIGT"
+    FEHLGESCHLAGEN = "FEHLGESCHLAGEN"
+
+
+class Job(Base):
+    """
+    Hintergrund-Job (z.B. PDF rendern + Email an Lieferant).
+    Wird vom Worker (app/scripts/job_worker.py) abgearbeitet.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(JobStatus, name="jobstatus"), nullable=False, default=JobStatus.WARTEND)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+
+    __table_args__ = (
+        Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Text, DateTime, Column, ForeignKey, Enum, Date, Boolean
+from sqlalchemy import Text, DateTime, Column, ForeignKey, Enum, Date, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 import enum
@@ -33,3 +33,10 @@ class Order(Base):
     creator = relationship("User", foreign_keys=[creator_id])
     approver = relationship("User", foreign_keys=[approver_id])
     items = relationship("OrderItem", back_populates="order")
+
+    __table_args__ = (
+        # Bestellliste: aktive Bestellungen, neueste zuerst (Keyset über drafted_on, id)
+        Index('ix_orders_active_drafted_on', drafted_on.desc(), id.desc(), postgresql_where=text('is_active')),
+        Index('ix_orders_department_status', 'department_id', 'status', postgresql_where=text('is_active')),
+        Index('ix_orders_creator_id', 'creator_id'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Numeric, Text
+from sqlalchemy import Column, ForeignKey, Numeric, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 import uuid
@@ -21,4 +21,10 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")
     article = relationship("Article")
     supplier = relationship("Supplier")
-    shipping_group = relationship("ShippingGroup", back_populates="items")
\ No newline at end of file
+    shipping_group = relationship("ShippingGroup", back_populates="items")
+
+    __table_args__ = (
+        Index('ix_order_items_order_id', 'order_id'),
+        Index('ix_order_items_article_id', 'article_id'),
+        Index('ix_order_items_shipping_group_id', 'shipping_group_id'),
+    )
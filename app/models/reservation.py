@@ -2,7 +2,7 @@ import uuid
 import enum
 from datetime import date, datetime, timezone
 
-from sqlalchemy import Column, Date, Integer, DateTime, Enum, UniqueConstraint
+from sqlalchemy import Column, Date, Integer, DateTime, Enum, UniqueConstraint, String, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.database import Base
@@ -30,4 +30,25 @@ class ReservationSummary(Base):
     
     __table_args__ = (
         UniqueConstraint('forecast_date', 'time_slot', name='uq_date_timeslot'),
-    )
\ No newline at end of file
+    )
+
+
+class ReservationBooking(Base):
+    """
+    Letzter bekannter Stand einer einzelnen Teburio-Buchung.
+    Grundlage für den inkrementellen Sync: geänderte Buchungen werden
+    hier aktualisiert und nur die betroffenen Tage/Zeitfenster neu summiert.
+    """
+    __tablename__ = "reservation_bookings"
+
+    id = Column(String(64), primary_key=True)  # Teburio _id
+    forecast_date = Column(Date, nullable=False)
+    time_slot = Column(Enum(TimeSlot), nullable=False)
+    people = Column(Integer, nullable=False, default=0)
+    counted = Column(Boolean, nullable=False, default=True)  # False bei Storno/No-Show
+    synced_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index('ix_reservation_bookings_date_slot', 'forecast_date', 'time_slot'),
+    )
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Enum, Date, DateTime, ForeignKey, String, Boolean, Text
+from sqlalchemy import Column, Enum, Date, DateTime, ForeignKey, String, Boolean, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 import enum
@@ -9,10 +9,16 @@ from app.database import Base
 
 class ShippingGroupStatus(enum.Enum):
     OFFEN = "OFFEN"
+    IN_VERSAND = "IN_VERSAND"
     VERSENDET = "VERSENDET"
     STORNIERT = "STORNIERT"
 
 
+# Sortierdatum der Übersicht für Gruppen ohne Lieferdatum (absteigend ganz vorne).
+# Query und Index müssen denselben Ausdruck verwenden.
+NO_DELIVERY_DATE_SQL = "'9999-12-31'::date"
+
+
 class ShippingGroup(Base):
     __tablename__ = "shipping_groups"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -27,4 +33,16 @@ class ShippingGroup(Base):
 
     items = relationship("OrderItem", back_populates="shipping_group")
     supplier = relationship("Supplier")
-    
\ No newline at end of file
+
+    __table_args__ = (
+        Index('ix_shipping_groups_supplier_delivery_status', 'supplier_id', 'delivery_date', 'status'),
+        # Offene Gruppen: Zuordnung neuer Positionen und Sammel-Freigabe
+        Index('ix_shipping_groups_open', 'supplier_id', 'delivery_date', postgresql_where=text("status = 'OFFEN'")),
+        Index('ix_shipping_groups_open_delivery_date', 'delivery_date', postgresql_where=text("status = 'OFFEN'")),
+        # Übersicht: Sortierung und Keyset-Cursor über (Sortierdatum, id)
+        Index(
+            'ix_shipping_groups_sort_date',
+            text(f"coalesce(delivery_date, {NO_DELIVERY_DATE_SQL}) DESC"),
+            text("id DESC")
+        ),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, Date
+
+from app.database import Base
+
+
+class SyncState(Base):
+    """
+    Fortschritt wiederkehrender Syncs (Watermark + letzter Voll-Sync).
+    Ein Eintrag pro Sync, z.B. name="teburio_reservations".
+    """
+    __tablename__ = "sync_states"
+
+    name = Column(String(100), primary_key=True)
+    watermark = Column(DateTime, nullable=True)
+    last_full_sync_on = Column(Date, nullable=True)
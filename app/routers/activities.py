@@ -1,67 +1,93 @@
+from datetime import datetime
 from uuid import UUID
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.activity_log import ActivityLog
-from app.models.user import User
 from app.models.order import Order
 
 from app.schemas.activity import ActivityResponse
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import joinedload
 
-from app.utils.security import get_current_user, require_role
-from app.database import get_db
-from app.routers.orders import _get_visible_departments
+from app.utils.security import get_permissions_async, require_role
+from app.utils.pagination import decode_cursor, keyset_after, set_next_cursor
+from app.services.permission_service import Permissions
+from app.database import get_async_db
 
 router = APIRouter(prefix="/activities", tags=["activities"])
 
 @router.get("/", response_model=list[ActivityResponse])
-def get_activities(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def get_activities(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    permissions: Permissions = Depends(get_permissions_async),
     department_id: Optional[UUID] = Query(default=None),
-    skip: int = Query(default=0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(default=50, ge=1, le=100)
 ):
-    visible = _get_visible_departments(db, user.department_id)
-    order_query = db.query(Order.id).filter(Order.department_id.in_(visible))
+    """
+    Activity-Feed der sichtbaren Departments, neueste zuerst.
+    Pro Department liest eine eigene Teilabfrage limit + 1 Einträge in
+    Index-Reihenfolge (department_id, timestamp, id), UNION ALL führt sie
+    zusammen und schneidet erneut auf limit + 1. So bleibt jede Seite ein
+    Index-Range-Scan, auch über mehrere Departments.
+    Cursor-Pagination über X-Next-Cursor.
+    """
+    visible = permissions.visible_department_ids
     if department_id:
         if department_id not in visible:
             raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Abteilung")
-        order_query = order_query.filter(Order.department_id == department_id)
+        department_ids = [department_id]
+    else:
+        department_ids = sorted(visible)
+    if not department_ids:
+        return []
 
-    activities = db.query(ActivityLog).filter(
-                ActivityLog.entity_id.in_(order_query)
-                ).options(
-                joinedload(ActivityLog.user)
-                ).order_by(
-                ActivityLog.timestamp.desc()
-                ).offset(skip).limit(limit).all()
-    return activities
+    after = None
+    if cursor:
+        timestamp, activity_id = decode_cursor(cursor, datetime.fromisoformat, UUID)
+        after = keyset_after((ActivityLog.timestamp, ActivityLog.id), (timestamp, activity_id))
+
+    parts = []
+    for dept_id in department_ids:
+        part = select(ActivityLog.id, ActivityLog.timestamp).where(ActivityLog.department_id == dept_id)
+        if after is not None:
+            part = part.where(after)
+        parts.append(part.order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(limit + 1))
+    page = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery("page")
+
+    activities = (await db.execute(
+        select(ActivityLog).join(
+            page, page.c.id == ActivityLog.id
+        ).options(
+            joinedload(ActivityLog.user)
+        ).order_by(
+            page.c.timestamp.desc(), page.c.id.desc()
+        ).limit(limit + 1)
+    )).scalars().all()
+    return set_next_cursor(response, activities, limit, key=lambda a: (a.timestamp, a.id))
 
-    
 
 @router.get("/order/{id}", response_model=list[ActivityResponse])
-def get_order_activities(
+async def get_order_activities(
     id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
-                    
+    db: AsyncSession = Depends(get_async_db),
+    permissions: Permissions = Depends(get_permissions_async)
 ):
-    order = db.query(Order).filter(
-            Order.id == id).first()
+    order = (await db.execute(select(Order).where(
+            Order.id == id))).scalars().first()
     if not order:
         raise HTTPException(status_code=404, detail="Bestellung nicht gefunden")
-    visible = _get_visible_departments(db, user.department_id)
-    if order.department_id not in visible:
+    if order.department_id not in permissions.visible_department_ids:
         raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Bestellung")
     
-    activities = db.query(ActivityLog).filter(
+    activities = (await db.execute(select(ActivityLog).where(
             ActivityLog.entity_id == id,
             ActivityLog.entity_type == "order").options(
             joinedload(ActivityLog.user)).order_by(
-            ActivityLog.timestamp.desc()).all()
+            ActivityLog.timestamp.desc()))).scalars().all()
 
-    return activities
\ No newline at end of file
+    return activities
@@ -1,59 +1,81 @@
 from uuid import UUID
+from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from app.models import User, Article, ArticleGroup, OrderItem, Order, ArticleSupplier, ArticleStorageLocation
 from app.models.order import OrderStatus
-from app.schemas.article import ArticleCreate, ArticleResponse, ArticleUpdate, ArticleOrderHistoryResponse, ArticleOrderHistoryItem
+from app.schemas.article import ArticleCreate, ArticleResponse, ArticleUpdate, ArticleOrderHistoryResponse, ArticleOrderHistoryItem, ArticleSearchResult
 
-from app.database import get_db
-from app.utils.security import get_current_user
+from app.database import get_db, get_async_db
+from app.services.master_data import get_master_data, get_master_data_async
+from app.services import article_search
+from app.utils.security import get_current_user, get_current_user_async
 from app.utils.security import require_role
+from app.utils.pagination import decode_cursor, keyset_after, set_next_cursor
 
 router = APIRouter(prefix="/articles", tags=["articles"])
 
 @router.get("/", response_model=list[ArticleResponse])
-def get_all_articles(
+async def get_all_articles(
     name: Optional[str] = None,
     article_group_id: Optional[UUID] = None,
     is_active: Optional[bool] = None,
     supplier_id: Optional[UUID] = None,
     storage_location_id: Optional[UUID] = None,
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async), 
+    db: AsyncSession = Depends(get_async_db)
     ):
-    query = db.query(Article).options(joinedload(Article.article_group))
+    stmt = select(Article).options(joinedload(Article.article_group))
 
     if is_active is not None:
-        query = query.filter(Article.is_active == is_active)
+        stmt = stmt.where(Article.is_active == is_active)
 
     if article_group_id:
-        query = query.filter(Article.article_group_id == article_group_id)
+        stmt = stmt.where(Article.article_group_id == article_group_id)
     
     if supplier_id:
-        article_ids = db.query(ArticleSupplier.article_id).filter(
+        article_ids = select(ArticleSupplier.article_id).where(
                 ArticleSupplier.supplier_id == supplier_id)
-                query = query.filter(Article.id.in_(article_ids))
+        stmt = stmt.where(Article.id.in_(article_ids))
 
     if storage_location_id:
-        article_ids = db.query(ArticleStorageLocation.article_id).filter(
+        article_ids = select(ArticleStorageLocation.article_id).where(
                 ArticleStorageLocation.storage_location_id == storage_location_id)
-                query = query.filter(Article.id.in_(article_ids))
+        stmt = stmt.where(Article.id.in_(article_ids))
     if name:
-        query = query.filter(Article.name.ilike(f"%{name}%"))
+        stmt = stmt.where(Article.name.ilike(f"%{name}%"))
     
-    return query.all()
+    return (await db.execute(stmt)).scalars().all()
+
+# Muss vor /{id} stehen, sonst wird "search" als id gelesen
+@router.get("/search", response_model=list[ArticleSearchResult])
+async def search_articles(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=20, ge=1, le=50),
+    boost_recent: bool = True,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Artikelsuche für die Bestelleingabe, nach Ähnlichkeit sortiert.
+    Mit boost_recent stehen Artikel, die das eigene Department zuletzt bestellt hat, weiter oben.
+    """
+    department_id = current_user.department_id if boost_recent else None
+    return await article_search.search_articles(db, q, limit, department_id)
 
 @router.get("/{id}", response_model=ArticleResponse)
-def get_article_id(
+async def get_article_id(
                 id: UUID,
-                current_user: User = Depends(get_current_user),
-                db: Session = Depends(get_db)
+                current_user: User = Depends(get_current_user_async),
+                db: AsyncSession = Depends(get_async_db)
 ):
-    article = db.query(Article).options(joinedload(Article.article_group)).filter(Article.id == id).first()
+    article = (await get_master_data_async(db)).articles.get(id)
     if not article:
         raise HTTPException(status_code=404, detail="Artikel ID nicht in DB")
     return article
@@ -70,7 +92,7 @@ def create_article(article: ArticleCreate,
         raise HTTPException(status_code=404, detail="Artikelgruppe nicht gefunden")
     
     # Check ob Artikel mit gleichem Namen exisitert
-    existing_article = db.query(Article).filter(Article.name.ilike(article.name)).first()
+    existing_article = db.query(Article).filter(func.lower(Article.name) == article.name.lower()).first()
     if existing_article:
         raise HTTPException(status_code=409, detail="Artikel mit gleichem Namen existiert bereits")
     
@@ -111,72 +133,88 @@ def delete_article(id: UUID, current_user: User = Depends(get_current_user), db:
     return {"message": "Artikel erfolgreich gelöscht"}
 
 
+def _history_entry(item: OrderItem) -> ArticleOrderHistoryItem:
+    return ArticleOrderHistoryItem(
+        order_item_id=item.id,
+        order_id=item.order_id,
+        amount=float(item.amount),
+        note=item.note,
+        supplier=item.supplier,
+        department=item.order.department,
+        order_status=item.order.status.value,
+        delivery_date=item.order.delivery_date,
+        drafted_on=item.order.drafted_on
+    )
+
+
 @router.get("/{id}/order-history", response_model=ArticleOrderHistoryResponse)
 def get_article_order_history(
     id: UUID,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
     limit: int = Query(default=20, ge=1, le=100)
 ):
     """
     Gibt die Bestellhistorie eines Artikels zurück:
-    - Aktuelle offene Bestellungen (ENTWURF, VOLLSTAENDIG)
-    - Vergangene/abgeschlossene Bestellungen
+    - Aktuelle offene Bestellungen (ENTWURF, VOLLSTAENDIG), immer alle, nur auf der ersten Seite
+    - Vergangene/abgeschlossene Bestellungen, neueste zuerst, limit pro Seite
+      (weitere Seiten über den Cursor aus X-Next-Cursor)
+    Aufteilung, Sortierung und Limit passieren in SQL, geladen werden höchstens limit + 1 vergangene Positionen.
     """
 
     # 1. Artikel prüfen
-    article = db.query(Article).filter(
-        Article.id == id,
-        Article.is_active == True
-    ).first()
+    article = get_master_data(db).active_article(id)
 
     if not article:
         raise HTTPException(status_code=404, detail="Artikel nicht gefunden")
 
-    # 2. Alle OrderItems für diesen Artikel laden
-    order_items = db.query(OrderItem).options(
-        joinedload(OrderItem.order).joinedload(Order.department),
-        joinedload(OrderItem.supplier)
-    ).join(
-        Order, OrderItem.order_id == Order.id
-    ).filter(
-        OrderItem.article_id == id,
-        Order.is_active == True
-    ).order_by(
-        Order.drafted_on.desc()
-    ).all()
-
-    # 3. In aktive und vergangene aufteilen
     active_statuses = [OrderStatus.ENTWURF, OrderStatus.VOLLSTAENDIG]
 
-    active_orders = []
-    past_orders = []
-
-    for item in order_items:
-        entry = ArticleOrderHistoryItem(
-            order_item_id=item.id,
-            order_id=item.order_id,
-            amount=float(item.amount),
-            note=item.note,
-            supplier=item.supplier,
-            department=item.order.department,
-            order_status=item.order.status.value,
-            delivery_date=item.order.delivery_date,
-            drafted_on=item.order.drafted_on
+    def items_query():
+        return db.query(OrderItem).join(
+            Order, OrderItem.order_id == Order.id
+        ).options(
+            contains_eager(OrderItem.order).joinedload(Order.department),
+            joinedload(OrderItem.supplier)
+        ).filter(
+            OrderItem.article_id == id,
+            Order.is_active == True
+        ).order_by(
+            Order.drafted_on.desc(), OrderItem.id.desc()
         )
 
-        if item.order.status in active_statuses:
-            active_orders.append(entry)
-        else:
-            past_orders.append(entry)
+    # 2. Offene Bestellungen (wenige, immer vollständig)
+    active_orders = []
+    if not cursor:
+        active_orders = [
+            _history_entry(item)
+            for item in items_query().filter(Order.status.in_(active_statuses)).all()
+        ]
+
+    # 3. Vergangene Bestellungen: eine Seite per Keyset
+    past_query = items_query().filter(Order.status.notin_(active_statuses))
+    if cursor:
+        drafted_on, item_id = decode_cursor(cursor, datetime.fromisoformat, UUID)
+        past_query = past_query.filter(keyset_after((Order.drafted_on, OrderItem.id), (drafted_on, item_id)))
+    past_items = set_next_cursor(
+        response, past_query.limit(limit + 1).all(), limit,
+        key=lambda item: (item.order.drafted_on, item.id)
+    )
 
-    # 4. Past orders limitieren (active immer alle zeigen)
-    past_orders = past_orders[:limit]
+    # 4. Gesamtzahl per COUNT statt alle Zeilen zu laden
+    total_orders = db.query(func.count(OrderItem.id)).join(
+        Order, OrderItem.order_id == Order.id
+    ).filter(
+        OrderItem.article_id == id,
+        Order.is_active == True
+    ).scalar()
 
     return ArticleOrderHistoryResponse(
         article_id=article.id,
         article_name=article.name,
         active_orders=active_orders,
-        past_orders=past_orders,
-        total_orders=len(order_items)
-    )
\ No newline at end of file
+        past_orders=[_history_entry(item) for item in past_items],
+        total_orders=total_orders
+    )
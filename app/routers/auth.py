@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 import pyotp
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.schemas.auth import LoginRequest, TokenResponse, RefreshRequest, TwoFactorSetupResponse, TwoFactorSetupVerifyRequest, LoginResponse, TwoFactorValidateRequest, PasswordChangeRequest
 from app.schemas.user import UserResponse
 from app.models import User
-from app.utils.security import verify_password, create_access_token, create_refresh_token, decode_token, get_current_user, hash_password, create_temporary_token
+from app.utils.security import create_access_token, create_refresh_token, decode_token, get_current_db_user, create_temporary_token, principal_claims
+from app.services.permission_service import permissions_version, permissions_version_async
+from app.services import password_service
 from app.config import settings
 
 from app.utils.rate_limit import limiter
@@ -18,20 +22,31 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 # Login und Prüfung auf 2FA
+# async: bcrypt läuft im Prozess-Pool, der Request wartet ohne einen Worker-Thread zu belegen
 @router.post("/login", response_model=LoginResponse)
 @limiter.limit("5/minute")
-def login(
+async def login(
         request: Request,
         credentials: LoginRequest,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.email == credentials.email).first()
+    # Version vor dem User lesen: ändert er sich dazwischen, passen die Claims nicht und werden gegen die DB geprüft
+    version = await permissions_version_async(db)
+    result = await db.execute(
+        select(User).options(joinedload(User.role)).where(User.email == credentials.email)
+    )
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=401, detail="Email oder Passwort falsch")
-    if not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = await password_service.verify_and_update_async(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Email oder Passwort falsch")
     if not user.is_active:
         raise HTTPException(status_code=401, detail="Account deaktiviert")
+    # Cost-Faktor hat sich geändert → Hash mit aktuellem Faktor speichern
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
     if user.is_2fa_enabled:
         temp_token = create_temporary_token({"sub": str(user.id)})
         return LoginResponse(
@@ -39,7 +54,7 @@ def login(
             requires_2fa=True
         )
     # Wenn keine 2FA enabled, direkt access und refresh token ausstellen
-    access_token = create_access_token({"sub": str(user.id)})
+    access_token = create_access_token(principal_claims(user, version))
     refresh_token = create_refresh_token({"sub": str(user.id)})
 
     return LoginResponse(
@@ -50,12 +65,18 @@ def login(
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_access_token(request: RefreshRequest):
+def refresh_access_token(request: RefreshRequest, db: Session = Depends(get_db)):
     payload = decode_token(request.refresh_token, "refresh")
     if not payload:
         raise HTTPException(status_code=401, detail="Refresh Token abgelaufen")
     
-    access_token = create_access_token({"sub": (payload.get("sub"))})
+    # Claims im neuen Access-Token aus dem aktuellen Stand der DB
+    version = permissions_version(db)
+    user = db.query(User).filter(User.id == payload.get("sub")).first()
+    if not user or not user.is_active:
+        raise HTTPException(status_code=401, detail="Account deaktiviert")
+    
+    access_token = create_access_token(principal_claims(user, version))
     refresh_token = create_refresh_token({"sub": (payload.get("sub"))})
         
 
@@ -65,7 +86,7 @@ def refresh_access_token(request: RefreshRequest):
     )
 
 @router.get("/me", response_model = UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: User = Depends(get_current_db_user)):
     return current_user
 
 
@@ -73,7 +94,7 @@ def get_me(current_user: User = Depends(get_current_user)):
 # 2FA-Auth
 @router.post("/2fa/setup", response_model=TwoFactorSetupResponse)
 def two_fa_auth_setup(
-                    current_user: User = Depends(get_current_user),
+                    current_user: User = Depends(get_current_db_user),
                     db: Session = Depends(get_db)
 ):
     if current_user.totp_secret:
@@ -96,7 +117,7 @@ def two_fa_auth_setup(
 def two_fa_setup_verification(
                             request: Request,
                             entered_code: TwoFactorSetupVerifyRequest,
-                            current_user: User = Depends(get_current_user),
+                            current_user: User = Depends(get_current_db_user),
                             db: Session = Depends(get_db)
 ) -> dict:
     if not current_user.totp_secret:
@@ -121,6 +142,7 @@ def validate_otp(
     if not payload:
         raise HTTPException(status_code=401, detail="Temporary Token abgelaufen")
     user_id = payload.get("sub")
+    version = permissions_version(db)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=403, detail="User nicht in Datenbank")
@@ -129,7 +151,7 @@ def validate_otp(
     if not totp.verify(two_fa_request.code):
         raise HTTPException(status_code=401, detail="Code ungültig")
     
-    access_token = create_access_token({"sub": (payload.get("sub"))})
+    access_token = create_access_token(principal_claims(user, version))
     refresh_token = create_refresh_token({"sub": (payload.get("sub"))})
         
 
@@ -143,14 +165,15 @@ def validate_otp(
 def change_password(
                 request: PasswordChangeRequest,
                 db: Session = Depends(get_db),
-                current_user: User = Depends(get_current_user)
+                current_user: User = Depends(get_current_db_user)
 ) -> dict:
-    if not verify_password(request.old_password, current_user.password_hash):
+    valid, _ = password_service.verify_and_update(request.old_password, current_user.password_hash)
+    if not valid:
         raise HTTPException(status_code=400, detail="Altes Passwort ist falsch")
     if request.old_password == request.new_password:
         raise HTTPException(status_code=400, detail="Das neue Passwort muss sich von dem bestehenden Passwort unterscheiden")
     
-    new_password_hash = hash_password(request.new_password)
+    new_password_hash = password_service.hash_password(request.new_password)
     current_user.password_hash = new_password_hash
     db.commit()
 
@@ -6,6 +6,12 @@ from typing import Optional
 from app.database import get_db
 from app.models.department import Department
 from app.models.user import User
+from app.services.department_service import (
+    add_department_to_closure,
+    move_department_in_closure,
+    remove_department_from_closure,
+    is_descendant
+)
 from app.utils.security import get_current_user, require_role
 from app.schemas.department import DepartmentCreate, DepartmentUpdate, DepartmentResponse
 
@@ -51,6 +57,9 @@ def create_department(department: DepartmentCreate, current_user: User = Depends
     
     new_department = Department(**department.model_dump())
     db.add(new_department)
+    db.flush()
+    if new_department.is_active:
+        add_department_to_closure(db, new_department)
     db.commit()
     db.refresh(new_department)
     
@@ -76,11 +85,29 @@ def update_department(id: UUID, department_update: DepartmentUpdate, current_use
         # Sich selbst als Parent verhindern
         if department_update.parent_id == id:
             raise HTTPException(status_code=400, detail="Bereich kann nicht sein eigener Parent sein")
+        # Zyklen verhindern
+        if is_descendant(db, department_update.parent_id, id):
+            raise HTTPException(status_code=400, detail="Bereich kann nicht unter einen eigenen Unterbereich verschoben werden")
     
     update_data = department_update.model_dump(exclude_unset=True)
+    # Deaktivieren wie beim Löschen nur ohne aktive Unterbereiche
+    if update_data.get("is_active") is False:
+        has_active_children = db.query(Department.id).filter(
+            Department.parent_id == id, Department.is_active == True
+        ).first()
+        if has_active_children:
+            raise HTTPException(status_code=400, detail="Bereich hat aktive Unterbereiche")
+
+    parent_changed = "parent_id" in update_data and update_data["parent_id"] != department.parent_id
     for field, value in update_data.items():
         setattr(department, field, value)
     
+    # Closure-Tabelle nachziehen
+    if department.is_active == False:
+        remove_department_from_closure(db, id)
+    elif parent_changed:
+        move_department_in_closure(db, id, department.parent_id)
+    
     db.commit()
     
     return db.query(Department).options(
@@ -102,5 +129,6 @@ def delete_department(id: UUID, current_user: User = Depends(get_current_user),
         raise HTTPException(status_code=400, detail="Bereich hat aktive Unterbereiche")
     
     department.is_active = False
+    remove_department_from_closure(db, id)
     db.commit()
     return {"message": "Bereich gelöscht"}
\ No newline at end of file
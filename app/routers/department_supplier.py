@@ -37,7 +37,7 @@ def update_department_supplier(
                     request: DepartmentSupplierUpdate,
                     id: UUID,
                     db: Session = Depends(get_db),
-                    current_user: User = (get_current_user)
+                    current_user: User = Depends(get_current_user)
 ):
     department_supplier = db.query(DepartmentSupplier).options(
         joinedload(DepartmentSupplier.department),
@@ -0,0 +1,33 @@
+import logging
+from datetime import date
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.schemas.forecast import SuggestedOrderResponse
+from app.services.forecast_service import suggest_order
+from app.services.permission_service import Permissions
+from app.utils.security import get_permissions
+
+logger = logging.getLogger("app.routers.forecast")
+
+router = APIRouter(prefix="/forecast", tags=["forecast"])
+
+
+@router.get("/suggested-order", response_model=SuggestedOrderResponse)
+def get_suggested_order(
+    department_id: UUID = Query(...),
+    delivery_date: date = Query(...),
+    db: Session = Depends(get_db),
+    permissions: Permissions = Depends(get_permissions)
+):
+    """
+    Bestellvorschlag für ein Department und einen Liefertag.
+    Menge = Verbrauch pro Gast (aus der Historie, je Wochentag) × reservierte Gäste.
+    """
+    if not permissions.can_edit_department(department_id):
+        raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Abteilung")
+
+    return suggest_order(db, department_id, delivery_date)
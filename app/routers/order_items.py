@@ -3,15 +3,18 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 
-from app.models import User, OrderItem, Supplier, ApproverSupplier
+from app.models import User, OrderItem
 from app.models.order import OrderStatus
 from app.models.shipping_group import ShippingGroup, ShippingGroupStatus
 from app.models.activity_log import ActionType
 from app.schemas.order import OrderItemResponse, OrderItemUpdate, OrderItemAssignSupplier
 
 from app.services.activity_service import log_activity
-from app.services.order_service import _can_edit_order, _get_next_delivery_date
-from app.utils.security import get_current_user
+from app.services.order_service import _can_edit_order
+from app.services.delivery_calendar import get_next_delivery_date
+from app.services.master_data import get_master_data
+from app.utils.security import get_current_user, get_permissions
+from app.services.permission_service import Permissions
 from app.database import get_db
 
 router = APIRouter(prefix="/order-items", tags=["order-items"])
@@ -62,7 +65,8 @@ def update_order_item(order_item_update: OrderItemUpdate,
                 action_type=action_type,
                 description=f"{order_item.article.name}: {field} geändert",
                 old_value=str(old_value) if old_value else None,
-                new_value=str(new_value) if new_value else None
+                new_value=str(new_value) if new_value else None,
+                department_id=order.department_id
             )
 
         setattr(order_item, field, new_value)
@@ -88,14 +92,15 @@ def delete_order_item(id: UUID,
     if not _can_edit_order(db, current_user, order):
         raise HTTPException(status_code=403, detail="Keine Berechtigung diese Bestellung zu bearbeiten")
     item_details = {
-        "article_id": order_item.article.id,
+        "article_id": str(order_item.article.id),
         "article_name": order_item.article.name,
         "amount": order_item.amount,
-        "department": order.department_id
+        "department": str(order.department_id) if order.department_id else None
         }
     db.delete(order_item)
+    log_activity(db, "order", order.id, current_user.id, ActionType.ITEM_REMOVED, "Artikel entfernt",
+                 details=item_details, department_id=order.department_id)
     db.commit()
-    log_activity(db, "order", order.id, current_user.id, ActionType.ITEM_REMOVED, "Artikel entfernt", details=item_details)
     return {"message": "Bestellter Artikel gelöscht"}
 
 
@@ -104,6 +109,7 @@ def assign_supplier_to_order_item(
     id: UUID,
     supplier_data: OrderItemAssignSupplier,
     current_user: User = Depends(get_current_user),
+    permissions: Permissions = Depends(get_permissions),
     db: Session = Depends(get_db)
 ):
     """
@@ -131,25 +137,15 @@ def assign_supplier_to_order_item(
             detail="Lieferant kann nur bei Entwurf oder vollständigen Bestellungen zugewiesen werden"
         )
 
-    # 3. Berechtigungs-Check: Admin darf immer, sonst ApproverSupplier prüfen
-    if current_user.role.name != "Admin":
-        is_approver = db.query(ApproverSupplier).filter(
-            ApproverSupplier.user_id == current_user.id,
-            ApproverSupplier.supplier_id == supplier_data.supplier_id
-        ).first()
-
-        if not is_approver:
-            raise HTTPException(
-                status_code=403,
-                detail="Keine Berechtigung für diesen Lieferanten"
-            )
+    # 3. Berechtigungs-Check: Admin darf immer, sonst ApproverSupplier (vorberechnet)
+    if not permissions.can_approve(supplier_data.supplier_id):
+        raise HTTPException(
+            status_code=403,
+            detail="Keine Berechtigung für diesen Lieferanten"
+        )
 
     # 4. Lieferant validieren
-    supplier = db.query(Supplier).filter(
-        Supplier.id == supplier_data.supplier_id,
-        Supplier.is_active == True
-    ).first()
-
+    supplier = get_master_data(db).active_supplier(supplier_data.supplier_id)
     if not supplier:
         raise HTTPException(status_code=404, detail="Lieferant nicht gefunden")
 
@@ -161,7 +157,7 @@ def assign_supplier_to_order_item(
     order_item.supplier_id = supplier.id
 
     # 7. Lieferdatum berechnen (wenn Lieferant feste Liefertage hat)
-    delivery_date = _get_next_delivery_date(db, supplier.id)
+    delivery_date = get_next_delivery_date(db, supplier.id)
 
     # 8. ShippingGroup finden oder erstellen
     if delivery_date:
@@ -182,11 +178,7 @@ def assign_supplier_to_order_item(
 
         order_item.shipping_group_id = shipping_group.id
 
-    # 9. Speichern
-    db.commit()
-    db.refresh(order_item)
-
-    # 10. Activity Log
+    # 9. Activity Log (wird mit dem Commit geschrieben)
     log_activity(
         db=db,
         entity_type="order",
@@ -202,7 +194,12 @@ def assign_supplier_to_order_item(
             "old_supplier_id": str(old_supplier_id) if old_supplier_id else None,
             "new_supplier_id": str(supplier.id),
             "delivery_date": str(delivery_date) if delivery_date else None
-        }
+        },
+        department_id=order.department_id
     )
 
+    # 10. Speichern
+    db.commit()
+    db.refresh(order_item)
+
     return order_item
\ No newline at end of file
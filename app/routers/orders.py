@@ -1,20 +1,25 @@
 from uuid import UUID
-from typing import Optional
-from datetime import date
+from typing import Optional, Literal
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.models import User, Order, OrderItem, Department
+from app.models import User, Order, OrderItem
 from app.models.activity_log import ActionType
 from app.models.order import OrderStatus
-from app.schemas.order import OrderCreate, OrderResponse, OrderUpdate, OrderItemCreate
+from app.schemas.order import OrderCreate, OrderResponse, OrderSummaryResponse, OrderUpdate, OrderItemCreate
 
 from app.services import order_service
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.services.activity_service import log_activity
-from app.utils.security import get_current_user, require_role
+from app.utils.security import get_current_user, get_current_user_async, get_permissions, get_permissions_async, require_role
+from app.services.permission_service import Permissions, ALL_DEPARTMENTS
 from app.services.order_service import _can_edit_order
+from app.utils.pagination import decode_cursor, keyset_after, set_next_cursor
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -26,104 +31,172 @@ def _get_order_action_type_for_field(field: str) -> ActionType:
     }
     return mapping.get(field, ActionType.NOTE_CHANGED)
 
-def _get_visible_departments(db: Session, user_department_id: UUID) -> list[UUID]:
+# Export wird in Blöcken dieser Größe aus der DB gelesen
+EXPORT_BATCH_SIZE = 500
+
+
+def _filtered_orders_select(
+    visible_departments: Optional[list[UUID]],
+    status: Optional[OrderStatus],
+    department_id: Optional[UUID],
+    creator_id: Optional[UUID],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    *entities
+) -> Select:
     """
-    Holt alle Departments die der User sehen darf:
-    - Eigenes Department
-    - Parent (eine Stufe hoch)
-    - Alle Geschwister (Children des Parents)
-    - Alle eigenen Children (eine Stufe runter)
+    Gemeinsame Filter + Sichtbarkeit für Liste und Export.
+    visible_departments=None → Admin, keine Einschränkung.
     """
-    result = [user_department_id]
-    
-    # Eigenes Department holen
-    department = db.query(Department).filter(Department.id == user_department_id).first()
+    stmt = select(Order, *entities).where(Order.is_active == True)
+
+    if status:
+        stmt = stmt.where(Order.status == status)
     
-    if department:
-        # Parent und Geschwister
-        if department.parent_id:
-            result.append(department.parent_id)
-            
-            siblings = db.query(Department).filter(
-                Department.parent_id == department.parent_id,
-                Department.is_active == True
-            ).all()
-            
-            for sibling in siblings:
-                if sibling.id not in result:
-                    result.append(sibling.id)
-        
-        # Eigene Children hinzufügen
-        children = db.query(Department).filter(
-            Department.parent_id == user_department_id,
-            Department.is_active == True
-        ).all()
+    if department_id:
+        stmt = stmt.where(Order.department_id == department_id)
+
+    if creator_id:
+        stmt = stmt.where(Order.creator_id == creator_id)
+
+    if date_from:
+        stmt = stmt.where(Order.drafted_on >= date_from)
         
-        for child in children:
-            if child.id not in result:
-                result.append(child.id)
+    if date_to:
+        stmt = stmt.where(Order.drafted_on <= date_to)
     
-    return result
+    if visible_departments is not None:
+        stmt = stmt.where(Order.department_id.in_(visible_departments))
+    
+    return stmt.order_by(Order.drafted_on.desc(), Order.id.desc())
+
 
-@router.get("/", response_model=list[OrderResponse])
-def get_orders(
+def _order_options(with_items: bool = True) -> list:
+    options = [
+        joinedload(Order.department),
+        joinedload(Order.creator),
+        joinedload(Order.approver)
+    ]
+    if with_items:
+        options += [
+            selectinload(Order.items).joinedload(OrderItem.article),
+            selectinload(Order.items).joinedload(OrderItem.supplier)
+        ]
+    return options
+
+
+@router.get("/", response_model=list[OrderResponse] | list[OrderSummaryResponse])
+async def get_orders(
+    response: Response,
     status: Optional[OrderStatus] = None,
     department_id: Optional[UUID] = None,
     creator_id: Optional[UUID] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    fields: Literal["full", "summary"] = "full",
+    permissions: Permissions = Depends(get_permissions_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Order).options(
-        joinedload(Order.department),
-        joinedload(Order.creator),
-        joinedload(Order.approver),
-        joinedload(Order.items).joinedload(OrderItem.article),
-        joinedload(Order.items).joinedload(OrderItem.supplier)
-    ).filter(Order.is_active == True)
-
-    if status:
-        query = query.filter(Order.status == status)
+    """
+    Bestellungen, neueste zuerst, sortiert nach (drafted_on, id).
+    - Cursor-Pagination: nächste Seite über den Header X-Next-Cursor
+    - fields=summary: ohne Positionen, nur mit Anzahl
+    """
+    visible_departments = permissions.department_filter()
     
-    if department_id:
-        query = query.filter(Order.department_id == department_id)
+    item_count = select(func.count(OrderItem.id)).where(
+        OrderItem.order_id == Order.id
+    ).correlate(Order).scalar_subquery().label("item_count")
+    
+    entities = (item_count,) if fields == "summary" else ()
+    stmt = _filtered_orders_select(
+        visible_departments, status, department_id, creator_id, date_from, date_to, *entities
+    ).options(*_order_options(with_items=fields == "full"))
+    
+    if cursor:
+        drafted_on, order_id = decode_cursor(cursor, datetime.fromisoformat, UUID)
+        stmt = stmt.where(keyset_after((Order.drafted_on, Order.id), (drafted_on, order_id)))
+    
+    result = await db.execute(stmt.limit(limit + 1))
+    
+    if fields == "summary":
+        rows = set_next_cursor(response, result.all(), limit, key=lambda row: (row[0].drafted_on, row[0].id))
+        return [
+            OrderSummaryResponse(
+                id=order.id,
+                department=order.department,
+                creator=order.creator,
+                approver=order.approver,
+                delivery_date=order.delivery_date,
+                status=order.status.value,
+                item_count=count,
+                additional_articles=order.additional_articles,
+                delivery_notes=order.delivery_notes,
+                drafted_on=order.drafted_on,
+                is_active=order.is_active
+            )
+            for order, count in rows
+        ]
+    
+    orders = result.scalars().all()
+    return set_next_cursor(response, orders, limit, key=lambda order: (order.drafted_on, order.id))
 
-    if creator_id:
-        query = query.filter(Order.creator_id == creator_id)
 
-    if date_from:
-        query = query.filter(Order.drafted_on >= date_from)
-        
-    if date_to:
-        query = query.filter(Order.drafted_on <= date_to)
+@router.get("/export")
+def export_orders(
+    status: Optional[OrderStatus] = None,
+    department_id: Optional[UUID] = None,
+    creator_id: Optional[UUID] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    permissions: Permissions = Depends(get_permissions),
+    db: Session = Depends(get_db)
+):
+    """
+    Alle passenden Bestellungen inkl. Positionen als gestreamtes JSON-Array.
+    Die DB wird blockweise gelesen, der Speicherbedarf bleibt konstant.
+    """
+    visible_departments = permissions.department_filter()
+    
+    stmt = _filtered_orders_select(
+        visible_departments, status, department_id, creator_id, date_from, date_to
+    ).options(*_order_options()).execution_options(yield_per=EXPORT_BATCH_SIZE)
     
-    if current_user.role.name != "Admin":
-        visible_departments = _get_visible_departments(db, current_user.department_id)
-        query = query.filter(Order.department_id.in_(visible_departments))
+    def generate():
+        yield "["
+        first = True
+        for order in db.scalars(stmt):
+            if not first:
+                yield ","
+            first = False
+            yield OrderResponse.model_validate(order).model_dump_json()
+        yield "]"
     
-    return query.all()
+    return StreamingResponse(
+        generate(),
+        media_type="application/json",
+        headers={"Content-Disposition": 'attachment; filename="bestellungen.json"'}
+    )
 
 
 @router.get("/{id}", response_model=OrderResponse)
-def get_order(
+async def get_order(
     id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    permissions: Permissions = Depends(get_permissions_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).options(
-        joinedload(Order.department),
-        joinedload(Order.creator),
-        joinedload(Order.approver),
-        joinedload(Order.items).joinedload(OrderItem.article),
-        joinedload(Order.items).joinedload(OrderItem.supplier)
-    ).filter(Order.id == id, Order.is_active == True).first()
+    order = (await db.execute(
+        select(Order).options(*_order_options()).where(Order.id == id, Order.is_active == True)
+    )).scalars().first()
     
     if not order:
         raise HTTPException(status_code=404, detail="Bestellung nicht gefunden")
     
     # Berechtigung prüfen
-    if current_user.role.name != "Admin" and order.department_id != current_user.department_id:
+    if order.department_id != current_user.department_id and not permissions.has(ALL_DEPARTMENTS):
         raise HTTPException(status_code=404, detail="Keine Berechtigung für diese Bestellung")
     
     return order
@@ -152,8 +225,9 @@ def delete_order(
     
     # Soft Delete
     order.is_active = False
+    log_activity(db, "order", id, current_user.id, ActionType.ORDER_CANCELLED, "Bestellung gelöscht",
+                 department_id=order.department_id)
     db.commit()
-    log_activity(db, "order", id, current_user.id, ActionType.ORDER_CANCELLED, "Bestellung gelöscht")
     return {"message": "Bestellung gelöscht"}
 
 
@@ -199,7 +273,8 @@ def update_order(
                 action_type=action_type,
                 description=f"{field} geändert",
                 old_value=str(old_value) if old_value else None,
-                new_value=str(new_value) if new_value else None
+                new_value=str(new_value) if new_value else None,
+                department_id=order.department_id
             )
         
         setattr(order, field, new_value)
@@ -226,9 +301,3 @@ def abschliessen_order(
     db: Session = Depends(get_db)
 ):
     return order_service.close_order(db, current_user, id)
-
-
-# Activity Log Endpunkt
-
-@router.get("/{id}/activities")
-def get
\ No newline at end of file
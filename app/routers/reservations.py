@@ -1,17 +1,11 @@
 import logging
-from datetime import date, timedelta
-from typing import Optional
-
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import User
-from app.models.reservation import ReservationSummary, TimeSlot
-from app.schemas.reservation import (
-     ReservationOverviewResponse,
-     DailyReservationResponse
-)
+from app.schemas.reservation import ReservationOverviewResponse
+from app.services.reservation_overview import overview_key, overview_etag, etag_matches, get_overview
 from app.utils.security import get_current_user
 
 logger = logging.getLogger("app.routers.reservations")
@@ -20,6 +14,8 @@ router = APIRouter(prefix="/reservations", tags=["reservations"])
 
 @router.get("/overview", response_model=ReservationOverviewResponse)
 def get_reservation_overview(
+    request: Request,
+    response: Response,
     days: int = Query(default=7, ge=1, le=30),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -27,64 +23,15 @@ def get_reservation_overview(
     """
     Gibt die Reservierungsübersicht für die nächsten X Tage zurück.
     Jeder Tag zeigt Mittag + Abend separat und als Summe.
+    Die Übersicht wird pro Sync einmal berechnet; mit If-None-Match
+    kommt 304, solange sich seit dem letzten Abruf nichts geändert hat.
     """
-    today = date.today()
-    end = today + timedelta(days=days)
-
-    # Alle Einträge im Zeitraum laden
-    summaries = db.query(ReservationSummary).filter(
-        ReservationSummary.forecast_date >= today,
-        ReservationSummary.forecast_date <= end
-    ).order_by(
-        ReservationSummary.forecast_date
-    ).all()
-
-    # Nach Datum gruppieren
-    by_date = {}
-    last_synced = None
-
-    for s in summaries:
-        if s.forecast_date not in by_date:
-            by_date[s.forecast_date] = {
-                "mittag_reservations": 0,
-                "mittag_guests": 0,
-                "abend_reservations": 0,
-                "abend_guests": 0
-            }
-
-        if s.time_slot == TimeSlot.MITTAG:
-            by_date[s.forecast_date]["mittag_reservations"] = s.total_reservations
-            by_date[s.forecast_date]["mittag_guests"] = s.total_guests
-        elif s.time_slot == TimeSlot.ABEND:
-            by_date[s.forecast_date]["abend_reservations"] = s.total_reservations
-            by_date[s.forecast_date]["abend_guests"] = s.total_guests
-
-        # Letzten Sync-Zeitpunkt tracken
-        if not last_synced or s.synced_at > last_synced:
-            last_synced = s.synced_at
-
-    # Response bauen (auch Tage OHNE Reservierungen zeigen)
-    daily_list = []
-    for i in range(days):
-        d = today + timedelta(days=i)
-        data = by_date.get(d, {
-            "mittag_reservations": 0,
-            "mittag_guests": 0,
-            "abend_reservations": 0,
-            "abend_guests": 0
-        })
+    key = overview_key(db, days)
+    etag = overview_etag(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-        daily_list.append(DailyReservationResponse(
-            forecast_date=d,
-            mittag_reservations=data["mittag_reservations"],
-            mittag_guests=data["mittag_guests"],
-            abend_reservations=data["abend_reservations"],
-            abend_guests=data["abend_guests"],
-            total_reservations=data["mittag_reservations"] + data["abend_reservations"],
-            total_guests=data["mittag_guests"] + data["abend_guests"]
-        ))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
 
-    return ReservationOverviewResponse(
-        days=daily_list,
-        last_synced=last_synced
-    )
+    response.headers.update(headers)
+    return get_overview(db, key)
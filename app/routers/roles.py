@@ -3,14 +3,14 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models.role import Role
 from app.models.user import User
 from app.utils.security import get_current_user
 from app.schemas.role import RoleResponse
+from app.services.master_data import get_master_data
 
 router = APIRouter(prefix="/roles", tags=["roles"])
 
 
 @router.get("/", response_model=list[RoleResponse])
 def get_all_roles(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(Role).all()
\ No newline at end of file
+    return [RoleResponse(id=role_id, name=name) for role_id, name in get_master_data(db).roles.items()]
\ No newline at end of file
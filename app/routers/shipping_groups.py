@@ -4,21 +4,27 @@ from uuid import UUID
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import FileResponse
+from sqlalchemy import Date, distinct, func, literal_column, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
 
-from app.models import User, ShippingGroup, OrderItem, ApproverSupplier, Order
-from app.models.shipping_group import ShippingGroupStatus
-from app.schemas.shipping_group import ShippingGroupResponse, ShippingGroupDetailResponse, ShippingGroupOrderInfo
+from app.models import User, ShippingGroup, OrderItem, Order
+from app.models.shipping_group import ShippingGroupStatus, NO_DELIVERY_DATE_SQL
+from app.schemas.shipping_group import (
+    ShippingGroupResponse, ShippingGroupDetailResponse, ShippingGroupSummaryResponse,
+    ShippingGroupBatchRelease, ShippingGroupBatchReleaseResponse
+)
 from app.models.activity_log import ActionType
 
-from app.database import get_db
-from app.services.pdf_service import generate_shipping_group_pdf
-from app.services.email_service import send_order_email
-from app.utils.security import get_current_user
+from app.database import get_db, get_async_db
+from app.services.shipping_group_service import mark_for_sending, mark_batch_for_sending
+from app.utils.security import get_current_user_async, get_permissions, get_permissions_async
+from app.services.permission_service import Permissions
 from app.services.activity_service import log_activity
+from app.utils.pagination import decode_cursor, keyset_after, set_next_cursor
 
 
 
@@ -27,66 +33,212 @@ logger = logging.getLogger("app.routers.shipping_groups")
 router = APIRouter(prefix="/shipping-groups", tags=["shipping-groups"])
 
 
-@router.get("/", response_model=list[ShippingGroupResponse])
-def get_shipping_groups(
+def _with_items():
+    return (
+        joinedload(ShippingGroup.supplier),
+        joinedload(ShippingGroup.items).joinedload(OrderItem.article),
+        joinedload(ShippingGroup.items).joinedload(OrderItem.supplier)
+    )
+
+
+def _sort_date():
+    # Gruppen ohne Lieferdatum stehen in der absteigenden Sortierung vorne.
+    # Als Literal statt Parameter, damit der Ausdruck zu ix_shipping_groups_sort_date passt.
+    return func.coalesce(ShippingGroup.delivery_date, literal_column(NO_DELIVERY_DATE_SQL, Date))
+
+
+@router.get("/", response_model=list[ShippingGroupSummaryResponse])
+async def get_shipping_groups(
+    response: Response,
     status: Optional[ShippingGroupStatus] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    permissions: Permissions = Depends(get_permissions_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Liste aller ShippingGroups.
+    Übersicht der ShippingGroups ohne Positionen, neuestes Lieferdatum zuerst.
     - Admin: sieht alle
     - Freigeber: sieht nur ShippingGroups seiner Lieferanten
+    - Positionen, Bestellungen und Departments nur als Anzahl (Aggregat in SQL, nur für die Seite)
+    - Filter auf Lieferdatum (date_from/date_to), Cursor-Pagination über X-Next-Cursor
+    Positionen lädt nur GET /shipping-groups/{id}.
     """
-    query = db.query(ShippingGroup).options(
-        joinedload(ShippingGroup.supplier),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.article),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.supplier)
-    )
-    
-    # Optional: Filter nach Status
+    # Erst die Seite der Gruppen bestimmen, dann per LATERAL nur für diese zählen
+    page = select(ShippingGroup.id, _sort_date().label("sort_date"))
+
     if status:
-        query = query.filter(ShippingGroup.status == status)
+        page = page.where(ShippingGroup.status == status)
+    if date_from:
+        page = page.where(ShippingGroup.delivery_date >= date_from)
+    if date_to:
+        page = page.where(ShippingGroup.delivery_date <= date_to)
+
+    # Admin sieht alles, Freigeber nur seine Lieferanten
+    supplier_ids = permissions.supplier_filter()
+    if supplier_ids is not None:
+        page = page.where(ShippingGroup.supplier_id.in_(supplier_ids))
+
+    if cursor:
+        sort_date, group_id = decode_cursor(cursor, date.fromisoformat, UUID)
+        page = page.where(keyset_after((_sort_date(), ShippingGroup.id), (sort_date, group_id)))
+
+    page = page.order_by(_sort_date().desc(), ShippingGroup.id.desc()).limit(limit + 1).subquery()
+
+    counts = select(
+        func.count(OrderItem.id).label("item_count"),
+        func.count(distinct(Order.id)).label("order_count"),
+        func.count(distinct(Order.department_id)).label("department_count")
+    ).join(
+        Order, Order.id == OrderItem.order_id
+    ).where(
+        OrderItem.shipping_group_id == ShippingGroup.id,
+        Order.is_active.is_(True)
+    ).lateral("counts")
+
+    stmt = select(
+        ShippingGroup,
+        page.c.sort_date,
+        counts.c.item_count,
+        counts.c.order_count,
+        counts.c.department_count
+    ).join(
+        page, page.c.id == ShippingGroup.id
+    ).join(
+        counts, true()
+    ).options(
+        joinedload(ShippingGroup.supplier)
+    ).order_by(page.c.sort_date.desc(), ShippingGroup.id.desc())
+
+    rows = set_next_cursor(
+        response, (await db.execute(stmt)).all(), limit,
+        key=lambda row: (row[1], row[0].id)
+    )
+    return [
+        ShippingGroupSummaryResponse(
+            id=group.id,
+            supplier=group.supplier,
+            delivery_date=group.delivery_date,
+            status=group.status,
+            item_count=item_count,
+            order_count=order_count,
+            department_count=department_count,
+            email_sent=group.email_sent,
+            email_error=group.email_error
+        )
+        for group, _, item_count, order_count, department_count in rows
+    ]
+
+
+@router.post("/freigeben-batch", response_model=ShippingGroupBatchReleaseResponse)
+async def freigeben_shipping_groups_batch(
+    data: ShippingGroupBatchRelease,
+    current_user: User = Depends(get_current_user_async),
+    permissions: Permissions = Depends(get_permissions_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Sammel-Freigabe: OFFEN → IN_VERSAND für mehrere ShippingGroups.
+    - Auswahl über delivery_date (alle offenen Gruppen des Tages) oder ids
+    - Berechtigung aus den vorberechneten Permissions
+    - Ein Versand-Job für alle freigegebenen Gruppen
+    - Ergebnis pro Gruppe, nicht freigebbare Gruppen brechen die anderen nicht ab
+    - Gruppen bis zum Commit gesperrt: parallele Freigaben warten und sehen danach
+      den neuen Status, Sperren immer in id-Reihenfolge (kein Deadlock zwischen zwei Batches)
+    """
+    stmt = select(ShippingGroup).options(
+        joinedload(ShippingGroup.supplier)
+    ).order_by(ShippingGroup.id).with_for_update(of=ShippingGroup)
+    if data.ids is not None:
+        stmt = stmt.where(ShippingGroup.id.in_(data.ids))
+    else:
+        stmt = stmt.where(
+            ShippingGroup.delivery_date == data.delivery_date,
+            ShippingGroup.status == ShippingGroupStatus.OFFEN
+        )
+    shipping_groups = {sg.id: sg for sg in (await db.execute(stmt)).scalars().all()}
     
-    # Admin sieht alles
-    if current_user.role.name != "Admin":
-        # Freigeber sieht nur seine Lieferanten
-        approved_supplier_ids = db.query(ApproverSupplier.supplier_id).filter(
-            ApproverSupplier.user_id == current_user.id
-        ).subquery()
+    requested_ids = data.ids if data.ids is not None else list(shipping_groups.keys())
+    results = []
+    to_release = []
+    today = date.today()
+    for sg_id in dict.fromkeys(requested_ids):
+        shipping_group = shipping_groups.get(sg_id)
+        error = None
+        if not shipping_group:
+            error = "Versandgruppe nicht gefunden"
+        elif not permissions.can_approve(shipping_group.supplier_id):
+            error = "Keine Freigabe-Berechtigung für diesen Lieferanten"
+        elif shipping_group.status != ShippingGroupStatus.OFFEN:
+            error = "Versandgruppe ist nicht offen"
+        elif not shipping_group.delivery_date:
+            error = "Kein Lieferdatum gesetzt"
+        elif shipping_group.delivery_date < today:
+            error = "Lieferdatum liegt in der Vergangenheit"
         
-        query = query.filter(ShippingGroup.supplier_id.in_(approved_supplier_ids))
+        if error:
+            results.append({
+                "id": sg_id,
+                "supplier_name": shipping_group.supplier.name if shipping_group else None,
+                "success": False,
+                "status": shipping_group.status if shipping_group else None,
+                "error": error
+            })
+        else:
+            to_release.append(shipping_group)
     
-    return query.all()
+    # Status ändern + ein gemeinsamer Versand-Job + ActivityLogs (gleiche Transaktion)
+    mark_batch_for_sending(db, to_release, current_user)
+    for shipping_group in to_release:
+        results.append({
+            "id": shipping_group.id,
+            "supplier_name": shipping_group.supplier.name,
+            "success": True,
+            "status": shipping_group.status,
+            "error": None
+        })
+        log_activity(
+            db=db,
+            entity_type="shipping_group",
+            entity_id=shipping_group.id,
+            user_id=current_user.id,
+            action_type=ActionType.ORDER_SENT,
+            description="Bestellung an Lieferant versendet (Sammel-Freigabe)",
+            details={
+                "supplier_id": str(shipping_group.supplier_id),
+                "delivery_date": str(shipping_group.delivery_date)
+            }
+        )
+    await db.commit()
+    
+    return {
+        "released": len(to_release),
+        "failed": len(results) - len(to_release),
+        "results": results
+    }
 
 
 @router.get("/{id}", response_model=ShippingGroupResponse)
-def get_shipping_group(
+async def get_shipping_group(
     id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    permissions: Permissions = Depends(get_permissions_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Detail einer ShippingGroup.
     """
-    shipping_group = db.query(ShippingGroup).options(
-        joinedload(ShippingGroup.supplier),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.article),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.supplier)
-    ).filter(ShippingGroup.id == id).first()
+    shipping_group = (await db.execute(
+        select(ShippingGroup).options(*_with_items()).where(ShippingGroup.id == id)
+    )).unique().scalars().first()
     
     if not shipping_group:
         raise HTTPException(status_code=404, detail="Versandgruppe nicht gefunden")
     
     # Berechtigung prüfen
-    if current_user.role.name != "Admin":
-        is_approver = db.query(ApproverSupplier).filter(
-            ApproverSupplier.user_id == current_user.id,
-            ApproverSupplier.supplier_id == shipping_group.supplier_id
-        ).first()
-        
-        if not is_approver:
-            raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Versandgruppe")
+    if not permissions.can_approve(shipping_group.supplier_id):
+        raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Versandgruppe")
     
     return shipping_group
 
@@ -94,23 +246,21 @@ def get_shipping_group(
 @router.post("/{id}/freigeben", response_model=ShippingGroupResponse)
 async def freigeben_shipping_group(
     id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    permissions: Permissions = Depends(get_permissions_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    ShippingGroup freigeben: OFFEN → VERSENDET
+    ShippingGroup freigeben: OFFEN → IN_VERSAND
     - Prüft Berechtigung (Admin oder Freigeber für diesen Lieferanten)
     - Validiert Lieferdatum
-    - Generiert PDF und speichert es
-    - Sendet Email an Lieferanten
+    - Legt Versand-Job an (PDF + Email laufen im Worker, danach VERSENDET)
     - ActivityLog
     """
-    shipping_group = db.query(ShippingGroup).options(
-        joinedload(ShippingGroup.supplier),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.article),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.supplier),
-        joinedload(ShippingGroup.items).joinedload(OrderItem.order).joinedload(Order.department)
-    ).filter(ShippingGroup.id == id).first()
+    # Bis zum Commit gesperrt, damit eine parallele Freigabe nicht ebenfalls OFFEN sieht
+    shipping_group = (await db.execute(
+        select(ShippingGroup).options(*_with_items()).where(ShippingGroup.id == id).with_for_update(of=ShippingGroup)
+    )).unique().scalars().first()
     
     if not shipping_group:
         raise HTTPException(status_code=404, detail="Versandgruppe nicht gefunden")
@@ -126,67 +276,11 @@ async def freigeben_shipping_group(
         raise HTTPException(status_code=400, detail="Lieferdatum liegt in der Vergangenheit")
     
     # Berechtigung prüfen
-    if current_user.role.name != "Admin":
-        is_approver = db.query(ApproverSupplier).filter(
-            ApproverSupplier.user_id == current_user.id,
-            ApproverSupplier.supplier_id == shipping_group.supplier_id
-        ).first()
-        
-        if not is_approver:
-            raise HTTPException(status_code=403, detail="Keine Freigabe-Berechtigung für diesen Lieferanten")
-    
-    # Kurzreferenz generieren
-    short_id = f"SG-{str(shipping_group.id)[:8].upper()}"
-    pdf_path = None
-    
-    # PDF generieren
-    try:
-        pdf_bytes = generate_shipping_group_pdf(
-            db=db,
-            shipping_group=shipping_group,
-            approved_by=current_user.name
-        )
-        
-        # Pfad erstellen: storage/pdfs/2026/02/SG-A7F3B2.pdf
-        today = date.today()
-        pdf_dir = f"storage/pdfs/{today.year}/{today.month:02d}"
-        os.makedirs(pdf_dir, exist_ok=True)
-        
-        pdf_filename = f"{short_id}.pdf"
-        pdf_path = os.path.join(pdf_dir, pdf_filename)
-        
-        # PDF speichern
-        with open(pdf_path, "wb") as f:
-            f.write(pdf_bytes)
-        
-        # Pfad in DB speichern
-        shipping_group.pdf_path = pdf_path
-        
-    except Exception as e:
-        logger.warning(f"PDF-Generierung fehlgeschlagen: {e}")
-    
-    # Email versenden (nur wenn Lieferant Email hat)
-    if shipping_group.supplier and shipping_group.supplier.email and pdf_path:
-        try:
-            email_sent = await send_order_email(
-                to_email=shipping_group.supplier.email,
-                supplier_name=shipping_group.supplier.name,
-                delivery_date=shipping_group.delivery_date,
-                pdf_path=pdf_path,
-                order_reference=short_id
-            )
-            if not email_sent:
-                logger.warning(f"Email an {shipping_group.supplier.email} konnte nicht gesendet werden")
-        except Exception as e:
-            logger.warning(f"Email-Versand fehlgeschlagen: {e}")
+    if not permissions.can_approve(shipping_group.supplier_id):
+        raise HTTPException(status_code=403, detail="Keine Freigabe-Berechtigung für diesen Lieferanten")
     
-    # Status ändern
-    shipping_group.status = ShippingGroupStatus.VERSENDET
-    shipping_group.sender_id = current_user.id
-    shipping_group.send_date = date.today()
-    
-    db.commit()
-    db.refresh(shipping_group)
+    # Status ändern + Versand-Job anlegen + ActivityLog (gleiche Transaktion)
+    mark_for_sending(db, shipping_group, current_user)
     log_activity(
         db=db,
         entity_type="shipping_group", 
@@ -200,6 +294,8 @@ async def freigeben_shipping_group(
             "item_count": len(shipping_group.items)
         }
     )
+    
+    await db.commit()
     return shipping_group
 
 
@@ -208,7 +304,7 @@ async def freigeben_shipping_group(
 @router.get("/{id}/pdf")
 def download_shipping_group_pdf(
     id: UUID,
-    current_user: User = Depends(get_current_user),
+    permissions: Permissions = Depends(get_permissions),
     db: Session = Depends(get_db)
 ):
     """
@@ -225,14 +321,8 @@ def download_shipping_group_pdf(
         raise HTTPException(status_code=404, detail="Versandgruppe nicht gefunden")
     
     # Berechtigung prüfen
-    if current_user.role.name != "Admin":
-        is_approver = db.query(ApproverSupplier).filter(
-            ApproverSupplier.user_id == current_user.id,
-            ApproverSupplier.supplier_id == shipping_group.supplier_id
-        ).first()
-        
-        if not is_approver:
-            raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Versandgruppe")
+    if not permissions.can_approve(shipping_group.supplier_id):
+        raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Versandgruppe")
     
     # PDF vorhanden?
     if not shipping_group.pdf_path:
@@ -253,22 +343,49 @@ def download_shipping_group_pdf(
 
 
 @router.get("/{id}/order", response_model=ShippingGroupDetailResponse)
-def get_shipping_group_order(
+async def get_shipping_group_order(
                     id: UUID,
-                    db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)
+                    db: AsyncSession = Depends(get_async_db),
+                    permissions: Permissions = Depends(get_permissions_async)
 ):
-    shipping_group = db.query(ShippingGroup).options(
-            joinedload(ShippingGroup.items),
-            joinedload(ShippingGroup.supplier)).filter(
-            ShippingGroup.id == id)
+    """
+    ShippingGroup nach Bestellungen gruppiert (nur die Items dieser Gruppe).
+    """
+    shipping_group = (await db.execute(select(ShippingGroup).options(
+            joinedload(ShippingGroup.supplier),
+            joinedload(ShippingGroup.items).joinedload(OrderItem.article),
+            joinedload(ShippingGroup.items).joinedload(OrderItem.supplier),
+            joinedload(ShippingGroup.items).joinedload(OrderItem.order).joinedload(Order.department),
+            joinedload(ShippingGroup.items).joinedload(OrderItem.order).joinedload(Order.creator)
+            ).where(ShippingGroup.id == id))).unique().scalars().first()
     if not shipping_group:
         raise HTTPException(status_code=404, detail="Versandgruppe nicht gefunden")
     
-    for order in shipping_group:
-        
+    # Berechtigung prüfen
+    if not permissions.can_approve(shipping_group.supplier_id):
+        raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Versandgruppe")
     
-
+    orders = {}
+    for item in shipping_group.items:
+        order = item.order
+        if not order or not order.is_active:
+            continue
+        if order.id not in orders:
+            orders[order.id] = {
+                "id": order.id,
+                "department": order.department,
+                "creator": order.creator,
+                "status": order.status.value,
+                "delivery_notes": order.delivery_notes,
+                "additional_articles": order.additional_articles,
+                "items": []
+            }
+        orders[order.id]["items"].append(item)
     
-
-    
\ No newline at end of file
+    return {
+        "id": shipping_group.id,
+        "supplier": shipping_group.supplier,
+        "delivery_date": shipping_group.delivery_date,
+        "status": shipping_group.status.value,
+        "orders": list(orders.values())
+    }
@@ -7,7 +7,7 @@ from app.database import get_db
 from app.models.user import User
 from app.models.department import Department
 from app.models.role import Role
-from app.utils.security import get_current_user, require_role, hash_password
+from app.utils.security import get_current_user, require_role, hash_password, invalidate_principal
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -137,6 +137,8 @@ def update_user(
         setattr(user, field, value)
     
     db.commit()
+    # Rolle/Department/Status können sich geändert haben → gecachten Principal verwerfen
+    invalidate_principal(id)
     
     return db.query(User).options(
         joinedload(User.department),
@@ -156,6 +158,7 @@ def delete_user(id: UUID, current_user: User = Depends(get_current_user), db: Se
     
     user.is_active = False
     db.commit()
+    invalidate_principal(id)
     return {"message": "User gelöscht"}
 
 
@@ -50,6 +50,12 @@ class ArticleResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class ArticleSearchResult(ArticleResponse):
+    """Treffer der Artikelsuche"""
+    score: float                # Wortähnlichkeit zum Suchbegriff (0-1), inkl. Bonus
+    recently_ordered: bool      # vom eigenen Department kürzlich bestellt
+
+
 class ArticleOrderHistoryItem(BaseModel):
     """Ein einzelner Bestelleintrag in der Artikelhistorie"""
     order_item_id: UUID
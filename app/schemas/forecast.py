@@ -0,0 +1,22 @@
+from uuid import UUID
+from datetime import date
+from pydantic import BaseModel
+
+
+class SuggestedOrderItem(BaseModel):
+    """Vorschlag für einen Artikel"""
+    article_id: UUID
+    article_name: str
+    unit: str
+    suggested_amount: float
+    units_per_guest: float
+    observations: int          # Liefertage mit diesem Artikel in der Historie
+
+
+class SuggestedOrderResponse(BaseModel):
+    """Bestellvorschlag für ein Department und einen Liefertag"""
+    department_id: UUID
+    delivery_date: date
+    expected_guests: int
+    history_days: int           # Liefertage, auf denen das Modell beruht
+    items: list[SuggestedOrderItem]
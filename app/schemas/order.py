@@ -77,6 +77,22 @@ class OrderResponse(BaseModel):
 
     model_config = {"from_attributes": True}
 
+class OrderSummaryResponse(BaseModel):
+    """Listenansicht ohne Positionen (GET /orders/?fields=summary)"""
+    id: UUID
+    department: Optional[DepartmentInfo]
+    creator: CreatorInfo
+    approver: Optional[ApproverInfo]
+    delivery_date: Optional[date]
+    status: str
+    item_count: int
+    additional_articles: Optional[str]
+    delivery_notes: Optional[str]
+    drafted_on: datetime
+    is_active: bool
+
+    model_config = {"from_attributes": True}
+
 class OrderUpdate(BaseModel):
     delivery_date: Optional[date] = None
     additional_articles: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from uuid import UUID
 from typing import Optional
 from datetime import date
@@ -13,9 +13,24 @@ class ShippingGroupResponse(BaseModel):
     delivery_date: Optional[date]
     status: ShippingGroupStatus
     items: list[OrderItemResponse]
+    email_sent: Optional[bool] = None
+    email_error: Optional[str] = None
     
     
 
+class ShippingGroupSummaryResponse(BaseModel):
+    """Listenansicht ohne Positionen, Zahlen nur über aktive Bestellungen"""
+    id: UUID
+    supplier: SupplierInfo
+    delivery_date: Optional[date]
+    status: ShippingGroupStatus
+    item_count: int
+    order_count: int
+    department_count: int
+    email_sent: Optional[bool] = None
+    email_error: Optional[str] = None
+
+
 class ShippingGroupOrderInfo(BaseModel):
     """Eine Order innerhalb einer ShippingGroup — nur relevante Items"""
     id: UUID
@@ -36,4 +51,30 @@ class ShippingGroupDetailResponse(BaseModel):
     status: str
     orders: list[ShippingGroupOrderInfo] 
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+class ShippingGroupBatchRelease(BaseModel):
+    """Sammel-Freigabe: entweder alle offenen Gruppen eines Lieferdatums oder eine ID-Liste"""
+    delivery_date: Optional[date] = None
+    ids: Optional[list[UUID]] = Field(default=None, min_length=1)
+
+    @model_validator(mode='after')
+    def exactly_one_selection(self):
+        if (self.delivery_date is None) == (self.ids is None):
+            raise ValueError('Entweder delivery_date oder ids angeben')
+        return self
+
+
+class ShippingGroupReleaseResult(BaseModel):
+    id: UUID
+    supplier_name: Optional[str] = None
+    success: bool
+    status: Optional[ShippingGroupStatus] = None
+    error: Optional[str] = None
+
+
+class ShippingGroupBatchReleaseResponse(BaseModel):
+    released: int
+    failed: int
+    results: list[ShippingGroupReleaseResult]
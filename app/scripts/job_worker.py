@@ -0,0 +1,56 @@
+import argparse
+import sys
+import time
+import traceback
+
+from app.database import SessionLocal
+from app.config import settings
+from app.services.job_service import run_pending_jobs, requeue_stale_jobs
+from app.utils.logging_config import setup_logging
+
+# Job-Handler registrieren sich beim Import
+import app.services.shipping_group_service  # noqa: F401
+
+logger = setup_logging()
+
+
+def main() -> int:
+    """
+    Worker für Hintergrund-Jobs (PDF rendern, speichern, Email versenden).
+    --once: alle fälligen Jobs abarbeiten und beenden (z.B. als Cronjob)
+    Gibt Exit-Code zurück: 0 = Erfolg, 1 = Fehler
+    """
+    parser = argparse.ArgumentParser(description="Job-Worker")
+    parser.add_argument("--once", action="store_true", help="Fällige Jobs abarbeiten und beenden")
+    args = parser.parse_args()
+
+    logger.info("Job-Worker gestartet")
+
+    db = SessionLocal()
+    try:
+        requeued = requeue_stale_jobs(db)
+        if requeued:
+            logger.warning(f"{requeued} hängende Jobs wieder freigegeben")
+
+        while True:
+            processed = run_pending_jobs(db)
+            if processed:
+                logger.info(f"{processed} Jobs verarbeitet")
+            if args.once:
+                return 0
+            if not processed:
+                time.sleep(settings.job_poll_interval_seconds)
+
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        logger.error(f"Job-Worker abgebrochen: {e}")
+        logger.error(traceback.format_exc())
+        return 1
+    finally:
+        db.close()
+        logger.info("Job-Worker beendet")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
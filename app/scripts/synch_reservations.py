@@ -1,6 +1,7 @@
 import sys
 import traceback
 
+from app.config import settings
 from app.database import SessionLocal
 from app.services.reservation_service import sync_reservations
 from app.utils.logging_config import setup_logging
@@ -11,16 +12,19 @@ logger = setup_logging()
 def main() -> int:
     """
     Führt den Reservierungs-Sync aus.
+    Standard ist inkrementell (kann alle paar Minuten laufen), --full erzwingt
+    einen Voll-Sync. Der erste Lauf eines Tages ist immer voll.
     Gibt Exit-Code zurück: 0 = Erfolg, 1 = Fehler
     """
+    incremental = "--full" not in sys.argv[1:]
     logger.info("Reservierungs-Sync gestartet (Cronjob)")
 
     db = SessionLocal()
     try:
-        result = sync_reservations(db, forecast_days=14)
+        result = sync_reservations(db, forecast_days=settings.reservation_forecast_days, incremental=incremental)
 
         if result.get("status") == "success":
-            logger.info(f"Sync erfolgreich: {result['bookings_fetched']} Buchungen, {result['entries_saved']} Einträge")
+            logger.info(f"Sync erfolgreich ({result['mode']}): {result['bookings_fetched']} Buchungen, {result['entries_saved']} Einträge")
             return 0
         else:
             logger.error(f"Sync fehlgeschlagen: {result.get('message', 'Unbekannter Fehler')}")
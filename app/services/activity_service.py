@@ -1,12 +1,32 @@
+"""
+Activity-Log.
+
+log_activity puffert die Einträge in der Session (db.info) statt selbst zu
+committen. Beim Commit der fachlichen Transaktion werden alle gepufferten
+Einträge mit einem mehrzeiligen INSERT geschrieben, bei Rollback verworfen.
+log_activity muss deshalb VOR db.commit() aufgerufen werden. Funktioniert
+mit Session und AsyncSession (die Events hängen an der inneren Session).
+Einen Schreibweg außerhalb der Transaktion gibt es bewusst nicht: ein
+Eintrag existiert genau dann, wenn die fachliche Änderung committet ist.
+
+Einträge zu Bestellungen bekommen das Department der Bestellung mit
+(department_id), der Activity-Feed filtert direkt darauf.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+
 from app.models.activity_log import ActivityLog, ActionType
-from uuid import UUID
-from typing import Optional, Any
 
+PENDING_KEY = "pending_activity_logs"
 
 
 def log_activity(
-    db: Session,
+    db: Session | AsyncSession,
     entity_type: str,
     entity_id: UUID,
     user_id: UUID,
@@ -14,17 +34,35 @@ def log_activity(
     description: str,
     old_value: Optional[str] = None,
     new_value: Optional[str] = None,
-    details: Optional[dict] = None
+    details: Optional[dict] = None,
+    department_id: Optional[UUID] = None
 ):
-    new_activity_log = ActivityLog(
-        entity_type=entity_type,
-        entity_id=entity_id,
-        user_id=user_id,
-        action_type=action_type,
-        description=description,
-        old_value=old_value,
-        new_value=new_value,
-        details=details
-    )
-    db.add(new_activity_log)
-    db.commit()
\ No newline at end of file
+    entry = {
+        "id": uuid4(),
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "user_id": user_id,
+        "timestamp": datetime.now(timezone.utc).replace(tzinfo=None),
+        "action_type": action_type,
+        "description": description,
+        "old_value": old_value,
+        "new_value": new_value,
+        "details": details,
+        "department_id": department_id
+    }
+    db.info.setdefault(PENDING_KEY, []).append(entry)
+
+
+# ============ UNIT OF WORK ============
+
+@event.listens_for(Session, "before_commit")
+def _flush_pending_activity_logs(session: Session):
+    entries = session.info.pop(PENDING_KEY, None)
+    if entries:
+        session.execute(insert(ActivityLog), entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_activity_logs(session: Session):
+    session.info.pop(PENDING_KEY, None)
+
@@ -0,0 +1,71 @@
+"""
+Artikelsuche für die Bestelleingabe (Typeahead).
+
+Treffer sind Artikel, deren Name den Suchbegriff enthält (ILIKE) oder ein
+ähnliches Wort enthält (pg_trgm, fängt Tippfehler ab). Beide Bedingungen
+laufen über den GIN-Trigramm-Index ix_articles_name_trgm, es gibt keinen
+Seq-Scan über articles. Sortiert wird nach Wortähnlichkeit; Artikel, die
+das Department zuletzt bestellt hat, bekommen einen festen Bonus.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import case, false, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.config import settings
+from app.models import Article, Order, OrderItem
+from app.schemas.article import ArticleResponse, ArticleSearchResult
+
+
+# Bonus auf die Wortähnlichkeit für kürzlich bestellte Artikel
+RECENT_BOOST = 0.3
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _recently_ordered(department_id: UUID):
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=settings.article_search_recent_days)
+    return select(OrderItem.article_id).join(
+        Order, Order.id == OrderItem.order_id
+    ).where(
+        Order.department_id == department_id,
+        Order.is_active.is_(True),
+        Order.drafted_on >= since
+    ).distinct().subquery()
+
+
+async def search_articles(db: AsyncSession, query: str, limit: int, department_id: UUID | None) -> list[ArticleSearchResult]:
+    term = query.strip()
+    similarity = func.word_similarity(term, Article.name)
+
+    stmt = select(Article).options(joinedload(Article.article_group)).where(
+        Article.is_active.is_(True),
+        or_(
+            Article.name.ilike(f"%{escape_like(term)}%", escape="\\"),
+            Article.name.op("%>")(term)      # term <% name: ähnliches Wort im Namen
+        )
+    )
+
+    recently = false()
+    if department_id:
+        recent = _recently_ordered(department_id)
+        stmt = stmt.outerjoin(recent, recent.c.article_id == Article.id)
+        recently = recent.c.article_id.isnot(None)
+    score = similarity + case((recently, RECENT_BOOST), else_=0.0)
+
+    stmt = stmt.add_columns(score.label("score"), recently.label("recently_ordered")).order_by(
+        score.desc(), Article.name
+    ).limit(limit)
+
+    return [
+        ArticleSearchResult(
+            **ArticleResponse.model_validate(article).model_dump(),
+            score=round(float(score_value), 4),
+            recently_ordered=bool(recently_ordered)
+        )
+        for article, score_value, recently_ordered in (await db.execute(stmt)).all()
+    ]
@@ -0,0 +1,113 @@
+"""
+Lieferkalender für Lieferanten mit festen Liefertagen.
+
+Hält pro Lieferant die gültigen Liefertermine für einen rollierenden Horizont
+ab morgen im Speicher. Feiertage (Schleswig-Holstein) werden wie Sonntage
+behandelt (keine Lieferung) und pro Jahr bei Bedarf geladen.
+
+Die Liefertage kommen aus dem Stammdaten-Cache. Berechnete Kalender gelten
+pro Tag und Stammdaten-Version, Änderungen an Liefertagen (auch aus anderen
+Prozessen) werden damit automatisch übernommen.
+"""
+import threading
+from datetime import date, timedelta
+from functools import lru_cache
+from uuid import UUID
+
+import holidays
+from sqlalchemy.orm import Session
+
+from app.models.delivery_days import Weekday
+from app.services.master_data import get_master_data
+
+
+WEEKDAY_MAP = {
+    0: Weekday.MO,
+    1: Weekday.DI,
+    2: Weekday.MI,
+    3: Weekday.DO,
+    4: Weekday.FR,
+    5: Weekday.SA,
+    6: Weekday.SO,
+}
+
+HOLIDAY_STATE = "SH"
+
+# Wie viele Tage ab morgen nach einem Liefertermin gesucht wird
+DELIVERY_HORIZON_DAYS = 14
+
+
+# ============ FEIERTAGE ============
+
+@lru_cache(maxsize=None)
+def _holidays_for_year(year: int) -> holidays.HolidayBase:
+    return holidays.Germany(state=HOLIDAY_STATE, years=year)
+
+
+def is_holiday(d: date) -> bool:
+    return d in _holidays_for_year(d.year)
+
+
+# ============ KALENDER ============
+
+_lock = threading.Lock()
+
+# supplier_id -> ((Berechnungstag, Stammdaten-Version), gültige Liefertermine im Horizont)
+_calendar_by_supplier: dict[UUID, tuple[tuple[date, int], tuple[date, ...]]] = {}
+
+
+def compute_delivery_dates(valid_weekdays: frozenset[Weekday], start: date, horizon_days: int = DELIVERY_HORIZON_DAYS) -> tuple[date, ...]:
+    """Alle Liefertermine im Horizont ab start (inklusive)."""
+    result = []
+    for offset in range(horizon_days):
+        check_date = start + timedelta(days=offset)
+        if is_holiday(check_date):
+            continue
+        if WEEKDAY_MAP[check_date.weekday()] in valid_weekdays:
+            result.append(check_date)
+    return tuple(result)
+
+
+def get_delivery_dates(db: Session, supplier_ids: set[UUID]) -> dict[UUID, tuple[date, ...]]:
+    """Batch-API: Liefertermine im Horizont für mehrere Lieferanten."""
+    if not supplier_ids:
+        return {}
+    master = get_master_data(db)
+    today = date.today()
+    key = (today, master.version)
+    result = {}
+    stale = set()
+    for supplier_id in supplier_ids:
+        cached = _calendar_by_supplier.get(supplier_id)
+        if cached and cached[0] == key:
+            result[supplier_id] = cached[1]
+        else:
+            stale.add(supplier_id)
+
+    if stale:
+        start = today + timedelta(days=1)
+        with _lock:
+            for supplier_id in stale:
+                dates = compute_delivery_dates(master.delivery_weekdays.get(supplier_id, frozenset()), start)
+                _calendar_by_supplier[supplier_id] = (key, dates)
+                result[supplier_id] = dates
+    return result
+
+
+def get_next_delivery_dates(db: Session, supplier_ids: set[UUID]) -> dict[UUID, date | None]:
+    """Batch-API: nächster Liefertermin pro Lieferant (None wenn keiner im Horizont)."""
+    return {
+        supplier_id: dates[0] if dates else None
+        for supplier_id, dates in get_delivery_dates(db, supplier_ids).items()
+    }
+
+
+def get_next_delivery_date(db: Session, supplier_id: UUID) -> date | None:
+    return get_next_delivery_dates(db, {supplier_id}).get(supplier_id)
+
+
+# ============ INVALIDIERUNG ============
+
+def invalidate_all():
+    with _lock:
+        _calendar_by_supplier.clear()
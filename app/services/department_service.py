@@ -0,0 +1,145 @@
+"""
+Pflege und Abfrage der Department-Closure-Tabelle.
+
+Die Hierarchie-Prüfungen (bearbeitbare / sichtbare Bereiche, Nachfahren-Check)
+laufen über department_closure statt rekursiv über departments.parent_id.
+Die Tabelle wird bei Anlegen, Umhängen und Deaktivieren eines Bereichs
+über routers/department.py aktualisiert.
+"""
+from uuid import UUID
+
+from sqlalchemy import Select, select, insert, delete, exists, literal, or_, true
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session, aliased
+
+from app.models import Department, DepartmentClosure
+
+
+# ============ PFLEGE ============
+
+def rebuild_department_closure(db: Session):
+    """
+    Baut die komplette Closure-Tabelle neu auf.
+    Nur aktive Bereiche und Pfade über aktive Bereiche werden aufgenommen.
+    """
+    tree = select(
+        Department.id.label("ancestor_id"),
+        Department.id.label("descendant_id"),
+        literal(0).label("depth")
+    ).where(
+        Department.is_active == True
+    ).cte("tree", recursive=True)
+
+    child = aliased(Department)
+    tree = tree.union_all(
+        select(tree.c.ancestor_id, child.id, tree.c.depth + 1).join(
+            child, child.parent_id == tree.c.descendant_id
+        ).where(child.is_active == True)
+    )
+
+    db.execute(delete(DepartmentClosure))
+    db.execute(
+        insert(DepartmentClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth)
+        )
+    )
+
+
+def add_department_to_closure(db: Session, department: Department):
+    """Neuen (bereits geflushten) Bereich unter seinem Parent einhängen."""
+    db.execute(insert(DepartmentClosure).values(
+        ancestor_id=department.id,
+        descendant_id=department.id,
+        depth=0
+    ))
+    if department.parent_id:
+        db.execute(
+            insert(DepartmentClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    DepartmentClosure.ancestor_id,
+                    literal(department.id, PG_UUID(as_uuid=True)),
+                    DepartmentClosure.depth + 1
+                ).where(DepartmentClosure.descendant_id == department.parent_id)
+            )
+        )
+
+
+def move_department_in_closure(db: Session, department_id: UUID, new_parent_id: UUID | None):
+    """Teilbaum unter einen neuen Parent (oder an die Wurzel) verschieben."""
+    subtree = select(DepartmentClosure.descendant_id).where(
+        DepartmentClosure.ancestor_id == department_id
+    )
+
+    # Pfade von außerhalb in den Teilbaum entfernen
+    db.execute(
+        delete(DepartmentClosure).where(
+            DepartmentClosure.descendant_id.in_(subtree),
+            DepartmentClosure.ancestor_id.not_in(subtree)
+        )
+    )
+
+    if new_parent_id:
+        supertree = aliased(DepartmentClosure)
+        sub = aliased(DepartmentClosure)
+        db.execute(
+            insert(DepartmentClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    supertree.ancestor_id,
+                    sub.descendant_id,
+                    supertree.depth + sub.depth + 1
+                ).select_from(supertree).join(sub, true()).where(
+                    supertree.descendant_id == new_parent_id,
+                    sub.ancestor_id == department_id
+                )
+            )
+        )
+
+
+def remove_department_from_closure(db: Session, department_id: UUID):
+    """Deaktivierten Bereich samt Teilbaum aus der Closure entfernen."""
+    subtree = select(DepartmentClosure.descendant_id).where(
+        DepartmentClosure.ancestor_id == department_id
+    )
+    db.execute(delete(DepartmentClosure).where(DepartmentClosure.descendant_id.in_(subtree)))
+
+
+# ============ ABFRAGEN ============
+
+def editable_department_ids_select(department_id: UUID) -> Select:
+    """Eigenes Department + alle (aktiven) Nachfahren."""
+    return select(DepartmentClosure.descendant_id).where(
+        DepartmentClosure.ancestor_id == department_id
+    )
+
+
+def visible_department_ids_select(department_id: UUID) -> Select:
+    """
+    Eigenes Department, Parent, Geschwister und direkte Children.
+    Entspricht allen Einträgen mit Tiefe <= 1 unterhalb des eigenen Bereichs
+    und unterhalb des Parents.
+    """
+    parent_ids = select(DepartmentClosure.ancestor_id).where(
+        DepartmentClosure.descendant_id == department_id,
+        DepartmentClosure.depth == 1
+    )
+    return select(DepartmentClosure.descendant_id).where(
+        or_(
+            DepartmentClosure.ancestor_id == department_id,
+            DepartmentClosure.ancestor_id.in_(parent_ids)
+        ),
+        DepartmentClosure.depth <= 1
+    ).distinct()
+
+
+def is_descendant(db: Session, department_id: UUID, ancestor_id: UUID) -> bool:
+    if department_id == ancestor_id:
+        return True
+    return db.query(
+        exists().where(
+            DepartmentClosure.ancestor_id == ancestor_id,
+            DepartmentClosure.descendant_id == department_id
+        )
+    ).scalar()
@@ -3,7 +3,9 @@ Email-Service für den Versand von Bestellungen an Lieferanten.
 """
 from datetime import date
 from pathlib import Path
+from email.message import EmailMessage
 
+import aiosmtplib
 from fastapi_mail import FastMail, MessageSchema, MessageType, ConnectionConfig
 import logging
 from app.config import settings
@@ -35,6 +37,29 @@ def format_date(d: date) -> str:
     return d.strftime("%d.%m.%Y")
 
 
+def build_order_mail_text(delivery_date: date | None, order_reference: str) -> tuple[str, str]:
+    """Betreff und Text der Bestellungs-Email."""
+    delivery_text = format_date(delivery_date)
+    
+    body = f"""Guten Tag,
+
+anbei erhalten Sie unsere Bestellung für Lieferung am {delivery_text}.
+
+Bestellnummer: {order_reference}
+
+Bei Rückfragen stehen wir Ihnen gerne zur Verfügung.
+
+Mit freundlichen Grüßen
+{settings.company_name}
+
+---
+{settings.company_address}
+{settings.company_city}
+Tel: {settings.company_phone}
+"""
+    return f"Bestellung {order_reference} - Lieferung {delivery_text}", body
+
+
 # ============ EMAIL VERSAND ============
 
 async def send_order_email(
@@ -58,24 +83,7 @@ async def send_order_email(
         Dict mit {"success": bool, "error": str|None}
     """
     # Email-Text
-    delivery_text = format_date(delivery_date)
-    
-    body = f"""Guten Tag,
-
-anbei erhalten Sie unsere Bestellung für Lieferung am {delivery_text}.
-
-Bestellnummer: {order_reference}
-
-Bei Rückfragen stehen wir Ihnen gerne zur Verfügung.
-
-Mit freundlichen Grüßen
-{settings.company_name}
-
----
-{settings.company_address}
-{settings.company_city}
-Tel: {settings.company_phone}
-"""
+    subject, body = build_order_mail_text(delivery_date, order_reference)
 
     # Attachment vorbereiten
     attachments = []
@@ -84,7 +92,7 @@ Tel: {settings.company_phone}
     
     # Message erstellen
     message = MessageSchema(
-        subject=f"Bestellung {order_reference} - Lieferung {delivery_text}",
+        subject=subject,
         recipients=[to_email],
         body=body,
         subtype=MessageType.plain,
@@ -123,31 +131,14 @@ async def send_order_email_to_supplier(
     Returns:
         True wenn erfolgreich, False bei Fehler
     """
-    delivery_text = format_date(delivery_date)
-    
-    body = f"""Guten Tag,
-
-anbei erhalten Sie unsere Bestellung für Lieferung am {delivery_text}.
-
-Bestellnummer: {order_reference}
-
-Bei Rückfragen stehen wir Ihnen gerne zur Verfügung.
-
-Mit freundlichen Grüßen
-{settings.company_name}
-
----
-{settings.company_address}
-{settings.company_city}
-Tel: {settings.company_phone}
-"""
+    subject, body = build_order_mail_text(delivery_date, order_reference)
 
     attachments = []
     if pdf_path and Path(pdf_path).exists():
         attachments.append(pdf_path)
     
     message = MessageSchema(
-        subject=f"Bestellung {order_reference} - Lieferung {delivery_text}",
+        subject=subject,
         recipients=[to_email],
         cc=cc_emails or [],
         body=body,
@@ -161,4 +152,57 @@ Tel: {settings.company_phone}
         return True
     except Exception as e:
         logger.error(f"EMAIL FEHLER: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+async def send_order_emails_batch(mails: list[dict]) -> list[dict]:
+    """
+    Sendet mehrere Bestellungs-Emails über eine einzige SMTP-Verbindung.
+    
+    Args:
+        mails: Liste von Dicts mit to_email, delivery_date, pdf_path, order_reference
+        
+    Returns:
+        Liste von {"success": bool, "error": str|None} in gleicher Reihenfolge
+    """
+    messages = []
+    for mail in mails:
+        subject, body = build_order_mail_text(mail["delivery_date"], mail["order_reference"])
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = settings.smtp_from
+        message["To"] = mail["to_email"]
+        message.set_content(body)
+        
+        pdf_path = mail.get("pdf_path")
+        if pdf_path and Path(pdf_path).exists():
+            message.add_attachment(
+                Path(pdf_path).read_bytes(),
+                maintype="application",
+                subtype="pdf",
+                filename=Path(pdf_path).name
+            )
+        messages.append(message)
+    
+    if not messages:
+        return []
+    
+    results = []
+    try:
+        smtp = aiosmtplib.SMTP(hostname=settings.smtp_host, port=settings.smtp_port, start_tls=True)
+        async with smtp:
+            if settings.smtp_user:
+                await smtp.login(settings.smtp_user, settings.smtp_password)
+            for message in messages:
+                try:
+                    await smtp.send_message(message)
+                    results.append({"success": True, "error": None})
+                except aiosmtplib.SMTPException as e:
+                    logger.error(f"EMAIL FEHLER an {message['To']}: {e}")
+                    results.append({"success": False, "error": str(e)})
+    except Exception as e:
+        # Verbindung/Login fehlgeschlagen → alle noch nicht gesendeten Mails als Fehler
+        logger.error(f"EMAIL FEHLER (SMTP-Verbindung): {e}")
+        results.extend({"success": False, "error": str(e)} for _ in range(len(messages) - len(results)))
+    
+    return results
@@ -0,0 +1,251 @@
+"""
+Bestellvorschläge aus Reservierungen.
+
+Pro Department wird aus der Bestellhistorie und den Gästezahlen ein
+Verbrauch pro Gast und Artikel geschätzt, getrennt nach Wochentag:
+
+    ratio[w, a] = Σ gäste·menge / Σ gäste²     (Kleinste Quadrate durch 0)
+
+Wochentage mit wenigen Liefertagen werden zum Gesamtverhältnis über alle
+Wochentage gezogen (RATIO_SHRINKAGE). Gespeichert werden nur die Summen,
+damit beim nächsten Tag nur die neuen Liefertage dazuaddiert werden müssen.
+Einmal alle forecast_full_refit_days wird komplett neu gerechnet, damit
+nachträglich geänderte Bestellungen und das Historienfenster stimmen.
+
+Vereinfachung: Die Menge eines Liefertags wird den Gästen desselben Tags
+zugeordnet. Tage ohne Reservierungsdaten oder ohne Bestellung des
+Departments fließen nicht ein.
+"""
+import threading
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from uuid import UUID
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Article, Order, OrderItem, ShippingGroup
+from app.models.order import OrderStatus
+from app.models.reservation import ReservationSummary
+from app.schemas.forecast import SuggestedOrderItem, SuggestedOrderResponse
+
+
+# Gewicht des Gesamtverhältnisses in Liefertagen
+RATIO_SHRINKAGE = 2.0
+
+# Kleinere Vorschläge werden weggelassen (Mengen haben eine Nachkommastelle)
+MIN_SUGGESTED_AMOUNT = 0.1
+
+
+@dataclass
+class _Model:
+    full_fit_on: date
+    fitted_through: date                # letzter eingerechneter Tag (inklusive)
+    article_ids: list[UUID]
+    sxy: np.ndarray                     # (7, Artikel): Σ gäste·menge
+    sxx: np.ndarray                     # (7,): Σ gäste²
+    days: np.ndarray                    # (7,): Liefertage pro Wochentag
+    article_days: np.ndarray            # (Artikel,): Liefertage mit dem Artikel
+    ratios: np.ndarray                  # (7, Artikel): Menge pro Gast
+
+
+_lock = threading.Lock()
+
+# department_id -> Modell
+_models: dict[UUID, _Model] = {}
+
+
+def invalidate_all():
+    with _lock:
+        _models.clear()
+
+
+# ============ DATEN ============
+
+def _delivery_day():
+    # Versandgruppe legt den tatsächlichen Liefertag fest, sonst der Wunschtermin
+    return func.coalesce(ShippingGroup.delivery_date, Order.delivery_date)
+
+
+def _load_history(db: Session, department_id: UUID, start: date, end: date) -> list[tuple[date, UUID, float]]:
+    """(Liefertag, Artikel, Menge) für start <= Tag <= end."""
+    day = _delivery_day().label("day")
+    rows = db.execute(
+        select(day, OrderItem.article_id, func.sum(OrderItem.amount))
+        .join(Order, Order.id == OrderItem.order_id)
+        .outerjoin(ShippingGroup, ShippingGroup.id == OrderItem.shipping_group_id)
+        .where(
+            Order.department_id == department_id,
+            Order.is_active.is_(True),
+            Order.status != OrderStatus.STORNIERT,
+            day >= start,
+            day <= end
+        )
+        .group_by(day, OrderItem.article_id)
+    ).all()
+    return [(d, article_id, float(amount)) for d, article_id, amount in rows]
+
+
+def _load_guests(db: Session, start: date, end: date) -> dict[date, int]:
+    rows = db.execute(
+        select(ReservationSummary.forecast_date, func.sum(ReservationSummary.total_guests))
+        .where(ReservationSummary.forecast_date >= start, ReservationSummary.forecast_date <= end)
+        .group_by(ReservationSummary.forecast_date)
+    ).all()
+    return {d: int(guests) for d, guests in rows if guests}
+
+
+def expected_guests(db: Session, delivery_date: date) -> int | None:
+    """Gäste laut Reservierungen, None wenn für den Tag nichts synchronisiert ist."""
+    return db.scalar(
+        select(func.sum(ReservationSummary.total_guests))
+        .where(ReservationSummary.forecast_date == delivery_date)
+    )
+
+
+# ============ MODELL ============
+
+def _empty_model(today: date, start: date) -> _Model:
+    return _Model(
+        full_fit_on=today,
+        fitted_through=start - timedelta(days=1),
+        article_ids=[],
+        sxy=np.zeros((7, 0)),
+        sxx=np.zeros(7),
+        days=np.zeros(7),
+        article_days=np.zeros(0),
+        ratios=np.zeros((7, 0))
+    )
+
+
+def _accumulate(model: _Model, history: list, guests_by_day: dict[date, int]) -> _Model:
+    """Addiert neue Liefertage auf die Summen (vektorisiert) und gibt ein neues Modell zurück."""
+    history = [row for row in history if row[0] in guests_by_day]
+    if not history:
+        return model
+
+    article_ids = list(model.article_ids)
+    article_index = {article_id: i for i, article_id in enumerate(article_ids)}
+    for _, article_id, _ in history:
+        if article_id not in article_index:
+            article_index[article_id] = len(article_ids)
+            article_ids.append(article_id)
+
+    new_columns = len(article_ids) - len(model.article_ids)
+    sxy = np.pad(model.sxy, ((0, 0), (0, new_columns)))
+    article_days = np.pad(model.article_days, (0, new_columns))
+
+    days = sorted({row[0] for row in history})
+    day_index = {d: i for i, d in enumerate(days)}
+    guests = np.array([guests_by_day[d] for d in days], dtype=float)
+    weekdays = np.array([d.weekday() for d in days])
+
+    row_day = np.fromiter((day_index[row[0]] for row in history), dtype=int, count=len(history))
+    row_article = np.fromiter((article_index[row[1]] for row in history), dtype=int, count=len(history))
+    amounts = np.fromiter((row[2] for row in history), dtype=float, count=len(history))
+
+    np.add.at(sxy, (weekdays[row_day], row_article), guests[row_day] * amounts)
+    article_days += np.bincount(row_article, minlength=len(article_ids))
+
+    return _Model(
+        full_fit_on=model.full_fit_on,
+        fitted_through=model.fitted_through,
+        article_ids=article_ids,
+        sxy=sxy,
+        sxx=model.sxx + np.bincount(weekdays, weights=guests ** 2, minlength=7),
+        days=model.days + np.bincount(weekdays, minlength=7),
+        article_days=article_days,
+        ratios=model.ratios
+    )
+
+
+def _fit(model: _Model) -> np.ndarray:
+    total = model.sxx.sum()
+    if total == 0:
+        return np.zeros_like(model.sxy)
+    overall = model.sxy.sum(axis=0) / total
+    per_weekday = np.divide(
+        model.sxy, model.sxx[:, None],
+        out=np.broadcast_to(overall, model.sxy.shape).copy(),
+        where=model.sxx[:, None] > 0
+    )
+    weight = model.days[:, None]
+    return (weight * per_weekday + RATIO_SHRINKAGE * overall) / (weight + RATIO_SHRINKAGE)
+
+
+def _update(db: Session, department_id: UUID, model: _Model | None, today: date) -> _Model:
+    yesterday = today - timedelta(days=1)
+    full = model is None or (today - model.full_fit_on).days >= settings.forecast_full_refit_days
+    if full:
+        model = _empty_model(today, today - timedelta(days=settings.forecast_history_days))
+
+    start = model.fitted_through + timedelta(days=1)
+    model = _accumulate(
+        model,
+        _load_history(db, department_id, start, yesterday),
+        _load_guests(db, start, yesterday)
+    )
+    # Neues Objekt statt Änderung: das alte Modell kann noch in Benutzung sein
+    return replace(model, fitted_through=yesterday, ratios=_fit(model))
+
+
+def get_model(db: Session, department_id: UUID) -> _Model:
+    """Modell des Departments, bei Bedarf um die seit dem letzten Fit vergangenen Tage ergänzt."""
+    today = date.today()
+    model = _models.get(department_id)
+    if model and model.fitted_through >= today - timedelta(days=1):
+        return model
+
+    model = _update(db, department_id, model, today)
+    with _lock:
+        _models[department_id] = model
+    return model
+
+
+# ============ VORSCHLAG ============
+
+def suggest_order(db: Session, department_id: UUID, delivery_date: date) -> SuggestedOrderResponse:
+    guests = expected_guests(db, delivery_date)
+    if guests is None:
+        raise HTTPException(status_code=404, detail="Keine Reservierungsdaten für dieses Datum")
+
+    model = get_model(db, department_id)
+    ratios = model.ratios[delivery_date.weekday()]
+    amounts = np.round(ratios * guests, 1)
+    selected = np.flatnonzero(amounts >= MIN_SUGGESTED_AMOUNT)
+
+    articles = {}
+    if selected.size:
+        articles = {
+            a.id: a for a in db.scalars(
+                select(Article).where(
+                    Article.id.in_([model.article_ids[i] for i in selected]),
+                    Article.is_active.is_(True)
+                )
+            )
+        }
+
+    items = [
+        SuggestedOrderItem(
+            article_id=model.article_ids[i],
+            article_name=articles[model.article_ids[i]].name,
+            unit=articles[model.article_ids[i]].unit,
+            suggested_amount=float(amounts[i]),
+            units_per_guest=round(float(ratios[i]), 4),
+            observations=int(model.article_days[i])
+        )
+        for i in selected
+        if model.article_ids[i] in articles
+    ]
+    items.sort(key=lambda item: item.article_name)
+
+    return SuggestedOrderResponse(
+        department_id=department_id,
+        delivery_date=delivery_date,
+        expected_guests=guests,
+        history_days=int(model.days.sum()),
+        items=items
+    )
@@ -0,0 +1,139 @@
+"""
+Datenbank-basierte Job-Queue.
+
+Jobs werden in derselben Transaktion wie die fachliche Änderung angelegt
+(enqueue_job ohne Commit) und vom Worker-Prozess (app/scripts/job_worker.py)
+abgearbeitet. Fehlgeschlagene Jobs werden mit exponentiellem Backoff erneut
+versucht, bis max_attempts erreicht ist.
+"""
+import logging
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Job, JobStatus
+from app.config import settings
+
+logger = logging.getLogger("app.services.job_service")
+
+# Obergrenze für den Backoff zwischen zwei Versuchen
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+def _utcnow() -> datetime:
+    # Spalten sind TIMESTAMP WITHOUT TIME ZONE: naive UTC, asyncpg lehnt aware Werte ab
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# job_type -> (handler, on_final_failure)
+# handler(db, payload) erledigt den Job, wirft bei Fehler eine Exception.
+# on_final_failure(db, payload, error) wird nach dem letzten Fehlversuch aufgerufen.
+_handlers: dict[str, tuple[Callable[[Session, dict], None], Callable[[Session, dict, str], None] | None]] = {}
+
+
+def register_job_handler(
+    job_type: str,
+    handler: Callable[[Session, dict], None],
+    on_final_failure: Callable[[Session, dict, str], None] | None = None
+):
+    _handlers[job_type] = (handler, on_final_failure)
+
+
+def enqueue_job(db: Session | AsyncSession, job_type: str, payload: dict, max_attempts: int | None = None) -> Job:
+    """Legt einen Job an. Commit macht der Aufrufer (gleiche Transaktion wie die Fachlogik)."""
+    job = Job(
+        job_type=job_type,
+        payload=payload,
+        status=JobStatus.WARTEND,
+        attempts=0,
+        max_attempts=max_attempts or settings.job_max_attempts,
+        run_after=_utcnow()
+    )
+    db.add(job)
+    return job
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = settings.job_retry_base_seconds * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, MAX_RETRY_DELAY_SECONDS))
+
+
+def claim_next_job(db: Session) -> Job | None:
+    """
+    Holt den nächsten fälligen Job und markiert ihn als LAEUFT.
+    FOR UPDATE SKIP LOCKED → mehrere Worker blockieren sich nicht gegenseitig.
+    """
+    now = _utcnow()
+    job = db.query(Job).filter(
+        Job.status == JobStatus.WARTEND,
+        Job.run_after <= now
+    ).order_by(
+        Job.run_after
+    ).with_for_update(skip_locked=True).first()
+
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.LAEUFT
+    job.attempts += 1
+    job.updated_at = now
+    db.commit()
+    return job
+
+
+def run_job(db: Session, job: Job):
+    """Führt einen geclaimten Job aus und verbucht Erfolg oder Fehler."""
+    handler, on_final_failure = _handlers.get(job.job_type, (None, None))
+    try:
+        if not handler:
+            raise ValueError(f"Unbekannter Job-Typ: {job.job_type}")
+        handler(db, job.payload)
+        job.status = JobStatus.ERLEDIGT
+        job.last_error = None
+        job.updated_at = _utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        error = f"{type(e).__name__}: {e}"
+        now = _utcnow()
+        job.last_error = error
+        job.updated_at = now
+
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.WARTEND
+            job.run_after = now + _retry_delay(job.attempts)
+            logger.warning(f"Job {job.id} ({job.job_type}) fehlgeschlagen, Versuch {job.attempts}/{job.max_attempts}: {error}")
+        else:
+            job.status = JobStatus.FEHLGESCHLAGEN
+            logger.error(f"Job {job.id} ({job.job_type}) endgültig fehlgeschlagen: {error}")
+            logger.debug(traceback.format_exc())
+            if on_final_failure:
+                on_final_failure(db, job.payload, error)
+        db.commit()
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Jobs die nach einem Worker-Absturz in LAEUFT hängen wieder freigeben."""
+    cutoff = _utcnow() - timedelta(minutes=settings.job_stale_after_minutes)
+    count = db.query(Job).filter(
+        Job.status == JobStatus.LAEUFT,
+        Job.updated_at < cutoff
+    ).update({Job.status: JobStatus.WARTEND}, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def run_pending_jobs(db: Session, max_jobs: int | None = None) -> int:
+    """Arbeitet alle fälligen Jobs ab. Gibt die Anzahl verarbeiteter Jobs zurück."""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job(db)
+        if not job:
+            break
+        run_job(db, job)
+        processed += 1
+    return processed
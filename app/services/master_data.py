@@ -0,0 +1,222 @@
+"""
+Stammdaten-Cache: Artikel, Artikelgruppen, Lieferanten, Artikel-Lieferanten,
+Liefertage und Rollen.
+
+Die Stammdaten ändern sich ein paar Mal pro Woche, werden aber in fast jedem
+Bestell-Request gebraucht. Jeder Prozess hält deshalb einen unveränderlichen
+Snapshot im Speicher. Gültig ist er, solange cache_versions.version für
+MASTER_DATA gleich bleibt:
+
+- Jede Änderung an einer der Tabellen erhöht die Version in derselben
+  Transaktion (Mapper-Events, egal welcher Endpunkt schreibt). Der
+  schreibende Prozess verwirft seinen Snapshot direkt nach dem Commit.
+- Andere Prozesse prüfen die Version höchstens alle
+  master_data_check_seconds und laden bei Abweichung den ganzen Snapshot neu.
+
+Schreibende Endpunkte prüfen weiter gegen die Datenbank, der Snapshot ist
+für die lesenden Hot-Paths gedacht.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.models import Article, ArticleGroup, ArticleSupplier, CacheVersion, DeliveryDay, Role, Supplier
+from app.models.delivery_days import Weekday
+
+
+MASTER_DATA = "master_data"
+
+
+@dataclass(frozen=True)
+class ArticleGroupInfo:
+    id: UUID
+    name: str
+
+
+@dataclass(frozen=True)
+class ArticleInfo:
+    id: UUID
+    name: str
+    unit: str
+    notes: str | None
+    is_active: bool
+    article_group: ArticleGroupInfo
+
+
+@dataclass(frozen=True)
+class SupplierInfo:
+    id: UUID
+    name: str
+    is_active: bool
+    fixed_delivery_days: bool
+
+
+@dataclass(frozen=True)
+class MasterData:
+    version: int
+    articles: dict[UUID, ArticleInfo]
+    article_groups: dict[UUID, ArticleGroupInfo]
+    suppliers: dict[UUID, SupplierInfo]
+    suppliers_by_article: dict[UUID, tuple[UUID, ...]]
+    article_numbers: dict[tuple[UUID, UUID], str]       # (supplier_id, article_id) -> Artikelnummer
+    delivery_weekdays: dict[UUID, frozenset[Weekday]]
+    roles: dict[UUID, str]
+
+    def active_article(self, article_id: UUID) -> ArticleInfo | None:
+        article = self.articles.get(article_id)
+        return article if article and article.is_active else None
+
+    def active_supplier(self, supplier_id: UUID) -> SupplierInfo | None:
+        supplier = self.suppliers.get(supplier_id)
+        return supplier if supplier and supplier.is_active else None
+
+
+# ============ SNAPSHOT ============
+
+_lock = threading.Lock()
+
+# (Snapshot, Zeitpunkt der letzten Versionsprüfung)
+_snapshot: tuple[MasterData, float] | None = None
+
+
+def invalidate_all():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+_VERSION = select(CacheVersion.version).where(CacheVersion.name == MASTER_DATA)
+_GROUPS = select(ArticleGroup.id, ArticleGroup.name)
+_ARTICLES = select(Article.id, Article.name, Article.unit, Article.notes, Article.is_active, Article.article_group_id)
+_SUPPLIERS = select(Supplier.id, Supplier.name, Supplier.is_active, Supplier.fixed_delivery_days)
+_MAPPINGS = select(ArticleSupplier.article_id, ArticleSupplier.supplier_id, ArticleSupplier.article_number_supplier)
+_WEEKDAYS = select(DeliveryDay.supplier_id, DeliveryDay.weekday)
+_ROLES = select(Role.id, Role.name)
+
+
+def _build(version, groups, articles, suppliers, mappings, weekdays, roles) -> MasterData:
+    article_groups = {group_id: ArticleGroupInfo(group_id, name) for group_id, name in groups}
+
+    suppliers_by_article: dict[UUID, list[UUID]] = {}
+    article_numbers = {}
+    for article_id, supplier_id, number in mappings:
+        suppliers_by_article.setdefault(article_id, []).append(supplier_id)
+        if number:
+            article_numbers[(supplier_id, article_id)] = number
+
+    delivery_weekdays: dict[UUID, set[Weekday]] = {}
+    for supplier_id, weekday in weekdays:
+        delivery_weekdays.setdefault(supplier_id, set()).add(weekday)
+
+    return MasterData(
+        version=version,
+        articles={
+            article_id: ArticleInfo(article_id, name, unit, notes, is_active, article_groups[group_id])
+            for article_id, name, unit, notes, is_active, group_id in articles
+        },
+        article_groups=article_groups,
+        suppliers={row[0]: SupplierInfo(*row) for row in suppliers},
+        suppliers_by_article={article_id: tuple(ids) for article_id, ids in suppliers_by_article.items()},
+        article_numbers=article_numbers,
+        delivery_weekdays={supplier_id: frozenset(days) for supplier_id, days in delivery_weekdays.items()},
+        roles={role_id: name for role_id, name in roles}
+    )
+
+
+def _fresh(now: float) -> MasterData | None:
+    """Snapshot ohne Versionsprüfung, solange die letzte Prüfung jung genug ist."""
+    snapshot = _snapshot
+    if snapshot and now - snapshot[1] < settings.master_data_check_seconds:
+        return snapshot[0]
+    return None
+
+
+def _checked(version: int | None, now: float) -> MasterData | None:
+    """Snapshot, wenn er zur Version passt (Prüfzeitpunkt wird erneuert)."""
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot and snapshot[0].version == (version or 0):
+        with _lock:
+            _snapshot = (snapshot[0], now)
+        return snapshot[0]
+    return None
+
+
+def _store(master: MasterData, now: float) -> MasterData:
+    global _snapshot
+    with _lock:
+        _snapshot = (master, now)
+    return master
+
+
+def get_master_data(db: Session) -> MasterData:
+    now = time.monotonic()
+    master = _fresh(now)
+    if master:
+        return master
+    version = db.scalar(_VERSION)
+    master = _checked(version, now)
+    if master:
+        return master
+    return _store(_build(
+        version or 0,
+        db.execute(_GROUPS), db.execute(_ARTICLES), db.execute(_SUPPLIERS),
+        db.execute(_MAPPINGS), db.execute(_WEEKDAYS), db.execute(_ROLES)
+    ), now)
+
+
+async def get_master_data_async(db: AsyncSession) -> MasterData:
+    now = time.monotonic()
+    master = _fresh(now)
+    if master:
+        return master
+    version = await db.scalar(_VERSION)
+    master = _checked(version, now)
+    if master:
+        return master
+    return _store(_build(
+        version or 0,
+        await db.execute(_GROUPS), await db.execute(_ARTICLES), await db.execute(_SUPPLIERS),
+        await db.execute(_MAPPINGS), await db.execute(_WEEKDAYS), await db.execute(_ROLES)
+    ), now)
+
+
+# ============ VERSION ERHÖHEN ============
+
+BUMPED_KEY = "master_data_bumped"
+
+
+def _bump(mapper, connection, target):
+    # Einmal pro Transaktion, auf derselben Verbindung wie die Änderung
+    session = object_session(target)
+    if session is None or session.info.get(BUMPED_KEY):
+        return
+    connection.execute(
+        pg_insert(CacheVersion)
+        .values(name=MASTER_DATA, version=1)
+        .on_conflict_do_update(index_elements=[CacheVersion.name], set_={"version": CacheVersion.version + 1})
+    )
+    session.info[BUMPED_KEY] = True
+
+
+for _model in (Article, ArticleGroup, Supplier, ArticleSupplier, DeliveryDay, Role):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _bump)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    if session.info.pop(BUMPED_KEY, False):
+        invalidate_all()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_bump(session: Session):
+    session.info.pop(BUMPED_KEY, None)
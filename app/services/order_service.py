@@ -1,51 +1,20 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, Depends
-from uuid import UUID
+from uuid import UUID, uuid4
 
-import holidays
-from datetime import date, timedelta
+from datetime import date
 
-from app.models import User, Order, OrderItem, Article, ArticleSupplier, Supplier, ShippingGroup, Department, DeliveryDay, ApproverSupplier
+from app.models import User, Order, OrderItem, ShippingGroup
 from app.schemas.order import OrderCreate, OrderItemCreate
-from app.models.delivery_days import Weekday
 from app.models.order import OrderStatus
 from app.models.activity_log import ActionType
 from app.models.shipping_group import ShippingGroupStatus
 
 from app.services.activity_service import log_activity
-
-
-WEEKDAY_MAP = {
-    0: Weekday.MO,
-    1: Weekday.DI,
-    2: Weekday.MI,
-    3: Weekday.DO,
-    4: Weekday.FR,
-    5: Weekday.SA,
-    6: Weekday.SO,
-}
-
-
-
-def _get_editable_departments(db: Session, user_department_id: UUID) -> list[UUID]:
-    """
-    Holt alle Departments die der User bearbeiten darf:
-    - Eigenes Department
-    - Alle Children (rekursiv nach unten)
-    """
-    result = [user_department_id]
-    
-    # Direkte Children holen
-    children = db.query(Department).filter(
-        Department.parent_id == user_department_id,
-        Department.is_active == True
-    ).all()
-    
-    # Rekursiv alle Nachfahren sammeln
-    for child in children:
-        result.extend(_get_editable_departments(db, child.id))
-    
-    return result
+from app.services.permission_service import get_permissions_for, ALL_DEPARTMENTS, EDIT_COMPLETE_ORDERS
+from app.services.delivery_calendar import get_next_delivery_dates
+from app.services.master_data import get_master_data
 
 
 def _can_edit_order(db: Session, user: User, order: Order) -> bool:
@@ -59,113 +28,116 @@ def _can_edit_order(db: Session, user: User, order: Order) -> bool:
     if order.status not in [OrderStatus.ENTWURF, OrderStatus.VOLLSTAENDIG]:
         return False
     
-    if user.role.name == "Admin":
-        return True
-    
-    editable_departments = _get_editable_departments(db, user.department_id)
-    if order.department_id not in editable_departments:
+    permissions = get_permissions_for(db, user)
+    if not permissions.can_edit_department(order.department_id):
         return False
     
-    # VOLLSTAENDIG nur für Freigeber
+    # VOLLSTAENDIG nur für Freigeber (und Admin)
     if order.status == OrderStatus.VOLLSTAENDIG:
-        return user.role.name == "Freigeber"
+        return permissions.has(EDIT_COMPLETE_ORDERS)
     
     # ENTWURF für alle mit Department-Berechtigung
     return True
 
-# Helferfunktion um Parentbereiche zu finden
-def _is_descendant_of(department_id: UUID, ancestor_id: UUID, db: Session) -> bool:
-    department = db.query(Department).filter(Department.id == department_id).first() 
-    # Checkt ob gleiches Deparmtent
-    if department_id == ancestor_id:
-        return True
-    
-    while department.parent_id:
-        if department.parent_id == ancestor_id:
-            return True
-        department = db.query(Department).filter(Department.id == department.parent_id).first()
-    return False
-
-# Berechnet das nächste Lieferdatum basierend auf den Liefertagen des Lieferanten.
-# Feiertage werden wie Sonntage behandelt (keine Lieferung)
-
-def _get_next_delivery_date(db: Session, supplier_id: UUID) -> date | None:
-    sh_holidays = holidays.Germany(state="SH", years=[2026, 2027, 2028])
-    delivery_days = db.query(DeliveryDay).filter(DeliveryDay.supplier_id == supplier_id).all()
-    valid_weekdays = {d.weekday for d in delivery_days}  # Set der Liefertage
-    
-    check_date = date.today() + timedelta(days=1)
-    
-    for _ in range(14):
-        # wenn Feiertag -> überspringen
-        if check_date in sh_holidays:
-            check_date += timedelta(days=1)
-            continue
-        
-        # Wochentag ermitteln und prüfen
-        current_weekday = WEEKDAY_MAP[check_date.weekday()]
-        if current_weekday in valid_weekdays:
-            return check_date
-        
-        check_date += timedelta(days=1)
-    
-    return None
-        
-
-
 # kotrolliert ob User für dieses Department bestllen darf
 def _get_and_validate_department(db: Session, user: User, requested_department_id: UUID | None) -> UUID:
     if not requested_department_id:
         return user.department_id
-    if user.role.name == "Admin":
-        return requested_department_id
-    if not _is_descendant_of(requested_department_id, user.department_id, db):
+    if not get_permissions_for(db, user).can_edit_department(requested_department_id):
         raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Abteilung")
     return requested_department_id
 
 #Hauptlogik um die Bestellung auf ShippingGroups aufzuteilen
-def _process_order_item(db: Session, order: Order, item: OrderItemCreate):
-    article = db.query(Article).filter(Article.id == item.article_id, Article.is_active == True).first()
-    if not article:
+def _process_order_items(db: Session, order: Order, items: list[OrderItemCreate]):
+    """
+    Verarbeitet alle Positionen einer Bestellung mengenbasiert:
+    - Artikel, Lieferanten-Zuordnungen (inkl. fixed_delivery_days) und Liefertage
+      kommen aus dem Stammdaten-Cache, nicht aus eigenen Queries
+    - ShippingGroups werden im Speicher aufgelöst, fehlende gesammelt angelegt
+    - OrderItems werden mit einem einzigen Bulk-Insert geschrieben
+    """
+    master = get_master_data(db)
+
+    # 1. Alle Artikel müssen existieren und aktiv sein
+    if any(master.active_article(item.article_id) is None for item in items):
         raise HTTPException(status_code=404, detail="Artikel nicht gefunden")
-    suppliers = db.query(ArticleSupplier).filter(ArticleSupplier.article_id == item.article_id).all()
-    note = item.note
-    supplier_id = None
-    delivery_date = order.delivery_date
-    if not suppliers:
-        note = (note or "") + " | Kein Lieferant gefunden! Bitte manuell checken."
-    elif len(suppliers) == 1:
-        supplier_id = suppliers[0].supplier_id
-        # Lieferdatumslogik wenn kein Datum in order
-        if not order.delivery_date:
-            supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
-            if supplier.fixed_delivery_days:
-                delivery_date = _get_next_delivery_date(db, supplier_id)
-    new_order_item= OrderItem(
-        order_id=order.id,
-        supplier_id=supplier_id,
-        article_id=article.id,
-        amount=item.amount,
-        note=note
-    )
-    db.add(new_order_item)
-    db.flush()
-    if supplier_id:
-        shipping_group = db.query(ShippingGroup).filter(
-            ShippingGroup.supplier_id == new_order_item.supplier_id,
-            ShippingGroup.delivery_date == delivery_date,
+
+    # 2. Lieferanten-Zuordnungen und Lieferanten-Flag der bestellten Artikel
+    suppliers_by_article = {item.article_id: master.suppliers_by_article.get(item.article_id, ()) for item in items}
+    fixed_days_by_supplier: dict[UUID, bool] = {
+        supplier_id: master.suppliers[supplier_id].fixed_delivery_days
+        for suppliers in suppliers_by_article.values()
+        for supplier_id in suppliers
+    }
+
+    # 3. Lieferdaten für Lieferanten mit festen Liefertagen (nur wenn Order kein Datum hat)
+    next_delivery_dates: dict[UUID, date | None] = {}
+    if not order.delivery_date:
+        fixed_supplier_ids = {
+            suppliers[0] for suppliers in suppliers_by_article.values()
+            if len(suppliers) == 1 and fixed_days_by_supplier.get(suppliers[0])
+        }
+        next_delivery_dates = get_next_delivery_dates(db, fixed_supplier_ids)
+
+    # 4. Positionen im Speicher auflösen
+    resolved = []
+    for item in items:
+        suppliers = suppliers_by_article[item.article_id]
+        note = item.note
+        supplier_id = None
+        delivery_date = order.delivery_date
+        if not suppliers:
+            note = (note or "") + " | Kein Lieferant gefunden! Bitte manuell checken."
+        elif len(suppliers) == 1:
+            supplier_id = suppliers[0]
+            # Lieferdatumslogik wenn kein Datum in order
+            if not order.delivery_date and fixed_days_by_supplier.get(supplier_id):
+                delivery_date = next_delivery_dates.get(supplier_id)
+        resolved.append((item, supplier_id, delivery_date, note))
+
+    # 5. Offene ShippingGroups für alle (Lieferant, Datum)-Kombinationen in einer Query
+    group_keys = {(supplier_id, delivery_date) for _, supplier_id, delivery_date, _ in resolved if supplier_id}
+    shipping_group_ids: dict[tuple[UUID, date | None], UUID] = {}
+    if group_keys:
+        open_groups = db.query(
+            ShippingGroup.id,
+            ShippingGroup.supplier_id,
+            ShippingGroup.delivery_date
+        ).filter(
+            ShippingGroup.supplier_id.in_({supplier_id for supplier_id, _ in group_keys}),
             ShippingGroup.status == ShippingGroupStatus.OFFEN
-        ).first()
-        if not shipping_group:
-            new_shipping_group=ShippingGroup(
-                supplier_id=new_order_item.supplier_id,
-                delivery_date=delivery_date
-            )
-            db.add(new_shipping_group)
+        ).all()
+        for group_id, supplier_id, delivery_date in open_groups:
+            shipping_group_ids.setdefault((supplier_id, delivery_date), group_id)
+
+        new_groups = [
+            ShippingGroup(id=uuid4(), supplier_id=supplier_id, delivery_date=delivery_date)
+            for supplier_id, delivery_date in group_keys
+            if (supplier_id, delivery_date) not in shipping_group_ids
+        ]
+        if new_groups:
+            db.add_all(new_groups)
             db.flush()
-            new_order_item.shipping_group_id=new_shipping_group.id
-        else:
-            new_order_item.shipping_group_id=shipping_group.id
+            for group in new_groups:
+                shipping_group_ids[(group.supplier_id, group.delivery_date)] = group.id
+
+    # 6. Alle OrderItems mit einem Bulk-Insert schreiben
+    db.execute(insert(OrderItem), [
+        {
+            "id": uuid4(),
+            "order_id": order.id,
+            "supplier_id": supplier_id,
+            "article_id": item.article_id,
+            "amount": item.amount,
+            "note": note,
+            "shipping_group_id": shipping_group_ids.get((supplier_id, delivery_date)) if supplier_id else None,
+        }
+        for item, supplier_id, delivery_date, note in resolved
+    ])
+
+
+def _process_order_item(db: Session, order: Order, item: OrderItemCreate):
+    _process_order_items(db, order, [item])
 
     
     
@@ -180,9 +152,7 @@ def create_order(db: Session, user: User, order: OrderCreate):
     )
     db.add(new_order)
     db.flush()
-    for item in order.items:
-        _process_order_item(db, new_order, item)
-    db.commit()
+    _process_order_items(db, new_order, order.items)
     log_activity(
         db=db,
         entity_type="order",
@@ -195,8 +165,10 @@ def create_order(db: Session, user: User, order: OrderCreate):
                 {"article_id": str(item.article_id), "amount": item.amount}
                 for item in order.items
             ]
-        }
+        },
+        department_id=new_order.department_id
     )
+    db.commit()
     return db.query(Order).options(
         joinedload(Order.department),
         joinedload(Order.creator),
@@ -221,13 +193,14 @@ def add_item_to_order(db: Session,
         raise HTTPException(status_code=404, detail="Bestellung nicht gefunden")
     if order.status != OrderStatus.ENTWURF:
         raise HTTPException(status_code=400, detail="Bestellung kann nur als Entwurf bearbeitet werden")
-    if current_user.role.name != "Admin" and order.department_id != current_user.department_id:
+    if order.department_id != current_user.department_id and not get_permissions_for(db, current_user).has(ALL_DEPARTMENTS):
         raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Bestellung")
     _process_order_item(db, order, item)
-    db.commit()
     log_activity(db,"order", order.id, current_user.id, 
                 ActionType.ITEM_ADDED,
-                f"Artikel hinzugefügt: Menge {item.amount}")
+                f"Artikel hinzugefügt: Menge {item.amount}",
+                department_id=order.department_id)
+    db.commit()
     return db.query(Order).options(
     joinedload(Order.department),
     joinedload(Order.creator),
@@ -262,8 +235,9 @@ def close_order(db: Session, user: User, order_id: UUID) -> Order:
     if len(order.items) < 1:
         raise HTTPException(status_code=400, detail="Keine Artikel in dieser Bestellung")
     order.status = OrderStatus.VOLLSTAENDIG
+    log_activity(db, "order", order_id, user.id, ActionType.ORDER_COMPLETED, "Bestellung als vollständig markiert",
+                 department_id=order.department_id)
     db.commit()
     db.refresh(order)
-    log_activity(db, "order", order_id, user.id, ActionType.ORDER_COMPLETED, "Bestellung als vollständig markiert")
     return order
 
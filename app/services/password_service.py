@@ -0,0 +1,140 @@
+"""
+Passwort-Hashing in einem eigenen Prozess-Pool.
+
+bcrypt kostet pro Aufruf je nach Cost-Faktor mehrere hundert Millisekunden
+CPU. Damit Logins bei Schichtwechsel nicht die Request-Worker blockieren,
+laufen hash/verify in einem begrenzten ProcessPoolExecutor. Sind mehr
+Aufträge offen als password_hash_max_pending, wird mit 503 abgelehnt
+statt die Warteschlange unbegrenzt wachsen zu lassen.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import settings
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Dauer von Passwort-Hash/-Prüfung inkl. Wartezeit im Pool",
+    labelnames=("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+HASH_PENDING = Gauge("password_hash_pending", "Offene Aufträge im Passwort-Hash-Pool", multiprocess_mode="livesum")
+HASH_REJECTED = Counter("password_hash_rejected_total", "Wegen voller Warteschlange abgelehnte Hash-Aufträge")
+
+
+# ============ WORKER (laufen im Pool-Prozess) ============
+
+@lru_cache(maxsize=4)
+def _context(rounds: int) -> CryptContext:
+    # min/max = rounds → verify_and_update liefert einen neuen Hash, sobald
+    # der gespeicherte Cost-Faktor vom konfigurierten abweicht
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+
+def _hash(plain_password: str, rounds: int) -> str:
+    return _context(rounds).hash(plain_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str, rounds: int) -> tuple[bool, str | None]:
+    return _context(rounds).verify_and_update(plain_password, hashed_password)
+
+
+# ============ POOL ============
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pending = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+        return _pool
+
+
+def _release(_: Future):
+    global _pending
+    with _pool_lock:
+        _pending -= 1
+        HASH_PENDING.set(_pending)
+
+
+def _submit(function, *args) -> Future:
+    global _pending
+    with _pool_lock:
+        if _pending >= settings.password_hash_max_pending:
+            HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Zu viele gleichzeitige Anmeldungen, bitte gleich nochmal versuchen",
+                headers={"Retry-After": "1"}
+            )
+        _pending += 1
+        HASH_PENDING.set(_pending)
+    try:
+        future = _get_pool().submit(function, *args)
+    except Exception:
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    return future
+
+
+def _observe(operation: str, started: float):
+    HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - started)
+
+
+# ============ API ============
+# Die Zeitmessung beginnt vor dem Submit und enthält damit auch die Wartezeit im Pool.
+
+def hash_password(plain_password: str) -> str:
+    started = time.perf_counter()
+    future = _submit(_hash, plain_password, settings.password_bcrypt_rounds)
+    try:
+        return future.result()
+    finally:
+        _observe("hash", started)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """(gültig, neuer Hash oder None). Neuer Hash, wenn sich der Cost-Faktor geändert hat."""
+    started = time.perf_counter()
+    future = _submit(_verify_and_update, plain_password, hashed_password, settings.password_bcrypt_rounds)
+    try:
+        return future.result()
+    finally:
+        _observe("verify", started)
+
+
+async def hash_password_async(plain_password: str) -> str:
+    started = time.perf_counter()
+    future = _submit(_hash, plain_password, settings.password_bcrypt_rounds)
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        _observe("hash", started)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    started = time.perf_counter()
+    future = _submit(_verify_and_update, plain_password, hashed_password, settings.password_bcrypt_rounds)
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        _observe("verify", started)
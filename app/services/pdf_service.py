@@ -6,6 +6,7 @@ Erstellt minimalistisch-schicke Bestellungs-PDFs für Lieferanten.
 from io import BytesIO
 from uuid import UUID
 from datetime import date
+from dataclasses import dataclass, field
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -19,7 +20,8 @@ from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 
 from sqlalchemy.orm import Session
 
-from app.models import ShippingGroup, OrderItem, DepartmentSupplier
+from app.models import ShippingGroup, DepartmentSupplier
+from app.services.master_data import get_master_data
 from app.config import settings
 
 
@@ -113,16 +115,122 @@ def generate_short_id(uuid: UUID) -> str:
     return f"SG-{str(uuid)[:8].upper()}"
 
 
-def get_customer_number(db: Session, department_id: UUID, supplier_id: UUID) -> str | None:
-    """Holt die Kundennummer für ein Department bei einem Lieferanten."""
-    dept_supplier = db.query(DepartmentSupplier).filter(
-        DepartmentSupplier.department_id == department_id,
-        DepartmentSupplier.supplier_id == supplier_id
-    ).first()
+def load_article_numbers(db: Session, supplier_id: UUID, article_ids: set[UUID]) -> dict[UUID, str]:
+    """Artikelnummern des Lieferanten aus dem Stammdaten-Cache."""
+    if not article_ids:
+        return {}
+    numbers = get_master_data(db).article_numbers
+    return {
+        article_id: numbers[(supplier_id, article_id)]
+        for article_id in article_ids
+        if (supplier_id, article_id) in numbers
+    }
+
+
+def load_customer_numbers(db: Session, supplier_id: UUID, department_ids: set[UUID]) -> dict[UUID, str]:
+    """Kundennummern aller Departments bei einem Lieferanten in einer Query."""
+    if not department_ids:
+        return {}
+    rows = db.query(DepartmentSupplier.department_id, DepartmentSupplier.customer_number).filter(
+        DepartmentSupplier.supplier_id == supplier_id,
+        DepartmentSupplier.department_id.in_(department_ids),
+        DepartmentSupplier.customer_number.isnot(None)
+    ).all()
+    return {department_id: number for department_id, number in rows if number}
+
+
+# ============ DATENBÜNDEL ============
+
+@dataclass
+class PdfLine:
+    amount: str
+    unit: str
+    article_name: str
+    article_number: str
+    note: str
+
+
+@dataclass
+class PdfDepartmentBlock:
+    name: str
+    customer_number: str | None
+    lines: list[PdfLine] = field(default_factory=list)
+    notes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ShippingGroupPdfData:
+    """
+    Alle Daten die für das PDF gebraucht werden.
+    Enthält nur einfache Werte → Rendering ohne Datenbank-Zugriff.
+    """
+    shipping_group_id: UUID
+    supplier_name: str | None
+    supplier_email: str | None
+    delivery_date: date | None
+    approved_by: str
+    approved_on: date
+    departments: list[PdfDepartmentBlock] = field(default_factory=list)
+    additional_articles: list[str] = field(default_factory=list)
+
+
+def build_pdf_data(db: Session, shipping_group: ShippingGroup, approved_by: str) -> ShippingGroupPdfData:
+    """
+    Sammelt die PDF-Daten einer ShippingGroup.
     
-    if dept_supplier and dept_supplier.customer_number:
-        return dept_supplier.customer_number
-    return None
+    Erwartet geladene Relationships (supplier, items → article, items → order → department).
+    Artikelnummern kommen aus dem Stammdaten-Cache, Kundennummern mit einer Query für die ganze Gruppe.
+    """
+    active_items = [item for item in shipping_group.items if item.order and item.order.is_active]
+
+    article_numbers = load_article_numbers(
+        db, shipping_group.supplier_id, {item.article_id for item in active_items if item.article}
+    )
+    customer_numbers = load_customer_numbers(
+        db, shipping_group.supplier_id, {item.order.department_id for item in active_items}
+    )
+
+    supplier = shipping_group.supplier
+    data = ShippingGroupPdfData(
+        shipping_group_id=shipping_group.id,
+        supplier_name=supplier.name if supplier else None,
+        supplier_email=supplier.email if supplier else None,
+        delivery_date=shipping_group.delivery_date,
+        approved_by=approved_by,
+        approved_on=date.today()
+    )
+
+    # Items nach Department gruppieren
+    blocks: dict[UUID, PdfDepartmentBlock] = {}
+    for item in active_items:
+        dept_id = item.order.department_id
+        if dept_id not in blocks:
+            blocks[dept_id] = PdfDepartmentBlock(
+                name=item.order.department.name if item.order.department else "Unbekannt",
+                customer_number=customer_numbers.get(dept_id)
+            )
+        block = blocks[dept_id]
+
+        block.lines.append(PdfLine(
+            amount=str(item.amount),
+            unit=item.article.unit if item.article else "–",
+            article_name=item.article.name if item.article else "–",
+            article_number=article_numbers.get(item.article_id, "–") if item.article else "–",
+            note=item.note or ""
+        ))
+
+        # Order-Notizen sammeln (nur einmal pro Order)
+        if item.order.delivery_notes and item.order.delivery_notes not in block.notes:
+            block.notes.append(item.order.delivery_notes)
+    data.departments = list(blocks.values())
+
+    # Sammle alle additional_articles aus den Orders
+    for item in shipping_group.items:
+        if item.order and item.order.additional_articles:
+            if item.order.additional_articles not in data.additional_articles:
+                data.additional_articles.append(item.order.additional_articles)
+
+    return data
 
 
 # ============ PDF GENERIERUNG ============
@@ -143,6 +251,14 @@ def generate_shipping_group_pdf(
     Returns:
         PDF als bytes
     """
+    return render_shipping_group_pdf(build_pdf_data(db, shipping_group, approved_by))
+
+
+def render_shipping_group_pdf(data: ShippingGroupPdfData) -> bytes:
+    """
+    Rendert das PDF aus einem vorab geladenen Datenbündel.
+    Kein Datenbank-Zugriff.
+    """
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -173,11 +289,10 @@ def generate_shipping_group_pdf(
     story.append(Spacer(1, 8*mm))
     
     # Empfänger (Lieferant)
-    supplier = shipping_group.supplier
-    if supplier:
-        recipient_text = f"<b>{supplier.name}</b>"
-        if supplier.email:
-            recipient_text += f"<br/>{supplier.email}"
+    if data.supplier_name:
+        recipient_text = f"<b>{data.supplier_name}</b>"
+        if data.supplier_email:
+            recipient_text += f"<br/>{data.supplier_email}"
         story.append(Paragraph(recipient_text, styles['Recipient']))
     
     story.append(Spacer(1, 10*mm))
@@ -187,12 +302,12 @@ def generate_shipping_group_pdf(
     story.append(Paragraph("Bestellung", styles['DocTitle']))
     
     # Meta-Informationen als kleine Tabelle
-    ref_id = generate_short_id(shipping_group.id)
+    ref_id = generate_short_id(data.shipping_group_id)
     meta_data = [
         ["Bestellnummer:", ref_id],
-        ["Lieferdatum:", format_date(shipping_group.delivery_date)],
-        ["Freigegeben von:", approved_by],
-        ["Freigabedatum:", format_date(date.today())],
+        ["Lieferdatum:", format_date(data.delivery_date)],
+        ["Freigegeben von:", data.approved_by],
+        ["Freigabedatum:", format_date(data.approved_on)],
     ]
     
     meta_table = Table(meta_data, colWidths=[35*mm, 60*mm])
@@ -212,65 +327,25 @@ def generate_shipping_group_pdf(
     
     # ---- ARTIKEL NACH DEPARTMENT GRUPPIERT ----
     
-    # Items nach Department gruppieren
-    items_by_department = {}
-    for item in shipping_group.items:
-        if not item.order or not item.order.is_active:
-            continue
-            
-        dept_id = item.order.department_id
-        dept_name = item.order.department.name if item.order.department else "Unbekannt"
-        
-        if dept_id not in items_by_department:
-            items_by_department[dept_id] = {
-                "name": dept_name,
-                "items": [],
-                "notes": []
-            }
-        
-        items_by_department[dept_id]["items"].append(item)
-        
-        # Order-Notizen sammeln (nur einmal pro Order)
-        if item.order.delivery_notes:
-            if item.order.delivery_notes not in items_by_department[dept_id]["notes"]:
-                items_by_department[dept_id]["notes"].append(item.order.delivery_notes)
-    
     # Pro Department einen Block
-    for dept_id, dept_data in items_by_department.items():
+    for dept in data.departments:
         # Department-Header mit Kundennummer
-        customer_number = get_customer_number(db, dept_id, shipping_group.supplier_id)
-        
-        header_text = f"<b>{dept_data['name']}</b>"
-        if customer_number:
-            header_text += f" <font size='9' color='#666666'>(Kd.-Nr.: {customer_number})</font>"
+        header_text = f"<b>{dept.name}</b>"
+        if dept.customer_number:
+            header_text += f" <font size='9' color='#666666'>(Kd.-Nr.: {dept.customer_number})</font>"
         
         story.append(Paragraph(header_text, styles['SectionHeader']))
         
         # Artikeltabelle
         table_data = [["Menge", "Einheit", "Artikel", "Art.-Nr.", "Notiz"]]
         
-        for item in dept_data["items"]:
-            article_name = item.article.name if item.article else "–"
-            
-            # Artikelnummer vom Lieferanten (aus ArticleSupplier)
-            art_nr = "–"
-            if item.article:
-                from app.models import ArticleSupplier
-                art_sup = db.query(ArticleSupplier).filter(
-                    ArticleSupplier.article_id == item.article_id,
-                    ArticleSupplier.supplier_id == shipping_group.supplier_id
-                ).first()
-                if art_sup and art_sup.article_number_supplier:
-                    art_nr = art_sup.article_number_supplier
-            
-            note = item.note or ""
-            
+        for line in dept.lines:
             table_data.append([
-                str(item.amount),
-                item.article.unit if item.article else "–",
-                article_name,
-                art_nr,
-                Paragraph(note, styles['Notes']) if note else ""
+                line.amount,
+                line.unit,
+                line.article_name,
+                line.article_number,
+                Paragraph(line.note, styles['Notes']) if line.note else ""
             ])
         
         # Tabelle formatieren
@@ -300,25 +375,18 @@ def generate_shipping_group_pdf(
         story.append(article_table)
         
         # Liefernotizen für dieses Department
-        if dept_data["notes"]:
+        if dept.notes:
             story.append(Spacer(1, 3*mm))
-            for note in dept_data["notes"]:
+            for note in dept.notes:
                 story.append(Paragraph(f"<i>Hinweis: {note}</i>", styles['Notes']))
     
     # ---- ZUSÄTZLICHE ARTIKEL (Freitext) ----
     
-    # Sammle alle additional_articles aus den Orders
-    additional_articles = []
-    for item in shipping_group.items:
-        if item.order and item.order.additional_articles:
-            if item.order.additional_articles not in additional_articles:
-                additional_articles.append(item.order.additional_articles)
-    
-    if additional_articles:
+    if data.additional_articles:
         story.append(Spacer(1, 8*mm))
         story.append(Paragraph("<b>Zusätzliche Artikel:</b>", styles['Normal']))
         story.append(Spacer(1, 2*mm))
-        for text in additional_articles:
+        for text in data.additional_articles:
             story.append(Paragraph(text, styles['Notes']))
     
     # ---- FOOTER ----
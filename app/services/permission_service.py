@@ -0,0 +1,227 @@
+"""
+Zentrale Berechtigungen pro User.
+
+Beim ersten Zugriff nach dem Login (bzw. nach Ablauf/Invalidierung) werden
+für einen User einmalig berechnet:
+- Capabilities seiner Rolle (ROLE_CAPABILITIES)
+- Lieferanten, die er freigeben darf (ApproverSupplier)
+- Departments, die er bearbeiten bzw. sehen darf (Closure-Tabelle)
+
+Endpunkte prüfen danach nur noch Mengen-Zugehörigkeit statt eigener Queries.
+Der Cache ist prozesslokal mit derselben TTL wie der Principal-Cache und
+hängt an cache_versions.version für PERMISSIONS: Änderungen an
+ApproverSupplier, Department, User und Role erhöhen die Version in derselben
+Transaktion (Mapper-Events, egal welcher Code schreibt). Jeder Treffer prüft
+die Version mit einem Lookup per Primärschlüssel (einmal pro Request, den
+Wert teilt sich der Principal-Check in app.utils.security). Nach einer
+Änderung werden Rolle, Department und is_active des Users neu aus der DB
+gelesen, entzogene Rechte und Deaktivierungen gelten damit sofort in allen
+Prozessen.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, object_session
+
+from app.config import settings
+from app.models import ApproverSupplier, CacheVersion, Department, Role, User
+from app.services.department_service import editable_department_ids_select, visible_department_ids_select
+
+
+# ============ CAPABILITIES ============
+
+ALL_DEPARTMENTS = "all_departments"         # alle Departments sehen und bearbeiten
+ALL_SUPPLIERS = "all_suppliers"             # alle Lieferanten freigeben
+EDIT_COMPLETE_ORDERS = "edit_complete_orders"  # VOLLSTAENDIG-Bestellungen bearbeiten
+
+ROLE_CAPABILITIES: dict[str, frozenset[str]] = {
+    "Admin": frozenset({ALL_DEPARTMENTS, ALL_SUPPLIERS, EDIT_COMPLETE_ORDERS}),
+    "Freigeber": frozenset({EDIT_COMPLETE_ORDERS}),
+    "Bedarfsmelder": frozenset(),
+}
+
+
+@dataclass(frozen=True)
+class Permissions:
+    user_id: UUID
+    capabilities: frozenset[str]
+    approvable_supplier_ids: frozenset[UUID]
+    editable_department_ids: frozenset[UUID]
+    visible_department_ids: frozenset[UUID]
+
+    def has(self, capability: str) -> bool:
+        return capability in self.capabilities
+
+    def can_approve(self, supplier_id: UUID) -> bool:
+        return ALL_SUPPLIERS in self.capabilities or supplier_id in self.approvable_supplier_ids
+
+    def can_edit_department(self, department_id: UUID) -> bool:
+        return ALL_DEPARTMENTS in self.capabilities or department_id in self.editable_department_ids
+
+    def can_see_department(self, department_id: UUID) -> bool:
+        return ALL_DEPARTMENTS in self.capabilities or department_id in self.visible_department_ids
+
+    def supplier_filter(self) -> list[UUID] | None:
+        """Lieferanten-Einschränkung für Queries, None = keine Einschränkung."""
+        return None if ALL_SUPPLIERS in self.capabilities else list(self.approvable_supplier_ids)
+
+    def department_filter(self) -> list[UUID] | None:
+        """Sichtbare Departments für Queries, None = keine Einschränkung."""
+        return None if ALL_DEPARTMENTS in self.capabilities else list(self.visible_department_ids)
+
+
+# ============ CACHE ============
+
+PERMISSIONS = "permissions"
+
+_lock = threading.Lock()
+# user_id -> (gültig bis, Version beim Berechnen, Permissions)
+_cache: dict[UUID, tuple[float, int, Permissions]] = {}
+
+
+def invalidate_permissions(user_id: UUID | None = None):
+    """Einzelnen User oder (None) alle verwerfen."""
+    with _lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+_VERSION = select(CacheVersion.version).where(CacheVersion.name == PERMISSIONS)
+
+
+def permissions_version(db: Session) -> int:
+    return db.scalar(_VERSION) or 0
+
+
+async def permissions_version_async(db: AsyncSession) -> int:
+    return await db.scalar(_VERSION) or 0
+
+
+def _cached(user_id: UUID, version: int) -> Permissions | None:
+    entry = _cache.get(user_id)
+    if entry and entry[0] > time.monotonic() and entry[1] == version:
+        return entry[2]
+    return None
+
+
+def _store(permissions: Permissions, version: int) -> Permissions:
+    with _lock:
+        _cache[permissions.user_id] = (time.monotonic() + settings.principal_cache_ttl_seconds, version, permissions)
+    return permissions
+
+
+# ============ VERSION ERHÖHEN ============
+
+BUMPED_KEY = "permissions_bumped"
+
+
+def _bump(mapper, connection, target):
+    # Einmal pro Transaktion, auf derselben Verbindung wie die Änderung
+    session = object_session(target)
+    if session is None or session.info.get(BUMPED_KEY):
+        return
+    connection.execute(
+        pg_insert(CacheVersion)
+        .values(name=PERMISSIONS, version=1)
+        .on_conflict_do_update(index_elements=[CacheVersion.name], set_={"version": CacheVersion.version + 1})
+    )
+    session.info[BUMPED_KEY] = True
+
+
+for _model in (ApproverSupplier, Department, Role):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _bump)
+
+# Felder, die in die Berechtigungen eingehen (Login/Rehash ändert den User ebenfalls)
+_USER_FIELDS = ("role_id", "department_id", "is_active")
+
+
+@event.listens_for(User, "after_update")
+def _user_changed(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _USER_FIELDS):
+        _bump(mapper, connection, target)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_bump(session: Session):
+    session.info.pop(BUMPED_KEY, None)
+
+
+def _build(user, supplier_ids, editable_ids, visible_ids) -> Permissions:
+    own = {user.department_id} if user.department_id else set()
+    return Permissions(
+        user_id=user.id,
+        capabilities=ROLE_CAPABILITIES.get(user.role.name, frozenset()),
+        approvable_supplier_ids=frozenset(supplier_ids),
+        editable_department_ids=frozenset(own | set(editable_ids)),
+        visible_department_ids=frozenset(own | set(visible_ids))
+    )
+
+
+def _user_query(user_id: UUID):
+    # populate_existing: ein schon geladener User in der Session zählt nicht als aktueller Stand
+    return select(User).options(joinedload(User.role)).where(User.id == user_id).execution_options(populate_existing=True)
+
+
+def _active_user(user: User | None) -> User:
+    # Rolle und Department aus der DB statt aus den Token-Claims des Principals
+    if not user or not user.is_active:
+        raise HTTPException(status_code=401, detail="Account deaktiviert")
+    return user
+
+
+def _queries(user):
+    suppliers = select(ApproverSupplier.supplier_id).where(ApproverSupplier.user_id == user.id)
+    if not user.department_id:
+        return suppliers, None, None
+    return (
+        suppliers,
+        editable_department_ids_select(user.department_id),
+        visible_department_ids_select(user.department_id)
+    )
+
+
+def get_permissions_for(db: Session, user, version: int | None = None) -> Permissions:
+    """
+    user: Principal oder User, bei Cache-Miss wird der User neu geladen.
+    version: schon in diesem Request gelesene permissions_version.
+    """
+    if version is None:
+        version = permissions_version(db)
+    cached = _cached(user.id, version)
+    if cached:
+        return cached
+    user = _active_user(db.scalars(_user_query(user.id)).first())
+    suppliers, editable, visible = _queries(user)
+    return _store(_build(
+        user,
+        db.scalars(suppliers),
+        db.scalars(editable) if editable is not None else (),
+        db.scalars(visible) if visible is not None else ()
+    ), version)
+
+
+async def get_permissions_for_async(db: AsyncSession, user, version: int | None = None) -> Permissions:
+    if version is None:
+        version = await permissions_version_async(db)
+    cached = _cached(user.id, version)
+    if cached:
+        return cached
+    user = _active_user((await db.scalars(_user_query(user.id))).first())
+    suppliers, editable, visible = _queries(user)
+    return _store(_build(
+        user,
+        await db.scalars(suppliers),
+        await db.scalars(editable) if editable is not None else (),
+        await db.scalars(visible) if visible is not None else ()
+    ), version)
@@ -0,0 +1,128 @@
+"""
+Reservierungsübersicht für die Dashboards mit Read-through-Cache.
+
+Die Daten ändern sich nur, wenn sync_reservations läuft (Cronjob, eigener
+Prozess). Als Version dient deshalb das jüngste synced_at in
+reservation_summaries: ein Sync, der etwas schreibt, erhöht es, ein Sync
+ohne Änderungen nicht. Pro Request bleibt nur diese eine MAX-Abfrage;
+die Übersicht selbst wird pro (days, heute, Version) einmal berechnet.
+"""
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.reservation import ReservationSummary, TimeSlot
+from app.schemas.reservation import ReservationOverviewResponse, DailyReservationResponse
+
+
+_lock = threading.Lock()
+
+# (days, heute, Version) -> Übersicht
+_cache: dict[tuple[int, date, datetime | None], ReservationOverviewResponse] = {}
+
+
+def invalidate_all():
+    with _lock:
+        _cache.clear()
+
+
+def overview_key(db: Session, days: int) -> tuple[int, date, datetime | None]:
+    version = db.scalar(select(func.max(ReservationSummary.synced_at)))
+    return days, date.today(), version
+
+
+def overview_etag(key: tuple) -> str:
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def build_overview(db: Session, days: int, today: date) -> ReservationOverviewResponse:
+    """
+    Reservierungsübersicht für die nächsten X Tage.
+    Jeder Tag zeigt Mittag + Abend separat und als Summe.
+    """
+    end = today + timedelta(days=days)
+
+    # Alle Einträge im Zeitraum laden
+    summaries = db.query(ReservationSummary).filter(
+        ReservationSummary.forecast_date >= today,
+        ReservationSummary.forecast_date <= end
+    ).order_by(
+        ReservationSummary.forecast_date
+    ).all()
+
+    # Nach Datum gruppieren
+    by_date = {}
+    last_synced = None
+
+    for s in summaries:
+        if s.forecast_date not in by_date:
+            by_date[s.forecast_date] = {
+                "mittag_reservations": 0,
+                "mittag_guests": 0,
+                "abend_reservations": 0,
+                "abend_guests": 0
+            }
+
+        if s.time_slot == TimeSlot.MITTAG:
+            by_date[s.forecast_date]["mittag_reservations"] = s.total_reservations
+            by_date[s.forecast_date]["mittag_guests"] = s.total_guests
+        elif s.time_slot == TimeSlot.ABEND:
+            by_date[s.forecast_date]["abend_reservations"] = s.total_reservations
+            by_date[s.forecast_date]["abend_guests"] = s.total_guests
+
+        # Letzten Sync-Zeitpunkt tracken
+        if not last_synced or s.synced_at > last_synced:
+            last_synced = s.synced_at
+
+    # Response bauen (auch Tage OHNE Reservierungen zeigen)
+    daily_list = []
+    for i in range(days):
+        d = today + timedelta(days=i)
+        data = by_date.get(d, {
+            "mittag_reservations": 0,
+            "mittag_guests": 0,
+            "abend_reservations": 0,
+            "abend_guests": 0
+        })
+
+        daily_list.append(DailyReservationResponse(
+            forecast_date=d,
+            mittag_reservations=data["mittag_reservations"],
+            mittag_guests=data["mittag_guests"],
+            abend_reservations=data["abend_reservations"],
+            abend_guests=data["abend_guests"],
+            total_reservations=data["mittag_reservations"] + data["abend_reservations"],
+            total_guests=data["mittag_guests"] + data["abend_guests"]
+        ))
+
+    return ReservationOverviewResponse(
+        days=daily_list,
+        last_synced=last_synced
+    )
+
+
+def get_overview(db: Session, key: tuple) -> ReservationOverviewResponse:
+    """Übersicht für key = overview_key(...) aus dem Cache oder frisch berechnet."""
+    overview = _cache.get(key)
+    if overview:
+        return overview
+
+    days, today, _ = key
+    overview = build_overview(db, days, today)
+    with _lock:
+        # Einträge älterer Versionen/Tage werden nicht mehr gebraucht
+        for old_key in [k for k in _cache if k[1:] != key[1:]]:
+            del _cache[old_key]
+        _cache[key] = overview
+    return overview
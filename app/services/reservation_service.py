@@ -1,6 +1,7 @@
+import asyncio
 import logging
-import time
-import requests
+import random
+import uuid
 from datetime import datetime, date, timedelta, timezone
 
 try:
@@ -8,8 +9,12 @@ try:
 except ImportError:
     ZoneInfo = None
 
+import httpx
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from app.models.reservation import ReservationSummary, TimeSlot
+from app.models.reservation import ReservationSummary, ReservationBooking, TimeSlot
+from app.models.sync_state import SyncState
 from app.config import settings
 
 logger = logging.getLogger("app.services.reservation_service")
@@ -21,6 +26,10 @@ MITTAG_ABEND_GRENZE = 16
 MAX_RETRIES = 3
 RETRY_DELAY_SECONDS = 2
 
+# Inkrementeller Sync: Name in sync_states + Überlappung gegen Uhrzeitabweichungen
+SYNC_NAME = "teburio_reservations"
+INCREMENTAL_OVERLAP = timedelta(minutes=5)
+
 
 def _get_berlin_tz():
     """Gibt die Berlin-Timezone zurück (mit Sommer-/Winterzeit)."""
@@ -37,91 +46,112 @@ def _timestamp_to_berlin_datetime(timestamp_ms: int) -> datetime:
     return datetime.fromtimestamp(timestamp_ms / 1000, tz=tz)
 
 
-def _api_request_with_retry(url: str, payload: dict, headers: dict) -> dict | None:
-    """Führt einen API-Request mit Retry-Logik aus."""
+BOOKINGS_QUERY = """
+query bookingsAnalytics($locationId: String!, $date: Date!, $endDate: Date!, $startingAfter: Date%s) {
+    bookingsAnalytics(locationId: $locationId, date: $date, endDate: $endDate, startingAfter: $startingAfter%s) {
+        cursor
+        hasMore
+        count
+        bookings {
+            _id
+            date
+            endDate
+            people
+            cancelled
+            noShow
+            walkIn
+            source
+            __typename
+        }
+        __typename
+    }
+}
+"""
+
+
+def _window_bounds(day_from: date, day_to: date) -> tuple[str, str]:
+    """Tagesgrenzen in Berliner Zeit als ISO-Strings für die API."""
+    tz = _get_berlin_tz()
+    start_dt = datetime.combine(day_from, datetime.min.time()).replace(tzinfo=tz)
+    end_dt = datetime.combine(day_to, datetime.max.time().replace(microsecond=0)).replace(tzinfo=tz)
+    return start_dt.isoformat(), end_dt.isoformat()
+
+
+def _day_ranges(day_from: date, day_to: date, chunk_days: int) -> list[tuple[date, date]]:
+    """Fenster in aufeinanderfolgende Bereiche von chunk_days Tagen teilen (inklusive Enden)."""
+    ranges = []
+    current = day_from
+    while current <= day_to:
+        chunk_end = min(current + timedelta(days=chunk_days - 1), day_to)
+        ranges.append((current, chunk_end))
+        current = chunk_end + timedelta(days=1)
+    return ranges
+
+
+async def _api_request_with_retry(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, payload: dict) -> dict | None:
+    """Führt einen API-Request mit Retry-Logik aus (exponentielles Backoff mit Jitter)."""
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.post(
-                url=url,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
+            async with semaphore:
+                response = await client.post(settings.teburio_url, json=payload)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             if attempt < MAX_RETRIES - 1:
-                wait_time = RETRY_DELAY_SECONDS * (2 ** attempt)
-                logger.warning(f"API-Fehler (Versuch {attempt + 1}/{MAX_RETRIES}): {e}. Warte {wait_time}s...")
-                time.sleep(wait_time)
+                # Jitter verhindert, dass parallele Bereiche gleichzeitig erneut anfragen
+                wait_time = RETRY_DELAY_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"API-Fehler (Versuch {attempt + 1}/{MAX_RETRIES}): {e}. Warte {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
             else:
                 logger.error(f"API-Fehler nach {MAX_RETRIES} Versuchen: {e}")
                 return None
     return None
 
 
-def fetch_bookings_from_teburio(start_date: str, end_date: str) -> list | None:
-    """
-    Holt Buchungen von der Teburio GraphQL API mit Pagination.
-    
-    """
-
-    query = """
-    query bookingsAnalytics($locationId: String!, $date: Date!, $endDate: Date!, $startingAfter: Date) {
-        bookingsAnalytics(locationId: $locationId, date: $date, endDate: $endDate, startingAfter: $startingAfter) {
-            cursor
-            hasMore
-            count
-            bookings {
-                _id
-                date
-                endDate
-                people
-                cancelled
-                noShow
-                walkIn
-                source
-                __typename
-            }
-            __typename
-        }
-    }
-    """
+async def _fetch_range(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    day_from: date,
+    day_to: date,
+    updated_since: str | None
+) -> list | None:
+    """Alle Seiten eines Tagesbereichs mit eigenem Cursor holen."""
+    start_date, end_date = _window_bounds(day_from, day_to)
+    query = BOOKINGS_QUERY % (
+        ", $updatedSince: Date" if updated_since else "",
+        ", updatedSince: $updatedSince" if updated_since else ""
+    )
 
     all_bookings = []
     cursor = None
     page = 1
 
-    # Diese Settings musst du in deiner config.py ergänzen:
-    # TEBURIO_URL, TEBURIO_TOKEN, TEBURIO_LOCATION_ID
-    headers = {
-        "content-type": "application/json",
-        "account_token": settings.teburio_token
-    }
-
     while True:
+        variables = {
+            "locationId": settings.teburio_location_id,
+            "date": start_date,
+            "endDate": end_date,
+            "startingAfter": cursor
+        }
+        if updated_since:
+            variables["updatedSince"] = updated_since
         payload = {
             "operationName": "bookingsAnalytics",
             "query": query,
-            "variables": {
-                "locationId": settings.teburio_location_id,
-                "date": start_date,
-                "endDate": end_date,
-                "startingAfter": cursor
-            }
+            "variables": variables
         }
 
-        data = _api_request_with_retry(settings.teburio_url, payload, headers)
+        data = await _api_request_with_retry(client, semaphore, payload)
 
         if data is None:
-            logger.error(f"API-Fehler auf Seite {page}: Keine Antwort nach Retries")
+            logger.error(f"API-Fehler für {day_from}–{day_to}, Seite {page}: Keine Antwort nach Retries")
             return None  # Fehler: Keine unvollständigen Daten verwenden
 
         if 'errors' in data:
             logger.error(f"GraphQL Errors: {data['errors']}")
             return None  # Fehler: GraphQL-Fehler sind kritisch
 
-        analytics = data.get('data', {}).get('bookingsAnalytics')
+        analytics = (data.get('data') or {}).get('bookingsAnalytics')
         if not analytics:
             logger.error("Ungültige API-Antwort: bookingsAnalytics fehlt")
             return None
@@ -129,7 +159,7 @@ def fetch_bookings_from_teburio(start_date: str, end_date: str) -> list | None:
         bookings = analytics.get('bookings', [])
         all_bookings.extend(bookings)
 
-        logger.info(f"Seite {page}: {len(bookings)} Buchungen geholt (Gesamt: {len(all_bookings)})")
+        logger.info(f"{day_from}–{day_to}, Seite {page}: {len(bookings)} Buchungen geholt (Gesamt: {len(all_bookings)})")
 
         if not analytics.get('hasMore', False):
             break
@@ -140,10 +170,48 @@ def fetch_bookings_from_teburio(start_date: str, end_date: str) -> list | None:
 
         page += 1
         if page > 50:
-            logger.warning("Sicherheits-Abbruch: Zu viele Seiten")
+            logger.warning(f"Sicherheits-Abbruch für {day_from}–{day_to}: Zu viele Seiten")
             break
 
-    return all_bookings if all_bookings else None
+    return all_bookings
+
+
+async def fetch_bookings_async(day_from: date, day_to: date, updated_since: str | None = None) -> list | None:
+    """
+    Holt Buchungen von der Teburio GraphQL API.
+    Das Fenster wird in Bereiche von teburio_chunk_days Tagen geteilt, die
+    parallel (max. teburio_concurrency gleichzeitige Requests) über einen
+    gemeinsamen Client mit Keep-Alive abgerufen werden.
+    updated_since: nur seitdem geänderte Buchungen (inkrementeller Sync).
+    None = API-Fehler (in irgendeinem Bereich), [] = keine Buchungen.
+    """
+    concurrency = max(1, settings.teburio_concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {
+        "content-type": "application/json",
+        "account_token": settings.teburio_token
+    }
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=settings.teburio_timeout_seconds) as client:
+        results = await asyncio.gather(*(
+            _fetch_range(client, semaphore, range_from, range_to, updated_since)
+            for range_from, range_to in _day_ranges(day_from, day_to, max(1, settings.teburio_chunk_days))
+        ))
+
+    if any(result is None for result in results):
+        return None
+    # Doppelte über Bereichsgrenzen hinweg nur einmal
+    unique = {}
+    for bookings in results:
+        for booking in bookings:
+            unique[booking['_id']] = booking
+    return list(unique.values())
+
+
+def fetch_bookings_from_teburio(day_from: date, day_to: date, updated_since: str | None = None) -> list | None:
+    """Synchroner Einstieg für Cronjob/Script."""
+    return asyncio.run(fetch_bookings_async(day_from, day_to, updated_since))
 
 
 def _booking_to_timeslot(booking_timestamp_ms: int) -> TimeSlot:
@@ -158,88 +226,169 @@ def _booking_to_timeslot(booking_timestamp_ms: int) -> TimeSlot:
         return TimeSlot.ABEND
 
 
-def sync_reservations(db: Session, forecast_days: int = 14):
+def _booking_rows(bookings: list, now: datetime) -> list[dict]:
+    """API-Buchungen → Zeilen für reservation_bookings (eine pro _id)."""
+    rows = {}
+    for booking in bookings:
+        # Konsistente Timezone-Konvertierung
+        booking_dt = _timestamp_to_berlin_datetime(booking['date'])
+        rows[booking['_id']] = {
+            "id": booking['_id'],
+            "forecast_date": booking_dt.date(),
+            "time_slot": _booking_to_timeslot(booking['date']),
+            "people": booking.get('people') or 0,
+            # Stornierte und No-Shows zählen nicht
+            "counted": not (booking.get('cancelled') or booking.get('noShow')),
+            "synced_at": now
+        }
+    return list(rows.values())
+
+
+def _upsert_bookings(db: Session, rows: list[dict]):
+    if not rows:
+        return
+    stmt = pg_insert(ReservationBooking).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ReservationBooking.id],
+        set_={
+            "forecast_date": stmt.excluded.forecast_date,
+            "time_slot": stmt.excluded.time_slot,
+            "people": stmt.excluded.people,
+            "counted": stmt.excluded.counted,
+            "synced_at": stmt.excluded.synced_at
+        }
+    )
+    db.execute(stmt)
+
+
+def _apply_summaries(db: Session, keys: set, now: datetime) -> int:
+    """
+    Summen der betroffenen (Tag, Zeitfenster) aus reservation_bookings neu
+    berechnen und mit einem INSERT ... ON CONFLICT schreiben.
+    """
+    if not keys:
+        return 0
+    totals = {key: [0, 0] for key in keys}
+    rows = db.execute(
+        select(
+            ReservationBooking.forecast_date,
+            ReservationBooking.time_slot,
+            func.count(),
+            func.coalesce(func.sum(ReservationBooking.people), 0)
+        ).where(
+            ReservationBooking.counted == True,
+            ReservationBooking.forecast_date.in_({forecast_date for forecast_date, _ in keys})
+        ).group_by(ReservationBooking.forecast_date, ReservationBooking.time_slot)
+    ).all()
+    for forecast_date, time_slot, reservations, guests in rows:
+        if (forecast_date, time_slot) in totals:
+            totals[(forecast_date, time_slot)] = [reservations, guests]
+
+    stmt = pg_insert(ReservationSummary).values([
+        {
+            "id": uuid.uuid4(),
+            "forecast_date": forecast_date,
+            "time_slot": time_slot,
+            "total_reservations": reservations,
+            "total_guests": guests,
+            "synced_at": now
+        }
+        for (forecast_date, time_slot), (reservations, guests) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_date_timeslot",
+        set_={
+            "total_reservations": stmt.excluded.total_reservations,
+            "total_guests": stmt.excluded.total_guests,
+            "synced_at": stmt.excluded.synced_at
+        }
+    )
+    db.execute(stmt)
+    return len(totals)
+
+
+def sync_reservations(db: Session, forecast_days: int = 14, incremental: bool = False):
     """
     Hauptfunktion: Holt Buchungsdaten von Teburio und speichert
     aggregierte Zusammenfassungen in der DB.
+
+    Voll-Sync: ganzes Fenster holen, alle Tage/Zeitfenster neu schreiben.
+    Inkrementell: nur seit dem letzten Lauf geänderte Buchungen holen und
+    nur deren Tage/Zeitfenster neu summieren. Der erste Lauf eines Tages ist
+    immer voll, weil dann ein neuer Tag ins Fenster rückt, dessen ältere
+    Buchungen noch nie abgerufen wurden.
     """
-    tz = _get_berlin_tz()
     today = date.today()
     end = today + timedelta(days=forecast_days)
+    started = datetime.now(timezone.utc)
 
-    # Datumsstrings für API
-    start_dt = datetime.combine(today, datetime.min.time()).replace(tzinfo=tz)
-    end_dt = datetime.combine(end, datetime.max.time().replace(microsecond=0)).replace(tzinfo=tz)
-    start_str = start_dt.isoformat()
-    end_str = end_dt.isoformat()
+    state = db.get(SyncState, SYNC_NAME)
+    if not state:
+        state = SyncState(name=SYNC_NAME)
+        db.add(state)
+    mode = "full"
+    if incremental and state.watermark and state.last_full_sync_on == today:
+        mode = "incremental"
 
-    logger.info(f"Starte Reservierungs-Sync: {today} bis {end}")
+    logger.info(f"Starte Reservierungs-Sync ({mode}): {today} bis {end}")
 
     # 1. Buchungen von API holen
-    bookings = fetch_bookings_from_teburio(start_str, end_str)
+    bookings = None
+    if mode == "incremental":
+        since = state.watermark.replace(tzinfo=timezone.utc) - INCREMENTAL_OVERLAP
+        bookings = fetch_bookings_from_teburio(today, end, updated_since=since.isoformat())
+        if bookings is None:
+            logger.warning("Inkrementeller Abruf fehlgeschlagen, falle auf Voll-Sync zurück")
+            mode = "full"
+    if mode == "full":
+        bookings = fetch_bookings_from_teburio(today, end)
 
     # None = API-Fehler, [] = keine Buchungen (beides unterschiedlich behandeln)
     if bookings is None:
+        db.rollback()
         logger.error("API-Fehler: Sync abgebrochen")
         return {"status": "error", "message": "API-Fehler beim Abrufen der Buchungen"}
 
     logger.info(f"{len(bookings)} Buchungen von Teburio erhalten")
 
-    # 2. Aggregieren: Pro Tag + Zeitfenster zählen
-    # Initialisiere alle Tage mit 0 (damit Tage ohne Buchungen auch gespeichert werden)
-    daily_stats = {}
-    for day_offset in range(forecast_days + 1):
-        current_date = today + timedelta(days=day_offset)
-        for slot in TimeSlot:
-            daily_stats[(current_date, slot)] = {'reservations': 0, 'guests': 0}
-
-    for booking in bookings:
-        # Stornierte und No-Shows ignorieren
-        if booking.get('cancelled') or booking.get('noShow'):
-            continue
-
-        # Konsistente Timezone-Konvertierung
-        booking_dt = _timestamp_to_berlin_datetime(booking['date'])
-        booking_date = booking_dt.date()
-        time_slot = _booking_to_timeslot(booking['date'])
-        people = booking.get('people', 0)
-
-        key = (booking_date, time_slot)
-        if key in daily_stats:
-            daily_stats[key]['reservations'] += 1
-            daily_stats[key]['guests'] += people
-
-    # 3. In DB speichern (UPSERT: Update wenn existiert, Insert wenn neu)
-    saved = 0
-    now = datetime.now(timezone.utc)
-
-    for (forecast_date, time_slot), stats in daily_stats.items():
-        existing = db.query(ReservationSummary).filter(
-            ReservationSummary.forecast_date == forecast_date,
-            ReservationSummary.time_slot == time_slot
-        ).first()
-
-        if existing:
-            existing.total_reservations = stats['reservations']
-            existing.total_guests = stats['guests']
-            existing.synced_at = now
-        else:
-            new_entry = ReservationSummary(
-                forecast_date=forecast_date,
-                time_slot=time_slot,
-                total_reservations=stats['reservations'],
-                total_guests=stats['guests'],
-                synced_at=now
+    # 2. Buchungen speichern und betroffene (Tag, Zeitfenster) bestimmen
+    rows = _booking_rows(bookings, started)
+    if mode == "full":
+        # Alle Tage im Fenster, auch ohne Buchungen; lokal bekannte Buchungen,
+        # die Teburio nicht mehr liefert, und vergangene Tage entfernen
+        keys = {
+            (today + timedelta(days=day_offset), slot)
+            for day_offset in range(forecast_days + 1)
+            for slot in TimeSlot
+        }
+        fetched_ids = [row["id"] for row in rows]
+        db.execute(delete(ReservationBooking).where(
+            ReservationBooking.forecast_date <= end,
+            ReservationBooking.id.notin_(fetched_ids)
+        ))
+    else:
+        # Alter Stand zählt mit, falls eine Buchung Tag oder Zeitfenster gewechselt hat
+        keys = set(db.execute(
+            select(ReservationBooking.forecast_date, ReservationBooking.time_slot).where(
+                ReservationBooking.id.in_([row["id"] for row in rows])
             )
-            db.add(new_entry)
+        ).tuples().all())
+        keys |= {(row["forecast_date"], row["time_slot"]) for row in rows}
+        keys = {(forecast_date, slot) for forecast_date, slot in keys if today <= forecast_date <= end}
+    _upsert_bookings(db, rows)
 
-        saved += 1
+    # 3. Summen schreiben (ein INSERT ... ON CONFLICT)
+    saved = _apply_summaries(db, keys, started)
 
+    state.watermark = started.replace(tzinfo=None)
+    if mode == "full":
+        state.last_full_sync_on = today
     db.commit()
-    logger.info(f"Sync fertig: {saved} Einträge gespeichert/aktualisiert")
+    logger.info(f"Sync fertig ({mode}): {saved} Einträge gespeichert/aktualisiert")
 
     return {
         "status": "success",
+        "mode": mode,
         "bookings_fetched": len(bookings),
         "entries_saved": saved
     }
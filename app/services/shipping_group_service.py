@@ -0,0 +1,215 @@
+"""
+Freigabe und Versand von ShippingGroups.
+
+Die Freigabe setzt die ShippingGroup auf IN_VERSAND und legt einen Job an.
+PDF-Rendering, Ablage und Email-Versand laufen im Worker
+(app/scripts/job_worker.py), das Ergebnis landet in email_sent / email_error.
+
+Bei der Sammel-Freigabe gibt es einen Job für alle Gruppen: PDFs werden
+parallel in einem Prozess-Pool gerendert, die Mails gehen über eine
+SMTP-Verbindung raus. Fehlgeschlagene Mails werden als Einzel-Jobs
+(mit Backoff) erneut versucht.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from app.config import settings
+from app.models import User, ShippingGroup, OrderItem, Order
+from app.models.shipping_group import ShippingGroupStatus
+from app.services.job_service import enqueue_job, register_job_handler
+from app.services.pdf_service import build_pdf_data, render_shipping_group_pdf, generate_short_id
+from app.services.email_service import send_order_email, send_order_emails_batch
+
+logger = logging.getLogger("app.services.shipping_group_service")
+
+SEND_SHIPPING_GROUP_JOB = "send_shipping_group"
+SEND_SHIPPING_GROUP_BATCH_JOB = "send_shipping_group_batch"
+
+PDF_STORAGE_DIR = "storage/pdfs"
+
+
+def store_pdf(shipping_group_id: UUID, pdf_bytes: bytes) -> str:
+    """Speichert das PDF unter storage/pdfs/2026/02/SG-A7F3B2.pdf und gibt den Pfad zurück."""
+    today = date.today()
+    pdf_dir = f"{PDF_STORAGE_DIR}/{today.year}/{today.month:02d}"
+    os.makedirs(pdf_dir, exist_ok=True)
+
+    pdf_path = os.path.join(pdf_dir, f"{generate_short_id(shipping_group_id)}.pdf")
+    with open(pdf_path, "wb") as f:
+        f.write(pdf_bytes)
+    return pdf_path
+
+
+def _set_in_versand(shipping_group: ShippingGroup, user: User):
+    shipping_group.status = ShippingGroupStatus.IN_VERSAND
+    shipping_group.sender_id = user.id
+    shipping_group.send_date = date.today()
+    shipping_group.email_sent = False
+    shipping_group.email_error = None
+
+
+def mark_for_sending(db: Session | AsyncSession, shipping_group: ShippingGroup, user: User):
+    """
+    OFFEN → IN_VERSAND und Versand-Job anlegen.
+    Kein Commit, das macht der Aufrufer.
+    """
+    _set_in_versand(shipping_group, user)
+
+    enqueue_job(db, SEND_SHIPPING_GROUP_JOB, {
+        "shipping_group_id": str(shipping_group.id),
+        "approved_by": user.name
+    })
+
+
+def mark_batch_for_sending(db: Session | AsyncSession, shipping_groups: list[ShippingGroup], user: User):
+    """
+    Mehrere ShippingGroups OFFEN → IN_VERSAND, ein gemeinsamer Versand-Job.
+    Kein Commit, das macht der Aufrufer.
+    """
+    if not shipping_groups:
+        return
+
+    for shipping_group in shipping_groups:
+        _set_in_versand(shipping_group, user)
+
+    enqueue_job(db, SEND_SHIPPING_GROUP_BATCH_JOB, {
+        "shipping_group_ids": [str(sg.id) for sg in shipping_groups],
+        "approved_by": user.name
+    })
+
+
+def _sending_query(db: Session):
+    return db.query(ShippingGroup).options(
+        joinedload(ShippingGroup.supplier),
+        joinedload(ShippingGroup.items).joinedload(OrderItem.article),
+        joinedload(ShippingGroup.items).joinedload(OrderItem.order).joinedload(Order.department)
+    )
+
+
+def _load_for_sending(db: Session, shipping_group_id: UUID) -> ShippingGroup | None:
+    return _sending_query(db).filter(ShippingGroup.id == shipping_group_id).first()
+
+
+def process_send_job(db: Session, payload: dict):
+    """Job-Handler: PDF rendern, speichern und an den Lieferanten mailen."""
+    shipping_group = _load_for_sending(db, UUID(payload["shipping_group_id"]))
+    if not shipping_group or shipping_group.status != ShippingGroupStatus.IN_VERSAND:
+        logger.info(f"Versand-Job übersprungen: ShippingGroup {payload['shipping_group_id']} nicht (mehr) im Versand")
+        return
+
+    # PDF nur einmal erzeugen, auch wenn der Email-Versand wiederholt wird
+    if not shipping_group.pdf_path or not os.path.exists(shipping_group.pdf_path):
+        data = build_pdf_data(db, shipping_group, payload["approved_by"])
+        shipping_group.pdf_path = store_pdf(shipping_group.id, render_shipping_group_pdf(data))
+        db.commit()
+
+    supplier = shipping_group.supplier
+    if supplier and supplier.email:
+        result = asyncio.run(send_order_email(
+            to_email=supplier.email,
+            supplier_name=supplier.name,
+            delivery_date=shipping_group.delivery_date,
+            pdf_path=shipping_group.pdf_path,
+            order_reference=generate_short_id(shipping_group.id)
+        ))
+        if not result["success"]:
+            shipping_group.email_error = result["error"]
+            db.commit()
+            raise RuntimeError(f"Email an {supplier.email} konnte nicht gesendet werden: {result['error']}")
+        shipping_group.email_sent = True
+        shipping_group.email_error = None
+    else:
+        shipping_group.email_error = "Lieferant hat keine Email-Adresse"
+
+    shipping_group.status = ShippingGroupStatus.VERSENDET
+
+
+def on_send_job_failed(db: Session, payload: dict, error: str):
+    """Nach dem letzten Fehlversuch: als versendet verbuchen, Fehler bleibt in email_error."""
+    shipping_group = db.query(ShippingGroup).filter(
+        ShippingGroup.id == UUID(payload["shipping_group_id"])
+    ).first()
+    if shipping_group and shipping_group.status == ShippingGroupStatus.IN_VERSAND:
+        shipping_group.status = ShippingGroupStatus.VERSENDET
+        shipping_group.email_sent = False
+        shipping_group.email_error = error
+
+
+def render_pdfs(datas: list) -> list[bytes]:
+    """PDFs parallel rendern. Die Daten sind reine Dataclasses, also picklebar."""
+    workers = min(len(datas), settings.pdf_render_workers)
+    if workers <= 1:
+        return [render_shipping_group_pdf(data) for data in datas]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_shipping_group_pdf, datas))
+
+
+def process_send_batch_job(db: Session, payload: dict):
+    """
+    Job-Handler für die Sammel-Freigabe:
+    alle PDFs parallel rendern, alle Mails über eine SMTP-Verbindung senden.
+    """
+    ids = [UUID(sg_id) for sg_id in payload["shipping_group_ids"]]
+    shipping_groups = _sending_query(db).filter(
+        ShippingGroup.id.in_(ids),
+        ShippingGroup.status == ShippingGroupStatus.IN_VERSAND
+    ).all()
+    if not shipping_groups:
+        return
+
+    # PDFs (nur die noch fehlenden) parallel erzeugen
+    missing_pdf = [
+        sg for sg in shipping_groups
+        if not sg.pdf_path or not os.path.exists(sg.pdf_path)
+    ]
+    if missing_pdf:
+        datas = [build_pdf_data(db, sg, payload["approved_by"]) for sg in missing_pdf]
+        for sg, pdf_bytes in zip(missing_pdf, render_pdfs(datas)):
+            sg.pdf_path = store_pdf(sg.id, pdf_bytes)
+        db.commit()
+
+    with_email = [sg for sg in shipping_groups if sg.supplier and sg.supplier.email]
+    results = asyncio.run(send_order_emails_batch([
+        {
+            "to_email": sg.supplier.email,
+            "delivery_date": sg.delivery_date,
+            "pdf_path": sg.pdf_path,
+            "order_reference": generate_short_id(sg.id)
+        }
+        for sg in with_email
+    ]))
+
+    for sg, result in zip(with_email, results):
+        if result["success"]:
+            sg.email_sent = True
+            sg.email_error = None
+            sg.status = ShippingGroupStatus.VERSENDET
+        else:
+            # Einzeln mit Backoff erneut versuchen, PDF liegt schon
+            sg.email_error = result["error"]
+            enqueue_job(db, SEND_SHIPPING_GROUP_JOB, {
+                "shipping_group_id": str(sg.id),
+                "approved_by": payload["approved_by"]
+            })
+
+    for sg in shipping_groups:
+        if not (sg.supplier and sg.supplier.email):
+            sg.email_error = "Lieferant hat keine Email-Adresse"
+            sg.status = ShippingGroupStatus.VERSENDET
+
+
+def on_send_batch_job_failed(db: Session, payload: dict, error: str):
+    """Nach dem letzten Fehlversuch: noch offene Gruppen als versendet verbuchen."""
+    for sg_id in payload["shipping_group_ids"]:
+        on_send_job_failed(db, {"shipping_group_id": sg_id}, error)
+
+
+register_job_handler(SEND_SHIPPING_GROUP_JOB, process_send_job, on_send_job_failed)
+register_job_handler(SEND_SHIPPING_GROUP_BATCH_JOB, process_send_batch_job, on_send_batch_job_failed)
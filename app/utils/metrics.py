@@ -0,0 +1,52 @@
+"""
+Prometheus-Metriken über prometheus_client.
+
+Die Metriken werden in den Modulen direkt als Counter/Gauge/Histogram von
+prometheus_client angelegt. Bei mehreren uvicorn-Workern muss
+PROMETHEUS_MULTIPROC_DIR auf ein beim Deploy geleertes Verzeichnis zeigen:
+jeder Worker schreibt seine Werte dorthin, GET /metrics fasst alle Worker
+zusammen. Ohne die Variable gilt die prozesslokale Registry.
+
+GET /metrics verlangt das metrics_token als Bearer-Token. Ist keins
+konfiguriert, ist der Endpunkt abgeschaltet (404).
+"""
+import os
+import secrets
+
+from fastapi import Header, HTTPException
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from app.config import settings
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def render_metrics() -> bytes:
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead():
+    """Beim Beenden eines Workers: dessen live*-Gauges aus der Summe nehmen."""
+    if _multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def sample_value(name: str, **labels) -> float:
+    """Aktueller Wert eines Samples in diesem Prozess (0, solange es noch keins gibt)."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def require_metrics_token(authorization: str | None = Header(default=None)):
+    if not settings.metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.metrics_token):
+        raise HTTPException(status_code=401, detail="Ungültiges Metrics-Token", headers={"WWW-Authenticate": "Bearer"})
@@ -0,0 +1,50 @@
+"""
+Keyset-Pagination (Cursor statt OFFSET).
+
+Der Cursor ist der Sortierschlüssel des letzten Eintrags einer Seite,
+als URL-sicheres base64-JSON kodiert. Die nächste Seite beginnt direkt
+hinter diesem Schlüssel, egal wie viele Einträge davor liegen.
+"""
+import base64
+import json
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = [v.isoformat() if hasattr(v, "isoformat") else str(v) for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[str], Any]) -> tuple:
+    """Cursor dekodieren, types wandelt die einzelnen Werte zurück (z.B. UUID, datetime.fromisoformat)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(raw) != len(types):
+            raise ValueError
+        return tuple(convert(value) for convert, value in zip(types, raw))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+
+
+def keyset_after(columns: Sequence, values: Sequence, descending: bool = True):
+    """Filter für alle Zeilen hinter dem Cursor (Row-Value-Vergleich)."""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key: Callable[[Any], tuple]) -> list:
+    """
+    Erwartet limit + 1 geladene Zeilen. Kürzt auf limit und setzt den
+    Cursor-Header, wenn es eine weitere Seite gibt.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows
@@ -0,0 +1,98 @@
+"""
+DB-Statistik pro Request.
+
+Zählt über Engine-Events (gilt für alle Engines, auch die Async-Engine)
+die Statements und die Zeit in der Datenbank. Der Zähler hängt an einer
+ContextVar, die RequestTimingMiddleware pro Request setzt; sync Endpunkte
+im Threadpool und die Greenlets der Async-Engine erben den Kontext.
+Ohne aktiven Request (Skripte, Worker) wird nichts gezählt.
+
+Zusätzlich wird pro Statement-Form (normalisiertes SQL) gezählt. Läuft
+dieselbe Form in einem Request öfter als query_repeat_threshold, ist das
+fast immer ein N+1-Muster (Query pro Zeile statt einer Query für alle).
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# ============ NORMALISIERUNG ============
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """
+    Form eines Statements ohne Werte: Parameter, Literale und
+    IN-/VALUES-Listen beliebiger Länge werden zu ?.
+    SQLAlchemy liefert pro Query denselben String → der Cache greift fast immer.
+    """
+    sql = _SPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(?)", sql)
+    return _ROWS.sub(r"\1", sql)
+
+
+# ============ ZÄHLER ============
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str):
+        self.queries += 1
+        self.shapes[normalize_sql(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement-Formen, die mindestens threshold-mal liefen, häufigste zuerst."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def start_request() -> tuple[RequestStats, Token]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token: Token):
+    _current.reset(token)
+
+
+def current_stats() -> RequestStats | None:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.record(statement)
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.db_seconds += time.perf_counter() - started
@@ -1,11 +1,15 @@
-from passlib.context import CryptContext
-
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
+from dataclasses import dataclass
 from functools import wraps
 import asyncio
+import threading
+import time
+import uuid
 
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
@@ -15,23 +19,42 @@ from app.models.user import User
 from app.models.department import Department
 from app.models.role import Role
 
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app.services import password_service
+from app.services.permission_service import (
+    Permissions, get_permissions_for, get_permissions_for_async, invalidate_permissions,
+    permissions_version, permissions_version_async
+)
 
 
-# Password
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password (bcrypt läuft im Prozess-Pool des password_service)
 
 def hash_password(plain_password: str) -> str:
-    return pwd_context.hash(plain_password)
+    return password_service.hash_password(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_service.verify_and_update(plain_password, hashed_password)[0]
 
 # JWT
 
+def principal_claims(user: User, version: int) -> dict:
+    """
+    Claims für den Access-Token: Rolle + Department, damit die meisten Requests ohne DB auskommen.
+    version: permissions_version, gelesen vor dem User. Die Claims gelten nur, solange sie aktuell ist.
+    """
+    return {
+        "sub": str(user.id),
+        "name": user.name,
+        "role": user.role.name,
+        "dept": str(user.department_id) if user.department_id else None,
+        "ver": version
+    }
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
-    to_encode['exp'] = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
+    now = datetime.now(timezone.utc)
+    to_encode['iat'] = now
+    to_encode['exp'] = now + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode['type'] = 'access'
     return jwt.encode(to_encode, settings.secret_key, settings.jwt_algorithm)
 
@@ -60,28 +83,187 @@ def decode_token(token: str, expected_type: str = None) -> dict:
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(extracted_token: str = Depends(oauth2_scheme), db: Session = Depends(get_db) ) -> User:
+
+# ============ PRINCIPAL ============
+
+@dataclass(frozen=True)
+class PrincipalRole:
+    name: str
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Angemeldeter User ohne ORM-Objekt.
+    Kompatibel zu User für id, name, role.name und department_id.
+    Wer den User selbst ändern will, nimmt get_current_db_user.
+    """
+    id: uuid.UUID
+    name: str
+    role: PrincipalRole
+    department_id: uuid.UUID | None
+
+
+def _principal_from_user(user: User) -> Principal:
+    return Principal(
+        id=user.id,
+        name=user.name,
+        role=PrincipalRole(name=user.role.name),
+        department_id=user.department_id
+    )
+
+
+# ============ PRINCIPAL-CACHE ============
+# user_id -> (gültig bis, Version, Principal). Prozesslokal mit kurzer TTL.
+# Cache-Einträge und Token-Claims gelten nur für die permissions_version, mit
+# der sie entstanden sind. Änderungen an Rolle, Department oder is_active
+# erhöhen die Version (Mapper-Events im permission_service), danach wird jeder
+# Token einmal gegen die DB geprüft, in allen Prozessen.
+
+_principal_lock = threading.Lock()
+_principal_cache: dict[uuid.UUID, tuple[float, int, Principal]] = {}
+
+
+def invalidate_principal(user_id: uuid.UUID):
+    with _principal_lock:
+        _principal_cache.pop(user_id, None)
+    invalidate_permissions(user_id)
+
+
+def clear_principal_cache():
+    with _principal_lock:
+        _principal_cache.clear()
+    invalidate_permissions()
+
+
+def _cache_principal(principal: Principal, version: int):
+    with _principal_lock:
+        _principal_cache[principal.id] = (time.monotonic() + settings.principal_cache_ttl_seconds, version, principal)
+
+
+def _cached_principal(user_id: uuid.UUID, version: int) -> Principal | None:
+    entry = _principal_cache.get(user_id)
+    if entry and entry[0] > time.monotonic() and entry[1] == version:
+        return entry[2]
+    return None
+
+
+def _principal_from_claims(user_id: uuid.UUID, payload: dict, version: int) -> Principal | None:
+    if "role" not in payload or payload.get("ver") != version:
+        return None
+    dept = payload.get("dept")
+    return Principal(
+        id=user_id,
+        name=payload.get("name", ""),
+        role=PrincipalRole(name=payload["role"]),
+        department_id=uuid.UUID(dept) if dept else None
+    )
+
+
+def _access_token_user_id(extracted_token: str) -> tuple[uuid.UUID, dict]:
     payload = decode_token(extracted_token, "access")
     if not payload:
         raise HTTPException(status_code=401, detail="Token ungültig")
-    user_id = payload.get("sub")
-    user = db.query(User)\
-        .options(joinedload(User.role))\
-        .options(joinedload(User.department))\
-        .filter(User.id == user_id).first()
+    try:
+        return uuid.UUID(payload.get("sub")), payload
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Token ungültig")
+
+
+def _principal_without_db(user_id: uuid.UUID, payload: dict, version: int) -> Principal | None:
+    return _cached_principal(user_id, version) or _principal_from_claims(user_id, payload, version)
+
+
+def _principal_from_db_user(user: User | None, version: int) -> Principal:
+    if not user:
+        raise HTTPException(status_code=401, detail="User nicht in DB")
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="Account deaktiviert")
+    principal = _principal_from_user(user)
+    _cache_principal(principal, version)
+    return principal
+
+
+def _user_query():
+    # populate_existing: nach einer Versionsänderung zählt der DB-Stand, nicht ein schon geladener User
+    return select(User).options(joinedload(User.role), joinedload(User.department)).execution_options(populate_existing=True)
+
+
+def get_permissions_version(db: Session = Depends(get_db)) -> int:
+    """Einmal pro Request gelesen (FastAPI cacht Dependencies), für Principal und Berechtigungen."""
+    return permissions_version(db)
+
+
+async def get_permissions_version_async(db: AsyncSession = Depends(get_async_db)) -> int:
+    return await permissions_version_async(db)
+
+
+def get_current_user(
+        extracted_token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db),
+        version: int = Depends(get_permissions_version)
+) -> Principal:
+    """
+    Principal aus Cache oder Token-Claims, solange die permissions_version passt.
+    Sonst (und ohne Claims) aus der DB, inklusive is_active.
+    """
+    user_id, payload = _access_token_user_id(extracted_token)
+    principal = _principal_without_db(user_id, payload, version)
+    if principal:
+        return principal
+    return _principal_from_db_user(db.execute(_user_query().where(User.id == user_id)).scalars().first(), version)
+
+
+async def get_current_user_async(
+        extracted_token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db),
+        version: int = Depends(get_permissions_version_async)
+) -> Principal:
+    """Wie get_current_user, für Endpunkte mit AsyncSession."""
+    user_id, payload = _access_token_user_id(extracted_token)
+    principal = _principal_without_db(user_id, payload, version)
+    if principal:
+        return principal
+    return _principal_from_db_user((await db.execute(_user_query().where(User.id == user_id))).scalars().first(), version)
+
+
+def get_current_db_user(principal: Principal = Depends(get_current_user), db: Session = Depends(get_db)) -> User:
+    """Vollständiger User als ORM-Objekt (für /auth/me, 2FA, Passwort ändern)."""
+    user = db.execute(_user_query().where(User.id == principal.id)).scalars().first()
     if not user:
         raise HTTPException(status_code=401, detail="User nicht in DB")
     return user
 
+
+def get_permissions(
+        principal: Principal = Depends(get_current_user),
+        db: Session = Depends(get_db),
+        version: int = Depends(get_permissions_version)
+) -> Permissions:
+    """Berechtigungen des Users, einmal berechnet und danach aus dem Cache."""
+    return get_permissions_for(db, principal, version)
+
+
+async def get_permissions_async(
+        principal: Principal = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db),
+        version: int = Depends(get_permissions_version_async)
+) -> Permissions:
+    return await get_permissions_for_async(db, principal, version)
+
+
 # Decorator der koontrolliert ob User-Role Zugriff auf den Endpunkt hat
 def require_role(allowed_roles: list):
+    # Einmal pro Endpunkt beim Import vorberechnet, pro Request nur noch ein Set-Lookup
+    allowed = frozenset(allowed_roles)
+
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             current_user = kwargs.get("current_user")
             if not current_user:
                 raise HTTPException(status_code=402, detail="Nicht eingeloggt")
-            if current_user.role.name not in allowed_roles:
+            if current_user.role.name not in allowed:
                 raise HTTPException(status_code=403, detail="Keine Berechtigung")
             if asyncio.iscoroutinefunction(func):
                 return await func(*args, **kwargs)
@@ -0,0 +1,153 @@
+"""
+Tests für das Activity-Log.
+
+Testet:
+- Einträge werden mit dem Commit der Fachtransaktion geschrieben
+- Mehrere Einträge → ein INSERT, ein Commit
+- Rollback verwirft gepufferte Einträge
+- Activity-Feed über department_id mit Cursor-Pagination
+"""
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from app.models import Department, Order
+from app.models.activity_log import ActivityLog, ActionType
+from app.models.order import OrderStatus
+from app.services.activity_service import log_activity
+from app.services.department_service import rebuild_department_closure
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from tests.conftest import auth_header, engine, TestingSessionLocal
+
+
+class TestBufferedActivityLog:
+    """Tests für den gepufferten Modus"""
+
+    def test_patch_writes_logs_with_one_insert(self, client, admin_token, db, admin_user, department, query_counter):
+        """PATCH mit mehreren Feldern → ein INSERT in activity_logs, ein Commit"""
+        order = Order(
+            id=uuid4(),
+            department_id=department.id,
+            creator_id=admin_user.id,
+            status=OrderStatus.ENTWURF
+        )
+        db.add(order)
+        db.commit()
+
+        commits = []
+
+        def count_commits(conn):
+            commits.append(conn)
+
+        event.listen(engine, "commit", count_commits)
+        try:
+            with query_counter() as stats:
+                response = client.patch(
+                    f"/orders/{order.id}",
+                    json={"delivery_notes": "Hintereingang", "additional_articles": "Servietten"},
+                    headers=auth_header(admin_token)
+                )
+        finally:
+            event.remove(engine, "commit", count_commits)
+
+        assert response.status_code == 200
+        assert len(stats.matching("INSERT INTO activity_logs")) == 1
+        assert len(commits) == 1
+        assert db.query(ActivityLog).filter(ActivityLog.entity_id == order.id).count() == 2
+
+    def test_nothing_written_before_commit(self, db, admin_user):
+        """Ohne Commit landet nichts in der Datenbank"""
+        log_activity(db, "order", uuid4(), admin_user.id, ActionType.ORDER_CREATED, "Test")
+
+        other = TestingSessionLocal()
+        try:
+            assert other.query(ActivityLog).count() == 0
+        finally:
+            other.close()
+
+        db.commit()
+        assert db.query(ActivityLog).count() == 1
+
+    def test_rollback_discards_entries(self, db, admin_user):
+        """Rollback verwirft gepufferte Einträge"""
+        log_activity(db, "order", uuid4(), admin_user.id, ActionType.ORDER_CREATED, "Test")
+        db.rollback()
+        db.commit()
+
+        assert db.query(ActivityLog).count() == 0
+
+
+class TestActivityFeed:
+    """Tests für GET /activities/"""
+
+    def _log(self, department_id, timestamp, user_id):
+        return ActivityLog(
+            entity_type="order",
+            entity_id=uuid4(),
+            user_id=user_id,
+            department_id=department_id,
+            timestamp=timestamp,
+            action_type=ActionType.NOTE_CHANGED,
+            description="Test"
+        )
+
+    def test_order_endpoints_write_department(self, client, admin_token, db, admin_user, department):
+        """Einträge zu Bestellungen tragen das Department der Bestellung"""
+        order = Order(id=uuid4(), department_id=department.id, creator_id=admin_user.id, status=OrderStatus.ENTWURF)
+        db.add(order)
+        db.commit()
+
+        response = client.patch(
+            f"/orders/{order.id}",
+            json={"delivery_notes": "Hintereingang"},
+            headers=auth_header(admin_token)
+        )
+
+        assert response.status_code == 200
+        log = db.query(ActivityLog).filter(ActivityLog.entity_id == order.id).one()
+        assert log.department_id == department.id
+
+    def test_feed_filters_by_department(self, client, admin_token, db, admin_user, department):
+        """department_id filtert direkt auf den Einträgen"""
+        other = Department(id=uuid4(), name="Bankett", parent_id=department.id)
+        db.add(other)
+        db.flush()
+        rebuild_department_closure(db)
+        now = datetime(2026, 1, 1)
+        db.add_all([self._log(department.id, now, admin_user.id), self._log(other.id, now, admin_user.id)])
+        db.commit()
+
+        response = client.get(
+            "/activities/",
+            params={"department_id": str(other.id)},
+            headers=auth_header(admin_token)
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert len(client.get("/activities/", headers=auth_header(admin_token)).json()) == 2
+
+    def test_feed_cursor_pages(self, client, admin_token, db, admin_user, department):
+        """Seiten über X-Next-Cursor, neueste zuerst, gleiche Zeitstempel ohne Doppelte"""
+        base = datetime(2026, 1, 1)
+        db.add_all([self._log(department.id, base + timedelta(minutes=i // 2), admin_user.id) for i in range(5)])
+        db.commit()
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/activities/", params=params, headers=auth_header(admin_token))
+            assert response.status_code == 200
+            seen.extend(response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+
+        assert len({a["id"] for a in seen}) == 5
+        timestamps = [a["timestamp"] for a in seen]
+        assert timestamps == sorted(timestamps, reverse=True)
+
+    def test_feed_invalid_cursor(self, client, admin_token):
+        response = client.get("/activities/", params={"cursor": "kaputt"}, headers=auth_header(admin_token))
+        assert response.status_code == 400
@@ -5,12 +5,19 @@ Testet:
 - GET /approver-suppliers/ (Liste)
 - POST /approver-suppliers/ (Erstellen)
 - DELETE /approver-suppliers/ (Löschen)
+- Vorberechnete Berechtigungen (Cache + Versionsprüfung)
 """
 import pytest
 from uuid import uuid4
+from datetime import date, timedelta
 
-from app.models import ApproverSupplier, Supplier, User
-from tests.conftest import auth_header
+from fastapi import HTTPException
+
+from app.models import ApproverSupplier, Supplier, User, ShippingGroup
+from app.models.shipping_group import ShippingGroupStatus
+from app.services import permission_service
+from app.utils.security import Principal, PrincipalRole
+from tests.conftest import auth_header, TestingSessionLocal
 
 
 # ============ GET TESTS ============
@@ -246,4 +253,110 @@ class TestDeleteApproverSupplier:
         )
         
         # Assert
-        assert response.status_code == 403
\ No newline at end of file
+        assert response.status_code == 403
+
+
+# ============ PERMISSION-CACHE TESTS ============
+
+class TestPermissionCache:
+    """Berechtigungen werden einmal berechnet und bei Änderungen verworfen"""
+
+    @pytest.fixture
+    def shipping_group(self, db, supplier):
+        sg = ShippingGroup(
+            id=uuid4(),
+            supplier_id=supplier.id,
+            delivery_date=date.today() + timedelta(days=1),
+            status=ShippingGroupStatus.OFFEN
+        )
+        db.add(sg)
+        db.commit()
+        return sg
+
+    def test_permissions_loaded_once(
+        self, client, freigeber_token, db, freigeber_user, supplier, shipping_group, query_counter
+    ):
+        db.add(ApproverSupplier(user_id=freigeber_user.id, supplier_id=supplier.id))
+        db.commit()
+
+        with query_counter() as stats:
+            for _ in range(3):
+                response = client.get(f"/shipping-groups/{shipping_group.id}/pdf", headers=auth_header(freigeber_token))
+                # Berechtigung ok, PDF gibt es noch nicht
+                assert response.status_code == 404
+
+        assert len(stats.matching("FROM approver_suppliers")) == 1
+
+    def test_revoked_permission_applies_immediately(
+        self, client, admin_token, freigeber_token, db, freigeber_user, supplier, shipping_group
+    ):
+        db.add(ApproverSupplier(user_id=freigeber_user.id, supplier_id=supplier.id))
+        db.commit()
+        response = client.get(f"/shipping-groups/{shipping_group.id}", headers=auth_header(freigeber_token))
+        assert response.status_code == 200
+
+        response = client.delete(
+            f"/approver-suppliers/?user_id={freigeber_user.id}&supplier_id={supplier.id}",
+            headers=auth_header(admin_token)
+        )
+        assert response.status_code == 200
+
+        response = client.get(f"/shipping-groups/{shipping_group.id}", headers=auth_header(freigeber_token))
+        assert response.status_code == 403
+
+    def test_revoked_in_other_process_applies_immediately(
+        self, client, freigeber_token, db, freigeber_user, supplier, shipping_group
+    ):
+        """Änderung aus einem anderen Prozess: lokaler Eintrag bleibt, gilt aber nicht mehr"""
+        approver = ApproverSupplier(user_id=freigeber_user.id, supplier_id=supplier.id)
+        db.add(approver)
+        db.commit()
+        response = client.get(f"/shipping-groups/{shipping_group.id}", headers=auth_header(freigeber_token))
+        assert response.status_code == 200
+
+        other = TestingSessionLocal()
+        try:
+            other.delete(other.get(ApproverSupplier, (freigeber_user.id, supplier.id)))
+            other.commit()
+        finally:
+            other.close()
+
+        # Kein Commit-Hook im eigenen Prozess hat den Eintrag verworfen
+        assert freigeber_user.id in permission_service._cache
+        response = client.get(f"/shipping-groups/{shipping_group.id}", headers=auth_header(freigeber_token))
+        assert response.status_code == 403
+
+    def _stale_principal(self, user):
+        # Claims aus einem Token, das vor der Änderung ausgestellt wurde
+        return Principal(id=user.id, name=user.name, role=PrincipalRole(name="Freigeber"), department_id=user.department_id)
+
+    def _update_in_other_process(self, user_id, **fields):
+        other = TestingSessionLocal()
+        try:
+            user = other.get(User, user_id)
+            for field, value in fields.items():
+                setattr(user, field, value)
+            other.commit()
+        finally:
+            other.close()
+
+    def test_rebuild_uses_role_from_db(self, db, freigeber_user, role_admin):
+        """Nach einer Änderung zählt die Rolle aus der DB, nicht die des Principals"""
+        stale = self._stale_principal(freigeber_user)
+        assert not permission_service.get_permissions_for(db, stale).has(permission_service.ALL_SUPPLIERS)
+        db.commit()
+
+        self._update_in_other_process(freigeber_user.id, role_id=role_admin.id)
+
+        assert permission_service.get_permissions_for(db, stale).has(permission_service.ALL_SUPPLIERS)
+
+    def test_rebuild_rejects_deactivated_user(self, db, freigeber_user):
+        stale = self._stale_principal(freigeber_user)
+        permission_service.get_permissions_for(db, stale)
+        db.commit()
+
+        self._update_in_other_process(freigeber_user.id, is_active=False)
+
+        with pytest.raises(HTTPException) as exc:
+            permission_service.get_permissions_for(db, stale)
+        assert exc.value.status_code == 401
@@ -4,14 +4,18 @@ Tests für Articles Endpoints.
 Testet:
 - GET /articles/
 - GET /articles/{id}
+- GET /articles/search
+- GET /articles/{id}/order-history
 - POST /articles/
 - PATCH /articles/{id}
 - DELETE /articles/{id}
 """
 import pytest
 from uuid import uuid4
+from datetime import datetime, timedelta
 
-from app.models import Article
+from app.models import Article, Order, OrderItem, OrderStatus
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from tests.conftest import auth_header
 
 
@@ -105,6 +109,20 @@ class TestCreateArticle:
         assert data["unit"] == "kg"
         assert data["is_active"] == True
     
+    def test_create_article_duplicate_name_case_insensitive(self, client, admin_token, article):
+        """Gleicher Name in anderer Schreibweise → 409"""
+        response = client.post(
+            "/articles/",
+            json={
+                "name": "KAROTTEN",
+                "unit": "kg",
+                "article_group_id": str(article.article_group_id)
+            },
+            headers=auth_header(admin_token)
+        )
+
+        assert response.status_code == 409
+
     def test_create_article_with_notes(self, client, admin_token, article_group):
         """Artikel mit Notizen erstellen"""
         response = client.post(
@@ -223,4 +241,120 @@ class TestDeleteArticle:
             headers=auth_header(admin_token)
         )
         
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+
+class TestSearchArticles:
+    """Tests für GET /articles/search"""
+
+    @pytest.fixture
+    def articles(self, db, article_group):
+        names = ["Karotten", "Karottensaft", "Kartoffeln", "Zwiebeln rot", "Zwiebeln weiß"]
+        created = {
+            name: Article(id=uuid4(), name=name, unit="kg", article_group_id=article_group.id, is_active=True)
+            for name in names
+        }
+        created["alt"] = Article(id=uuid4(), name="Karotten alt", unit="kg", article_group_id=article_group.id, is_active=False)
+        db.add_all(created.values())
+        db.commit()
+        return created
+
+    def _search(self, client, token, **params):
+        return client.get("/articles/search", params=params, headers=auth_header(token))
+
+    def test_substring_ranked_by_similarity(self, client, admin_token, articles):
+        response = self._search(client, admin_token, q="karotten")
+
+        assert response.status_code == 200
+        names = [a["name"] for a in response.json()]
+        assert names[:2] == ["Karotten", "Karottensaft"]
+        assert "Karotten alt" not in names
+
+    def test_typo_is_found(self, client, admin_token, articles):
+        response = self._search(client, admin_token, q="Karoten")
+
+        assert "Karotten" in [a["name"] for a in response.json()]
+
+    def test_limit(self, client, admin_token, articles):
+        response = self._search(client, admin_token, q="Zwiebeln", limit=1)
+
+        assert len(response.json()) == 1
+
+    def test_recent_orders_are_boosted(self, client, db, admin_token, admin_user, articles):
+        order = Order(department_id=admin_user.department_id, creator_id=admin_user.id, status=OrderStatus.BESTELLT, is_active=True)
+        db.add(order)
+        db.flush()
+        db.add(OrderItem(order_id=order.id, article_id=articles["Zwiebeln weiß"].id, amount=5))
+        db.commit()
+
+        boosted = self._search(client, admin_token, q="Zwiebeln").json()
+        plain = self._search(client, admin_token, q="Zwiebeln", boost_recent=False).json()
+
+        assert boosted[0]["name"] == "Zwiebeln weiß"
+        assert boosted[0]["recently_ordered"] is True
+        assert not any(a["recently_ordered"] for a in plain)
+        assert plain[0]["name"] == "Zwiebeln rot"
+
+    def test_query_required(self, client, admin_token):
+        response = self._search(client, admin_token)
+
+        assert response.status_code == 422
+
+
+class TestArticleOrderHistory:
+    """Tests für GET /articles/{id}/order-history"""
+
+    @pytest.fixture
+    def history(self, db, admin_user, article):
+        """Eine offene und fünf bestellte Positionen, jeweils einen Tag auseinander."""
+        now = datetime(2026, 6, 1, 12, 0)
+        statuses = [OrderStatus.ENTWURF] + [OrderStatus.BESTELLT] * 5
+        for i, status in enumerate(statuses):
+            order = Order(
+                department_id=admin_user.department_id,
+                creator_id=admin_user.id,
+                status=status,
+                is_active=True,
+                drafted_on=now - timedelta(days=i)
+            )
+            db.add(order)
+            db.flush()
+            db.add(OrderItem(order_id=order.id, article_id=article.id, amount=i + 1))
+        db.commit()
+
+    def _get(self, client, token, article_id, **params):
+        return client.get(f"/articles/{article_id}/order-history", params=params, headers=auth_header(token))
+
+    def test_split_and_limit(self, client, admin_token, article, history):
+        response = self._get(client, admin_token, article.id, limit=2)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_orders"] == 6
+        assert [o["amount"] for o in data["active_orders"]] == [1.0]
+        assert [o["amount"] for o in data["past_orders"]] == [2.0, 3.0]
+        assert NEXT_CURSOR_HEADER in response.headers
+
+    def test_keyset_pages(self, client, admin_token, article, history):
+        amounts = []
+        cursor = None
+        for _ in range(3):
+            params = {"limit": 2, "cursor": cursor} if cursor else {"limit": 2}
+            response = self._get(client, admin_token, article.id, **params)
+            data = response.json()
+            if cursor:
+                assert data["active_orders"] == []
+            amounts += [o["amount"] for o in data["past_orders"]]
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+
+        assert amounts == [2.0, 3.0, 4.0, 5.0, 6.0]
+        assert cursor is None
+
+    def test_query_budget(self, client, admin_token, article, history, query_counter):
+        self._get(client, admin_token, article.id)  # Principal- und Stammdaten-Cache füllen
+
+        # Versionsprüfung für den Principal + Abfragen der Historie
+        with query_counter(max_queries=4):
+            response = self._get(client, admin_token, article.id, limit=2)
+
+        assert response.status_code == 200
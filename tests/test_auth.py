@@ -6,13 +6,18 @@ Testet:
 - POST /auth/refresh
 - GET /auth/me
 - 2FA Flow
+- Principal-Cache und Token-Claims
+- Passwort-Hashing im Prozess-Pool (Rehash, Überlastschutz)
 """
 import pytest
 from uuid import uuid4
 
+
 from app.models import User
-from app.utils.security import hash_password
-from tests.conftest import auth_header
+from app.config import settings
+from app.utils.metrics import sample_value
+from app.utils.security import hash_password, decode_token
+from tests.conftest import auth_header, TestingSessionLocal
 
 
 class TestLogin:
@@ -250,4 +255,102 @@ class Test2FAValidate:
             "code": "000000"
         })
         
-        assert response.status_code == 401
\ No newline at end of file
+        assert response.status_code == 401
+
+
+class TestPrincipalCache:
+    """Tests für Principal aus Token-Claims und Cache"""
+
+    def test_access_token_contains_claims(self, admin_token, admin_user, role_admin, department):
+        payload = decode_token(admin_token, "access")
+
+        assert payload["sub"] == str(admin_user.id)
+        assert payload["role"] == role_admin.name
+        assert payload["dept"] == str(department.id)
+        assert "iat" in payload
+
+    def test_authenticated_request_skips_user_lookup(self, client, admin_token, query_counter):
+        with query_counter() as stats:
+            response = client.get("/roles/", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        assert stats.matching("FROM users") == []
+
+    def test_deactivated_user_token_rejected(self, client, admin_token, freigeber_user, freigeber_token):
+        assert client.get("/roles/", headers=auth_header(freigeber_token)).status_code == 200
+
+        response = client.patch(
+            f"/users/{freigeber_user.id}",
+            json={"is_active": False},
+            headers=auth_header(admin_token)
+        )
+        assert response.status_code == 200
+
+        response = client.get("/roles/", headers=auth_header(freigeber_token))
+        assert response.status_code == 401
+
+    def _update_in_other_process(self, user_id, **fields):
+        # Eigene Session ohne invalidate_principal, wie ein anderer Worker
+        other = TestingSessionLocal()
+        try:
+            user = other.get(User, user_id)
+            for field, value in fields.items():
+                setattr(user, field, value)
+            other.commit()
+        finally:
+            other.close()
+
+    def test_deactivated_in_other_process_token_rejected(self, client, admin_token, admin_user):
+        assert client.get("/users/", headers=auth_header(admin_token)).status_code == 200
+
+        self._update_in_other_process(admin_user.id, is_active=False)
+
+        assert client.get("/users/", headers=auth_header(admin_token)).status_code == 401
+
+    def test_demoted_in_other_process_claims_ignored(self, client, admin_token, admin_user, role_bedarfsmelder):
+        assert client.get("/users/", headers=auth_header(admin_token)).status_code == 200
+
+        self._update_in_other_process(admin_user.id, role_id=role_bedarfsmelder.id)
+
+        assert client.get("/users/", headers=auth_header(admin_token)).status_code == 403
+
+
+class TestPasswordHashing:
+    """Tests für bcrypt im Prozess-Pool"""
+
+    def test_login_rehashes_on_cost_change(self, client, db, admin_user, monkeypatch):
+        assert admin_user.password_hash.startswith(f"$2b${settings.password_bcrypt_rounds:02d}$")
+        monkeypatch.setattr(settings, "password_bcrypt_rounds", 5)
+
+        response = client.post("/auth/login", json={
+            "email": "admin@test.com",
+            "password": "adminpass123"
+        })
+
+        assert response.status_code == 200
+        db.refresh(admin_user)
+        assert admin_user.password_hash.startswith("$2b$05$")
+
+    def test_login_rejected_when_pool_full(self, client, admin_user, monkeypatch):
+        monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+        before = sample_value("password_hash_rejected_total")
+
+        response = client.post("/auth/login", json={
+            "email": "admin@test.com",
+            "password": "adminpass123"
+        })
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert sample_value("password_hash_rejected_total") == before + 1
+
+    def test_hash_latency_recorded(self, client, admin_user):
+        before = sample_value("password_hash_seconds_count", operation="verify")
+
+        client.post("/auth/login", json={
+            "email": "admin@test.com",
+            "password": "adminpass123"
+        })
+
+        assert sample_value("password_hash_seconds_count", operation="verify") == before + 1
+        assert sample_value("password_hash_pending") == 0
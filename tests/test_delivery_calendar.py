@@ -0,0 +1,86 @@
+"""
+Tests für den Lieferkalender.
+
+Testet:
+- Berechnung der Liefertermine (Wochentage, Feiertage)
+- Batch-API für mehrere Lieferanten
+- Invalidierung über POST/DELETE /delivery-days/
+"""
+import pytest
+from uuid import uuid4
+from datetime import date, timedelta
+
+from app.models import Supplier, DeliveryDay
+from app.models.delivery_days import Weekday
+from app.services import delivery_calendar
+from tests.conftest import auth_header
+
+
+ALL_WEEKDAYS = frozenset(Weekday)
+
+
+class TestComputeDeliveryDates:
+    """Tests für compute_delivery_dates"""
+
+    def test_only_valid_weekdays(self):
+        """Nur Termine an den Liefertagen"""
+        start = date(2026, 3, 2)  # Montag
+        dates = delivery_calendar.compute_delivery_dates(frozenset({Weekday.MI}), start)
+
+        assert dates == (date(2026, 3, 4), date(2026, 3, 11))
+
+    def test_holidays_are_skipped(self):
+        """Feiertage werden übersprungen (1. Mai 2026)"""
+        start = date(2026, 4, 30)
+        dates = delivery_calendar.compute_delivery_dates(ALL_WEEKDAYS, start, horizon_days=3)
+
+        assert date(2026, 5, 1) not in dates
+        assert dates == (date(2026, 4, 30), date(2026, 5, 2))
+
+    def test_holidays_for_any_year(self):
+        """Feiertage werden für beliebige Jahre geladen"""
+        assert delivery_calendar.is_holiday(date(2031, 12, 25))
+
+    def test_no_weekdays_no_dates(self):
+        """Ohne Liefertage keine Termine"""
+        assert delivery_calendar.compute_delivery_dates(frozenset(), date(2026, 3, 2)) == ()
+
+
+class TestDeliveryCalendarCache:
+    """Tests für Batch-API und Invalidierung"""
+
+    @pytest.fixture
+    def fixed_supplier(self, db):
+        sup = Supplier(id=uuid4(), name="Fester Lieferant", is_active=True, fixed_delivery_days=True)
+        db.add(sup)
+        db.commit()
+        return sup
+
+    def test_batch_for_many_suppliers(self, db, supplier, fixed_supplier):
+        """Mehrere Lieferanten in einem Aufruf"""
+        db.add_all([
+            DeliveryDay(supplier_id=fixed_supplier.id, weekday=weekday) for weekday in Weekday
+        ])
+        db.commit()
+
+        result = delivery_calendar.get_next_delivery_dates(db, {supplier.id, fixed_supplier.id})
+
+        assert result[supplier.id] is None
+        assert result[fixed_supplier.id] is not None
+        assert result[fixed_supplier.id] > date.today()
+
+    def test_api_change_invalidates_calendar(self, client, admin_token, db, fixed_supplier):
+        """Neuer Liefertag über die API ist sofort im Kalender sichtbar"""
+        assert delivery_calendar.get_next_delivery_date(db, fixed_supplier.id) is None
+
+        for weekday in Weekday:
+            response = client.post(
+                "/delivery-days/",
+                json={"supplier_id": str(fixed_supplier.id), "weekday": weekday.value},
+                headers=auth_header(admin_token)
+            )
+            assert response.status_code == 200
+
+        next_date = delivery_calendar.get_next_delivery_date(db, fixed_supplier.id)
+        assert next_date is not None
+        assert next_date <= date.today() + timedelta(days=delivery_calendar.DELIVERY_HORIZON_DAYS)
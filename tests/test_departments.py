@@ -9,7 +9,7 @@ Testet:
 - DELETE /departments/{id}
 """
 import pytest
-from uuid import uuid4
+from uuid import uuid4, UUID
 
 from app.models import Department
 from tests.conftest import auth_header
@@ -196,4 +196,91 @@ class TestDeleteDepartment:
             headers=auth_header(admin_token)
         )
         
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+class TestDepartmentClosure:
+    """Tests für die Pflege der department_closure-Tabelle"""
+
+    def _closure(self, db):
+        from app.models import DepartmentClosure
+        return {
+            (row.ancestor_id, row.descendant_id): row.depth
+            for row in db.query(DepartmentClosure).all()
+        }
+
+    def _create(self, client, admin_token, name, parent_id=None):
+        payload = {"name": name}
+        if parent_id:
+            payload["parent_id"] = str(parent_id)
+        response = client.post("/departments/", json=payload, headers=auth_header(admin_token))
+        assert response.status_code == 200
+        return UUID(response.json()["id"])
+
+    def test_create_adds_paths(self, client, admin_token, department, db):
+        """Neuer Bereich bekommt Pfade zu allen Vorfahren"""
+        child = self._create(client, admin_token, "Kalt-Küche", department.id)
+        grandchild = self._create(client, admin_token, "Salate", child)
+
+        closure = self._closure(db)
+        assert closure[(grandchild, grandchild)] == 0
+        assert closure[(child, grandchild)] == 1
+        assert closure[(department.id, grandchild)] == 2
+
+    def test_reparent_moves_subtree(self, client, admin_token, department, db):
+        """Umhängen verschiebt den ganzen Teilbaum"""
+        other = self._create(client, admin_token, "Bar")
+        child = self._create(client, admin_token, "Kalt-Küche", department.id)
+        grandchild = self._create(client, admin_token, "Salate", child)
+
+        response = client.patch(
+            f"/departments/{child}",
+            json={"parent_id": str(other)},
+            headers=auth_header(admin_token)
+        )
+        assert response.status_code == 200
+
+        db.expire_all()
+        closure = self._closure(db)
+        assert (department.id, grandchild) not in closure
+        assert closure[(other, child)] == 1
+        assert closure[(other, grandchild)] == 2
+
+    def test_reparent_into_own_subtree_rejected(self, client, admin_token, department):
+        """Zyklen werden verhindert"""
+        child = self._create(client, admin_token, "Kalt-Küche", department.id)
+
+        response = client.patch(
+            f"/departments/{department.id}",
+            json={"parent_id": str(child)},
+            headers=auth_header(admin_token)
+        )
+        assert response.status_code == 400
+
+    def test_delete_removes_paths(self, client, admin_token, department, db):
+        """Deaktivierter Bereich verschwindet aus der Closure"""
+        child = self._create(client, admin_token, "Kalt-Küche", department.id)
+
+        response = client.delete(f"/departments/{child}", headers=auth_header(admin_token))
+        assert response.status_code == 200
+
+        db.expire_all()
+        closure = self._closure(db)
+        assert (department.id, child) not in closure
+        assert (child, child) not in closure
+
+    def test_deactivate_with_active_children_rejected(self, client, admin_token, department, db):
+        """PATCH is_active=false mit aktiven Unterbereichen → 400, Closure bleibt"""
+        child = self._create(client, admin_token, "Kalt-Küche", department.id)
+
+        response = client.patch(
+            f"/departments/{department.id}",
+            json={"is_active": False},
+            headers=auth_header(admin_token)
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Bereich hat aktive Unterbereiche"
+
+        db.expire_all()
+        closure = self._closure(db)
+        assert closure[(department.id, child)] == 1
+        assert closure[(child, child)] == 0
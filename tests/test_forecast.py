@@ -0,0 +1,97 @@
+"""
+Tests für Bestellvorschläge.
+
+Testet:
+- GET /forecast/suggested-order (Menge pro Gast × Gäste)
+- Modell-Cache: zweiter Abruf ohne Bestellhistorie-Query
+- 404 ohne Reservierungen, 403 für fremde Departments
+"""
+from datetime import date, timedelta
+from uuid import uuid4
+
+
+from app.models import Department, Order, OrderItem, OrderStatus
+from app.models.reservation import ReservationSummary, TimeSlot
+from app.services.department_service import rebuild_department_closure
+from tests.conftest import auth_header
+
+
+class TestSuggestedOrder:
+    """Tests für GET /forecast/suggested-order"""
+
+    def _add_guests(self, db, day: date, guests: int):
+        db.add(ReservationSummary(forecast_date=day, time_slot=TimeSlot.MITTAG, total_reservations=1, total_guests=guests))
+
+    def _seed_history(self, db, department, user, article, days: int = 21):
+        """Jeden Tag 0,1 Einheiten pro Gast."""
+        today = date.today()
+        for i in range(1, days + 1):
+            day = today - timedelta(days=i)
+            guests = 100 + 10 * (i % 7)
+            self._add_guests(db, day, guests)
+            order = Order(
+                department_id=department.id,
+                creator_id=user.id,
+                delivery_date=day,
+                status=OrderStatus.BESTELLT,
+                is_active=True
+            )
+            db.add(order)
+            db.flush()
+            db.add(OrderItem(order_id=order.id, article_id=article.id, amount=guests / 10))
+        db.commit()
+
+    def _get(self, client, token, department_id, day: date):
+        return client.get(
+            f"/forecast/suggested-order?department_id={department_id}&delivery_date={day.isoformat()}",
+            headers=auth_header(token)
+        )
+
+    def test_suggestion_scales_with_guests(self, client, db, admin_token, admin_user, department, article):
+        self._seed_history(db, department, admin_user, article)
+        tomorrow = date.today() + timedelta(days=1)
+        self._add_guests(db, tomorrow, 200)
+        db.commit()
+
+        response = self._get(client, admin_token, department.id, tomorrow)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["expected_guests"] == 200
+        assert data["history_days"] == 21
+        assert len(data["items"]) == 1
+        item = data["items"][0]
+        assert item["article_id"] == str(article.id)
+        assert item["suggested_amount"] == 20.0
+        assert item["units_per_guest"] == 0.1
+        assert item["observations"] == 21
+
+    def test_second_request_uses_cached_model(self, client, db, admin_token, admin_user, department, article, query_counter):
+        self._seed_history(db, department, admin_user, article, days=7)
+        tomorrow = date.today() + timedelta(days=1)
+        self._add_guests(db, tomorrow, 150)
+        db.commit()
+        self._get(client, admin_token, department.id, tomorrow)
+
+        with query_counter() as stats:
+            response = self._get(client, admin_token, department.id, tomorrow)
+
+        assert response.status_code == 200
+        assert response.json()["items"][0]["suggested_amount"] == 15.0
+        assert stats.matching("order_items") == []
+
+    def test_without_reservations_returns_404(self, client, admin_token, department):
+        response = self._get(client, admin_token, department.id, date.today() + timedelta(days=1))
+
+        assert response.status_code == 404
+
+    def test_foreign_department_forbidden(self, client, db, bedarfsmelder_token):
+        other = Department(id=uuid4(), name="Fremde Küche", is_active=True)
+        db.add(other)
+        db.commit()
+        rebuild_department_closure(db)
+        db.commit()
+
+        response = self._get(client, bedarfsmelder_token, other.id, date.today() + timedelta(days=1))
+
+        assert response.status_code == 403
@@ -0,0 +1,178 @@
+"""
+Regressionstests für die Indizes der häufigsten Abfragen.
+
+Seedet einen kleinen Datenbestand, führt EXPLAIN für die typischen
+Abfragen aus und prüft, dass der Planner den passenden Index nimmt.
+Sequential Scans werden abgeschaltet, weil der Planner bei wenigen
+Zeilen sonst immer die Tabelle liest.
+"""
+import pytest
+from uuid import uuid4
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from app.models import Order, OrderItem, ShippingGroup, ArticleSupplier, Department
+from app.models.activity_log import ActivityLog, ActionType
+from app.models.order import OrderStatus
+from app.models.shipping_group import ShippingGroupStatus
+
+
+def _plan(db, sql: str, **params) -> str:
+    rows = db.execute(text(f"EXPLAIN {sql}"), params).all()
+    return "\n".join(row[0] for row in rows)
+
+
+class TestQueryPlans:
+    """EXPLAIN-Checks auf einem geseedeten Datenbestand"""
+
+    @pytest.fixture
+    def seeded(self, db, admin_user, department, supplier, article):
+        base = datetime(2026, 1, 1)
+        orders = [
+            Order(
+                id=uuid4(),
+                department_id=department.id,
+                creator_id=admin_user.id,
+                status=OrderStatus.ENTWURF,
+                drafted_on=base + timedelta(minutes=i),
+                is_active=i % 10 != 0
+            )
+            for i in range(300)
+        ]
+        groups = [
+            ShippingGroup(
+                id=uuid4(),
+                supplier_id=supplier.id,
+                delivery_date=date(2026, 1, 1) + timedelta(days=i),
+                status=ShippingGroupStatus.OFFEN if i % 3 == 0 else ShippingGroupStatus.VERSENDET
+            )
+            for i in range(90)
+        ]
+        db.add_all(orders + groups)
+        db.add_all([Department(id=uuid4(), name=f"Unterbereich {i}", parent_id=department.id) for i in range(20)])
+        db.flush()
+        db.add_all([
+            OrderItem(order_id=order.id, article_id=article.id, shipping_group_id=groups[i % 90].id, amount=1)
+            for i, order in enumerate(orders)
+        ])
+        db.add(ArticleSupplier(article_id=article.id, supplier_id=supplier.id, unit="kg"))
+        db.add_all([
+            ActivityLog(
+                entity_type="order",
+                entity_id=order.id,
+                user_id=admin_user.id,
+                department_id=order.department_id,
+                timestamp=order.drafted_on,
+                action_type=ActionType.ORDER_CREATED,
+                description="Seed"
+            )
+            for order in orders
+        ])
+        db.commit()
+
+        db.execute(text("ANALYZE"))
+        db.execute(text("SET enable_seqscan = off"))
+        yield {"orders": orders, "groups": groups}
+        db.execute(text("RESET enable_seqscan"))
+
+    def test_order_list_uses_keyset_index(self, db, seeded):
+        plan = _plan(db, "SELECT id FROM orders WHERE is_active ORDER BY drafted_on DESC, id DESC LIMIT 50")
+        assert "ix_orders_active_drafted_on" in plan
+        assert "Sort" not in plan
+
+    def test_orders_by_department_and_status(self, db, seeded, department):
+        plan = _plan(
+            db,
+            "SELECT id FROM orders WHERE is_active AND department_id = :d AND status = 'ENTWURF'",
+            d=department.id
+        )
+        assert "ix_orders_department_status" in plan
+
+    def test_order_items_by_order(self, db, seeded):
+        plan = _plan(db, "SELECT id FROM order_items WHERE order_id = :o", o=seeded["orders"][0].id)
+        assert "ix_order_items_order_id" in plan
+
+    def test_order_items_by_shipping_group(self, db, seeded):
+        plan = _plan(db, "SELECT id FROM order_items WHERE shipping_group_id = :g", g=seeded["groups"][0].id)
+        assert "ix_order_items_shipping_group_id" in plan
+
+    def test_open_shipping_group_lookup(self, db, seeded, supplier):
+        plan = _plan(
+            db,
+            "SELECT id FROM shipping_groups WHERE supplier_id = :s AND delivery_date = :d AND status = 'OFFEN'",
+            s=supplier.id, d=date(2026, 1, 4)
+        )
+        assert "ix_shipping_groups_open" in plan
+
+    def test_open_shipping_groups_by_delivery_date(self, db, seeded):
+        plan = _plan(
+            db,
+            "SELECT id FROM shipping_groups WHERE delivery_date = :d AND status = 'OFFEN'",
+            d=date(2026, 1, 4)
+        )
+        assert "ix_shipping_groups_open_delivery_date" in plan
+
+    def test_shipping_group_overview_page(self, db, seeded):
+        sort_date = "coalesce(delivery_date, '9999-12-31'::date)"
+        plan = _plan(db, f"SELECT id FROM shipping_groups ORDER BY {sort_date} DESC, id DESC LIMIT 51")
+        assert "ix_shipping_groups_sort_date" in plan
+        assert "Sort" not in plan
+
+        group = seeded["groups"][45]
+        plan = _plan(
+            db,
+            f"SELECT id FROM shipping_groups WHERE ({sort_date}, id) < (:d, :i) ORDER BY {sort_date} DESC, id DESC LIMIT 51",
+            d=group.delivery_date, i=group.id
+        )
+        assert "Index Cond" in plan and "ix_shipping_groups_sort_date" in plan
+        assert "Sort" not in plan
+
+    def test_activity_logs_by_entity(self, db, seeded):
+        plan = _plan(
+            db,
+            "SELECT id FROM activity_logs WHERE entity_type = 'order' AND entity_id = :e ORDER BY timestamp DESC",
+            e=seeded["orders"][0].id
+        )
+        assert "ix_activity_logs_entity" in plan
+
+    def test_activity_feed_by_department(self, db, seeded, department):
+        plan = _plan(
+            db,
+            "SELECT id FROM activity_logs WHERE department_id = :d ORDER BY timestamp DESC, id DESC LIMIT 50",
+            d=department.id
+        )
+        assert "ix_activity_logs_department_timestamp" in plan
+        assert "Sort" not in plan
+
+    def test_activity_feed_across_departments(self, db, seeded, department):
+        """Feed ohne department_id: eine Index-Teilabfrage pro Department, nur die Vereinigung wird sortiert"""
+        children = db.scalars(
+            text("SELECT id FROM departments WHERE parent_id = :p ORDER BY name LIMIT 3"), {"p": department.id}
+        ).all()
+        department_ids = [department.id, *children]
+        page = " UNION ALL ".join(
+            f"(SELECT id, timestamp FROM activity_logs WHERE department_id = :d{i} "
+            f"ORDER BY timestamp DESC, id DESC LIMIT 51)"
+            for i in range(len(department_ids))
+        )
+        plan = _plan(
+            db,
+            f"SELECT id FROM ({page}) AS page ORDER BY timestamp DESC, id DESC LIMIT 51",
+            **{f"d{i}": d for i, d in enumerate(department_ids)}
+        )
+        assert plan.count("ix_activity_logs_department_timestamp") == len(department_ids)
+        assert plan.count("Sort") <= 1
+        assert "Seq Scan" not in plan
+
+    def test_departments_by_parent(self, db, seeded, department):
+        plan = _plan(db, "SELECT id FROM departments WHERE parent_id = :p", p=department.id)
+        assert "ix_departments_parent_id" in plan
+
+    def test_article_supplier_lookup(self, db, seeded, article, supplier):
+        plan = _plan(
+            db,
+            "SELECT id FROM article_suppliers WHERE article_id = :a AND supplier_id = :s",
+            a=article.id, s=supplier.id
+        )
+        assert "ix_article_suppliers_article_supplier" in plan
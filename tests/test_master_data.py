@@ -0,0 +1,72 @@
+"""
+Tests für den Stammdaten-Cache.
+
+Testet:
+- Lesende Endpunkte ohne Stammdaten-Queries bei warmem Cache
+- Versionszähler: einmal pro Transaktion, sofortige Invalidierung im schreibenden Prozess
+- Neuladen bei neuer Version aus einem anderen Prozess
+"""
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.models import Article, CacheVersion
+from app.services.master_data import MASTER_DATA, get_master_data
+from tests.conftest import auth_header, engine
+
+
+def _version(db) -> int:
+    db.expire_all()
+    row = db.get(CacheVersion, MASTER_DATA)
+    return row.version if row else 0
+
+
+class TestMasterDataCache:
+    """Tests für app/services/master_data.py"""
+
+    def test_warm_cache_skips_article_queries(self, client, admin_token, article, query_counter):
+        client.get(f"/articles/{article.id}", headers=auth_header(admin_token))
+
+        with query_counter() as stats:
+            response = client.get(f"/articles/{article.id}", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        assert response.json()["article_group"]["name"] == "Gemüse"
+        assert not any("FROM articles" in shape for shape in stats.shapes)
+
+    def test_version_bumped_once_per_transaction(self, db, article_group):
+        before = _version(db)
+
+        db.add_all([
+            Article(id=uuid4(), name=name, unit="kg", article_group_id=article_group.id, is_active=True)
+            for name in ("Lauch", "Sellerie")
+        ])
+        db.commit()
+
+        assert _version(db) == before + 1
+
+    def test_update_visible_immediately(self, client, admin_token, article):
+        client.get(f"/articles/{article.id}", headers=auth_header(admin_token))
+
+        response = client.patch(
+            f"/articles/{article.id}",
+            json={"name": "Möhren"},
+            headers=auth_header(admin_token)
+        )
+        assert response.status_code == 200
+
+        response = client.get(f"/articles/{article.id}", headers=auth_header(admin_token))
+        assert response.json()["name"] == "Möhren"
+
+    def test_reload_on_foreign_version(self, db, article, monkeypatch):
+        """Änderung aus einem anderen Prozess: nur die Version in der DB ist neu."""
+        monkeypatch.setattr(settings, "master_data_check_seconds", 0)
+        assert get_master_data(db).articles[article.id].name == "Karotten"
+
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE articles SET name = 'Möhren' WHERE id = :id"), {"id": article.id})
+            conn.execute(text("UPDATE cache_versions SET version = version + 1 WHERE name = :name"), {"name": MASTER_DATA})
+        db.rollback()
+
+        assert get_master_data(db).articles[article.id].name == "Möhren"
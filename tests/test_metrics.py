@@ -0,0 +1,163 @@
+"""
+Tests für Metriken und Pool-Überwachung.
+
+Testet:
+- GET /metrics (Prometheus-Textformat, nur mit Token)
+- MeteredQueuePool: Checkout-Wartezeit und Timeouts
+- RequestTimingMiddleware: Laufzeit und DB-Statements pro Routen-Template
+- N+1-Erkennung: normalisierte Statement-Formen, Debug-Header, query_counter
+"""
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.config import settings
+from app.database import MeteredQueuePool
+from app.middleware.timing_middleware import UNMATCHED_ROUTE, QUERY_COUNT_HEADER, REPEATED_QUERIES_HEADER
+from app.models import Article
+from app.utils.metrics import sample_value
+from app.utils.query_stats import RequestStats, normalize_sql
+from tests.conftest import SQLALCHEMY_TEST_DATABASE_URL, auth_header
+
+
+class TestMetricsEndpoint:
+    """Tests für GET /metrics"""
+
+    @pytest.fixture
+    def metrics_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+        return "scrape-secret"
+
+    def test_metrics_exposes_pool(self, client, metrics_token):
+        response = client.get("/metrics", headers=auth_header(metrics_token))
+
+        assert response.status_code == 200
+        body = response.text
+        assert "# TYPE db_pool_checked_out gauge" in body
+        assert 'db_pool_overflow{pool="sync"}' in body
+        assert 'db_pool_size{pool="async"}' in body
+        assert "# TYPE db_pool_checkout_wait_seconds histogram" in body
+
+    def test_metrics_requires_token(self, client, metrics_token):
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers=auth_header("falsch")).status_code == 401
+
+    def test_metrics_disabled_without_token(self, client):
+        assert client.get("/metrics", headers=auth_header("")).status_code == 404
+
+
+class TestMeteredPool:
+    """Tests für die Pool-Metriken"""
+
+    @pytest.fixture
+    def small_engine(self):
+        engine = create_engine(
+            SQLALCHEMY_TEST_DATABASE_URL,
+            poolclass=MeteredQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.1
+        )
+        yield engine
+        engine.dispose()
+
+    def test_checkout_is_measured(self, small_engine):
+        before = sample_value("db_pool_checkout_wait_seconds_count")
+
+        with small_engine.connect():
+            assert sample_value("db_pool_checked_out", pool="sync") == 1
+
+        assert sample_value("db_pool_checkout_wait_seconds_count") == before + 1
+        assert sample_value("db_pool_checked_out", pool="sync") == 0
+
+    def test_exhausted_pool_counts_timeout(self, small_engine):
+        before = sample_value("db_pool_checkout_timeouts_total")
+
+        with small_engine.connect():
+            assert small_engine.pool.checkedout() == 1
+            with pytest.raises(exc.TimeoutError):
+                small_engine.connect()
+
+        assert sample_value("db_pool_checkout_timeouts_total") == before + 1
+
+
+class TestRequestTiming:
+    """Tests für die Request-Metriken"""
+
+    def test_route_template_is_label(self, client, admin_token, article, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+        labels = {"method": "GET", "route": "/articles/{id}", "status": "200"}
+        before = sample_value("http_request_duration_seconds_count", **labels)
+
+        response = client.get(f"/articles/{article.id}", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        assert sample_value("http_request_duration_seconds_count", **labels) == before + 1
+        body = client.get("/metrics", headers=auth_header("scrape-secret")).text
+        assert 'route="/articles/{id}"' in body
+        assert str(article.id) not in body
+
+    def test_db_queries_are_counted(self, client, admin_token, article):
+        labels = {"method": "GET", "route": "/articles/{id}"}
+        before_count = sample_value("http_request_db_queries_count", **labels)
+        before_sum = sample_value("http_request_db_queries_sum", **labels)
+
+        client.get(f"/articles/{article.id}", headers=auth_header(admin_token))
+
+        assert sample_value("http_request_db_queries_count", **labels) == before_count + 1
+        assert sample_value("http_request_db_queries_sum", **labels) > before_sum
+
+    def test_unknown_path_uses_fixed_label(self, client):
+        labels = {"method": "GET", "route": UNMATCHED_ROUTE, "status": "404"}
+        before = sample_value("http_request_duration_seconds_count", **labels)
+
+        client.get(f"/gibt-es-nicht/{uuid4()}")
+
+        assert sample_value("http_request_duration_seconds_count", **labels) == before + 1
+
+
+class TestQueryStats:
+    """Tests für die N+1-Erkennung"""
+
+    def test_normalize_ignores_values_and_list_length(self):
+        one = normalize_sql("SELECT * FROM articles WHERE id IN (%(id_1_1)s) AND name = 'a'")
+        three = normalize_sql("SELECT * FROM articles\n WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) AND name = 'b'")
+
+        assert one == three
+        assert normalize_sql("SELECT * FROM t WHERE x = $1 LIMIT 10") == "SELECT * FROM t WHERE x = ? LIMIT ?"
+
+    def test_repeated_shapes_are_flagged(self):
+        stats = RequestStats()
+        for i in range(6):
+            stats.record(f"SELECT name FROM articles WHERE id = {i}")
+        stats.record("SELECT * FROM orders")
+
+        assert stats.queries == 7
+        assert stats.repeated(5) == [("SELECT name FROM articles WHERE id = ?", 6)]
+        assert stats.repeated(7) == []
+
+    def test_debug_headers(self, client, admin_token, monkeypatch):
+        monkeypatch.setattr(settings, "debug", True)
+
+        response = client.get("/articles/", headers=auth_header(admin_token))
+
+        assert int(response.headers[QUERY_COUNT_HEADER]) >= 1
+        assert response.headers[REPEATED_QUERIES_HEADER] == "0"
+
+    def test_no_debug_headers_in_production(self, client, admin_token):
+        response = client.get("/articles/", headers=auth_header(admin_token))
+
+        assert QUERY_COUNT_HEADER not in response.headers
+
+    def test_article_list_query_budget(self, client, db, admin_token, article_group, query_counter):
+        db.add_all(Article(id=uuid4(), name=f"Artikel {i}", unit="kg", article_group_id=article_group.id, is_active=True) for i in range(10))
+        db.commit()
+        client.get("/articles/", headers=auth_header(admin_token))  # Principal-Cache füllen
+
+        with query_counter(max_queries=3) as stats:
+            response = client.get("/articles/", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        assert len(response.json()) == 10
+        assert stats.queries >= 1
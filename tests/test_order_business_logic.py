@@ -43,6 +43,11 @@ def department_hierarchy(db):
     db.add(patisserie)
     db.commit()
     
+    # Closure-Tabelle für die Hierarchie-Prüfungen aufbauen
+    from app.services.department_service import rebuild_department_closure
+    rebuild_department_closure(db)
+    db.commit()
+    
     return {
         "restaurant": restaurant,
         "kueche": kueche,
@@ -668,6 +673,56 @@ class TestShippingGroupLogic:
         item = order["items"][0]
         assert item.get("supplier_id") is None or item.get("supplier") is None
 
+    def test_create_order_query_count_independent_of_item_count(
+        self, client, admin_token, department, db, query_counter
+    ):
+        """Anzahl Queries beim Anlegen hängt nicht von der Anzahl Positionen ab."""
+        from app.models import Article, ArticleGroup, Supplier, ArticleSupplier
+
+        group = ArticleGroup(name="Bulk Gruppe", is_active=True)
+        db.add(group)
+        db.flush()
+
+        supplier = Supplier(name="Bulk Lieferant", is_active=True, fixed_delivery_days=False)
+        db.add(supplier)
+        db.flush()
+
+        articles = [
+            Article(name=f"Bulk Artikel {i}", unit="kg", article_group_id=group.id, is_active=True)
+            for i in range(40)
+        ]
+        db.add_all(articles)
+        db.flush()
+        db.add_all([
+            ArticleSupplier(article_id=a.id, supplier_id=supplier.id, unit="kg")
+            for a in articles
+        ])
+        db.commit()
+
+        def create(article_list):
+            # Payload vorher bauen: a.id nach dem Commit lädt sonst im Test nach und zählt mit
+            payload = {
+                "department_id": str(department.id),
+                "items": [{"article_id": str(a.id), "amount": 1} for a in article_list]
+            }
+            with query_counter() as stats:
+                response = client.post(
+                    "/orders/",
+                    json=payload,
+                    headers={"Authorization": f"Bearer {admin_token}"}
+                )
+            assert response.status_code == 200
+            return response.json(), stats.queries
+
+        small_order, small_count = create(articles[:2])
+        large_order, large_count = create(articles)
+
+        assert len(large_order["items"]) == 40
+        # Die zweite Bestellung nutzt die bereits angelegte ShippingGroup weiter
+        assert large_count <= small_count
+        # Alle Positionen landen in derselben offenen ShippingGroup
+        assert len({item["shipping_group_id"] for item in large_order["items"]}) == 1
+
 
 # ============ IMPORT FÜR USER MODEL ============
 from app.models import User
\ No newline at end of file
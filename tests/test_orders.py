@@ -2,7 +2,8 @@
 Tests für Order Endpoints.
 
 Testet:
-- GET /orders/
+- GET /orders/ (Cursor-Pagination, fields=summary)
+- GET /orders/export
 - POST /orders/
 - PATCH /orders/{id}
 - POST /orders/{id}/abschliessen
@@ -11,6 +12,7 @@ Testet:
 import pytest
 from uuid import uuid4
 from decimal import Decimal
+from datetime import datetime, timedelta
 
 from app.models import Order, OrderItem, ArticleSupplier
 from app.models.order import OrderStatus
@@ -58,6 +60,74 @@ class TestGetOrders:
         assert response.status_code == 401
 
 
+class TestGetOrdersPagination:
+    """Tests für Cursor-Pagination, Summary und Export"""
+
+    @pytest.fixture
+    def many_orders(self, db, admin_user, department, article):
+        base = datetime(2026, 1, 1, 8, 0)
+        orders = [
+            Order(
+                id=uuid4(),
+                department_id=department.id,
+                creator_id=admin_user.id,
+                status=OrderStatus.ENTWURF,
+                drafted_on=base + timedelta(hours=i)
+            )
+            for i in range(5)
+        ]
+        db.add_all(orders)
+        db.flush()
+        db.add_all([OrderItem(order_id=orders[0].id, article_id=article.id, amount=2)])
+        db.commit()
+        return orders
+
+    def test_cursor_pages(self, client, admin_token, many_orders):
+        """Seiten über X-Next-Cursor, neueste zuerst, ohne Doppelte"""
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/orders/", params=params, headers=auth_header(admin_token))
+            assert response.status_code == 200
+            seen.extend(order["id"] for order in response.json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert pages == 3
+        assert seen == [str(order.id) for order in reversed(many_orders)]
+
+    def test_summary_without_items(self, client, admin_token, many_orders):
+        """fields=summary: keine Positionen, nur Anzahl"""
+        response = client.get("/orders/", params={"fields": "summary"}, headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert all("items" not in order for order in data)
+        counts = {order["id"]: order["item_count"] for order in data}
+        assert counts[str(many_orders[0].id)] == 1
+        assert counts[str(many_orders[1].id)] == 0
+
+    def test_invalid_cursor(self, client, admin_token):
+        """Kaputter Cursor → 400"""
+        response = client.get("/orders/", params={"cursor": "kaputt"}, headers=auth_header(admin_token))
+        assert response.status_code == 400
+
+    def test_export_streams_all(self, client, admin_token, many_orders):
+        """Export liefert alle Bestellungen inkl. Positionen"""
+        response = client.get("/orders/export", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 5
+        assert sum(len(order["items"]) for order in data) == 1
+
+
 class TestCreateOrder:
     """Tests für POST /orders/"""
     
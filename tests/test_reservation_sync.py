@@ -0,0 +1,188 @@
+"""
+Tests für den Reservierungs-Sync gegen einen lokalen GraphQL-Stub.
+
+Testet:
+- Voll-Sync: alle Tage/Zeitfenster, Storno zählt nicht
+- Inkrementeller Sync: nur geänderte Buchungen, updatedSince wird gesendet
+- Fallback auf Voll-Sync ohne vorherigen Voll-Sync am selben Tag
+- Paralleler Abruf in Tagesbereichen, Retry bei Serverfehlern
+"""
+import json
+import threading
+from datetime import date, datetime, time, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.config import settings
+from app.models.reservation import ReservationSummary, TimeSlot
+from app.services import reservation_service
+from app.services.reservation_service import sync_reservations, fetch_bookings_from_teburio
+
+
+def _ms(day: date, hour: int) -> int:
+    return int(datetime.combine(day, time(hour)).replace(tzinfo=ZoneInfo("Europe/Berlin")).timestamp() * 1000)
+
+
+def _booking(booking_id: str, day: date, hour: int, people: int, cancelled: bool = False) -> dict:
+    return {
+        "_id": booking_id,
+        "date": _ms(day, hour),
+        "endDate": _ms(day, hour + 2),
+        "people": people,
+        "cancelled": cancelled,
+        "noShow": False,
+        "walkIn": False,
+        "source": "stub",
+        "__typename": "Booking"
+    }
+
+
+class _TeburioStub(BaseHTTPRequestHandler):
+    """
+    Antwortet mit all_bookings bzw. mit changed_bookings, wenn updatedSince
+    gesetzt ist, jeweils gefiltert auf date/endDate. fail_next Requests
+    schlagen mit 500 fehl.
+    """
+    all_bookings: list = []
+    changed_bookings: list = []
+    requests: list = []
+    fail_next: int = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        variables = body["variables"]
+        stub = type(self)
+        stub.requests.append(variables)
+        if stub.fail_next > 0:
+            stub.fail_next -= 1
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start = datetime.fromisoformat(variables["date"]).timestamp() * 1000
+        end = datetime.fromisoformat(variables["endDate"]).timestamp() * 1000
+        source = self.changed_bookings if variables.get("updatedSince") else self.all_bookings
+        bookings = [b for b in source if start <= b["date"] <= end]
+        response = json.dumps({"data": {"bookingsAnalytics": {
+            "cursor": None,
+            "hasMore": False,
+            "count": len(bookings),
+            "bookings": bookings,
+            "__typename": "BookingsAnalytics"
+        }}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def teburio(monkeypatch):
+    """Startet den Stub und lässt settings.teburio_url darauf zeigen."""
+    _TeburioStub.all_bookings = []
+    _TeburioStub.changed_bookings = []
+    _TeburioStub.requests = []
+    _TeburioStub.fail_next = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TeburioStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "teburio_url", f"http://127.0.0.1:{server.server_port}/graphql")
+    yield _TeburioStub
+    server.shutdown()
+    server.server_close()
+
+
+class TestReservationSync:
+    """Tests für sync_reservations"""
+
+    def _summary(self, db, day: date, slot: TimeSlot) -> tuple[int, int]:
+        db.expire_all()
+        row = db.query(ReservationSummary).filter(
+            ReservationSummary.forecast_date == day,
+            ReservationSummary.time_slot == slot
+        ).one()
+        return row.total_reservations, row.total_guests
+
+    def test_full_sync(self, db, teburio):
+        tomorrow = date.today() + timedelta(days=1)
+        teburio.all_bookings = [
+            _booking("a", tomorrow, 12, 2),
+            _booking("b", tomorrow, 19, 4),
+            _booking("c", tomorrow, 20, 6, cancelled=True)
+        ]
+
+        result = sync_reservations(db, forecast_days=3)
+
+        assert result["status"] == "success"
+        assert result["mode"] == "full"
+        assert result["entries_saved"] == 8
+        assert db.query(ReservationSummary).count() == 8
+        assert self._summary(db, tomorrow, TimeSlot.MITTAG) == (1, 2)
+        assert self._summary(db, tomorrow, TimeSlot.ABEND) == (1, 4)
+
+    def test_incremental_sync_applies_changes(self, db, teburio, query_counter):
+        tomorrow = date.today() + timedelta(days=1)
+        teburio.all_bookings = [_booking("a", tomorrow, 12, 2), _booking("b", tomorrow, 19, 4)]
+        sync_reservations(db, forecast_days=3, incremental=True)
+
+        # b storniert, a auf den Abend verschoben, d neu
+        teburio.changed_bookings = [
+            _booking("a", tomorrow, 18, 2),
+            _booking("b", tomorrow, 19, 4, cancelled=True),
+            _booking("d", tomorrow, 12, 3)
+        ]
+        with query_counter() as stats:
+            result = sync_reservations(db, forecast_days=3, incremental=True)
+
+        assert result["mode"] == "incremental"
+        assert result["bookings_fetched"] == 3
+        assert result["entries_saved"] == 2
+        assert len(stats.matching("INSERT INTO reservation_summaries")) == 1
+        assert "updatedSince" in teburio.requests[-1]
+        assert self._summary(db, tomorrow, TimeSlot.MITTAG) == (1, 3)
+        assert self._summary(db, tomorrow, TimeSlot.ABEND) == (1, 2)
+
+    def test_incremental_without_full_sync_runs_full(self, db, teburio):
+        result = sync_reservations(db, forecast_days=3, incremental=True)
+
+        assert result["status"] == "success"
+        assert result["mode"] == "full"
+        assert "updatedSince" not in teburio.requests[0]
+
+
+class TestTeburioClient:
+    """Tests für den parallelen Abruf"""
+
+    def test_window_split_into_day_ranges(self, teburio, monkeypatch):
+        monkeypatch.setattr(settings, "teburio_chunk_days", 2)
+        today = date.today()
+        teburio.all_bookings = [_booking(str(i), today + timedelta(days=i), 12, 1) for i in range(7)]
+
+        bookings = fetch_bookings_from_teburio(today, today + timedelta(days=6))
+
+        assert sorted(b["_id"] for b in bookings) == [str(i) for i in range(7)]
+        assert len(teburio.requests) == 4
+        assert len({r["date"] for r in teburio.requests}) == 4
+
+    def test_server_error_is_retried(self, teburio, monkeypatch):
+        monkeypatch.setattr(reservation_service, "RETRY_DELAY_SECONDS", 0)
+        teburio.fail_next = 1
+        today = date.today()
+        teburio.all_bookings = [_booking("a", today, 12, 2)]
+
+        bookings = fetch_bookings_from_teburio(today, today)
+
+        assert [b["_id"] for b in bookings] == ["a"]
+        assert len(teburio.requests) == 2
+
+    def test_persistent_error_returns_none(self, teburio, monkeypatch):
+        monkeypatch.setattr(reservation_service, "RETRY_DELAY_SECONDS", 0)
+        teburio.fail_next = reservation_service.MAX_RETRIES
+
+        assert fetch_bookings_from_teburio(date.today(), date.today()) is None
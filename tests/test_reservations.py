@@ -0,0 +1,77 @@
+"""
+Tests für Reservierungs-Endpoints.
+
+Testet:
+- GET /reservations/overview (Gruppierung, ETag/304, Cache pro Sync)
+"""
+from datetime import date, datetime, timedelta
+
+
+from app.models.reservation import ReservationSummary, TimeSlot
+from tests.conftest import auth_header
+
+
+class TestReservationOverview:
+    """Tests für GET /reservations/overview"""
+
+    def _add_summary(self, db, day: date, slot: TimeSlot, reservations: int, guests: int, synced_at: datetime):
+        db.add(ReservationSummary(
+            forecast_date=day,
+            time_slot=slot,
+            total_reservations=reservations,
+            total_guests=guests,
+            synced_at=synced_at
+        ))
+        db.commit()
+
+    def test_overview_groups_by_day(self, client, db, admin_token):
+        today = date.today()
+        synced = datetime(2026, 1, 1, 12, 0)
+        self._add_summary(db, today, TimeSlot.MITTAG, 3, 10, synced)
+        self._add_summary(db, today, TimeSlot.ABEND, 2, 5, synced)
+
+        response = client.get("/reservations/overview?days=3", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["days"]) == 3
+        assert data["days"][0]["total_reservations"] == 5
+        assert data["days"][0]["total_guests"] == 15
+        assert data["days"][1]["total_reservations"] == 0
+        assert "ETag" in response.headers
+
+    def test_not_modified_with_matching_etag(self, client, db, admin_token):
+        self._add_summary(db, date.today(), TimeSlot.MITTAG, 1, 2, datetime(2026, 1, 1, 12, 0))
+        etag = client.get("/reservations/overview", headers=auth_header(admin_token)).headers["ETag"]
+
+        response = client.get(
+            "/reservations/overview",
+            headers={**auth_header(admin_token), "If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    def test_new_sync_changes_etag(self, client, db, admin_token):
+        self._add_summary(db, date.today(), TimeSlot.MITTAG, 1, 2, datetime(2026, 1, 1, 12, 0))
+        etag = client.get("/reservations/overview", headers=auth_header(admin_token)).headers["ETag"]
+
+        # Sync schreibt neue Zahlen
+        self._add_summary(db, date.today() + timedelta(days=1), TimeSlot.ABEND, 4, 9, datetime(2026, 1, 1, 12, 5))
+        response = client.get(
+            "/reservations/overview",
+            headers={**auth_header(admin_token), "If-None-Match": etag}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["days"][1]["total_guests"] == 9
+
+    def test_overview_computed_once_per_sync(self, client, db, admin_token, query_counter):
+        self._add_summary(db, date.today(), TimeSlot.MITTAG, 1, 2, datetime(2026, 1, 1, 12, 0))
+        client.get("/reservations/overview", headers=auth_header(admin_token))
+        with query_counter() as stats:
+            response = client.get("/reservations/overview", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        assert stats.matching("FROM reservation_summaries", without="max(") == []
@@ -5,16 +5,21 @@ Testet:
 - GET /shipping-groups/
 - GET /shipping-groups/{id}
 - POST /shipping-groups/{id}/freigeben
+- POST /shipping-groups/freigeben-batch
+- Versand-Jobs (PDF + Email im Worker)
 """
+import threading
+
 import pytest
 from uuid import uuid4
 from decimal import Decimal
 from datetime import date, timedelta
 
-from app.models import Order, OrderItem, ShippingGroup, ApproverSupplier
+from app.models import Order, OrderItem, ShippingGroup, ApproverSupplier, Supplier
 from app.models.order import OrderStatus
 from app.models.shipping_group import ShippingGroupStatus
-from tests.conftest import auth_header
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from tests.conftest import auth_header, TestingSessionLocal
 
 
 class TestGetShippingGroups:
@@ -122,6 +127,72 @@ class TestGetShippingGroups:
         response = client.get("/shipping-groups/")
         assert response.status_code == 401
 
+    def test_get_shipping_groups_summary_counts(self, client, admin_token, db, admin_user, department, supplier, article):
+        """Liste liefert Anzahlen statt Positionen, inaktive Bestellungen zählen nicht"""
+        sg = ShippingGroup(id=uuid4(), supplier_id=supplier.id, delivery_date=date.today() + timedelta(days=1))
+        order1 = Order(id=uuid4(), department_id=department.id, creator_id=admin_user.id)
+        order2 = Order(id=uuid4(), department_id=department.id, creator_id=admin_user.id)
+        inactive = Order(id=uuid4(), department_id=department.id, creator_id=admin_user.id, is_active=False)
+        db.add_all([sg, order1, order2, inactive])
+        db.flush()
+        for order, amount in ((order1, "1"), (order1, "2"), (order2, "3"), (inactive, "4")):
+            db.add(OrderItem(order_id=order.id, article_id=article.id, supplier_id=supplier.id, shipping_group_id=sg.id, amount=Decimal(amount)))
+        db.commit()
+
+        response = client.get("/shipping-groups/", headers=auth_header(admin_token))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert "items" not in data[0]
+        assert data[0]["supplier"]["id"] == str(supplier.id)
+        assert data[0]["item_count"] == 3
+        assert data[0]["order_count"] == 2
+        assert data[0]["department_count"] == 1
+
+    def test_get_shipping_groups_filter_date_range(self, client, admin_token, db, supplier):
+        """Filter auf Lieferdatum schließt Grenzen ein"""
+        today = date.today()
+        db.add_all([
+            ShippingGroup(id=uuid4(), supplier_id=supplier.id, delivery_date=today + timedelta(days=days))
+            for days in (1, 2, 3, 4)
+        ])
+        db.commit()
+
+        response = client.get(
+            "/shipping-groups/",
+            params={"date_from": str(today + timedelta(days=2)), "date_to": str(today + timedelta(days=3))},
+            headers=auth_header(admin_token)
+        )
+
+        assert response.status_code == 200
+        assert [g["delivery_date"] for g in response.json()] == [
+            str(today + timedelta(days=3)), str(today + timedelta(days=2))
+        ]
+
+    def test_get_shipping_groups_cursor_pages(self, client, admin_token, db, supplier):
+        """Seiten über X-Next-Cursor, ohne Lieferdatum zuerst, ohne Doppelte"""
+        today = date.today()
+        groups = [ShippingGroup(id=uuid4(), supplier_id=supplier.id, delivery_date=today + timedelta(days=days)) for days in range(4)]
+        groups.append(ShippingGroup(id=uuid4(), supplier_id=supplier.id))
+        db.add_all(groups)
+        db.commit()
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/shipping-groups/", params=params, headers=auth_header(admin_token))
+            assert response.status_code == 200
+            seen.extend(response.json())
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+
+        assert len(seen) == 5
+        assert len({g["id"] for g in seen}) == 5
+        assert seen[0]["delivery_date"] is None
+        assert [g["delivery_date"] for g in seen[1:]] == [str(today + timedelta(days=days)) for days in (3, 2, 1, 0)]
+
 
 class TestGetShippingGroupDetail:
     """Tests für GET /shipping-groups/{id}"""
@@ -178,7 +249,7 @@ class TestFreigebenShippingGroup:
     """Tests für POST /shipping-groups/{id}/freigeben"""
     
     def test_freigeben_success(self, client, admin_token, db, supplier):
-        """Erfolgreiche Freigabe: OFFEN → VERSENDET"""
+        """Erfolgreiche Freigabe: OFFEN → IN_VERSAND + Versand-Job"""
         sg = ShippingGroup(
             id=uuid4(),
             supplier_id=supplier.id,
@@ -195,7 +266,11 @@ class TestFreigebenShippingGroup:
         
         assert response.status_code == 200
         data = response.json()
-        assert data["status"] == "VERSENDET"
+        assert data["status"] == "IN_VERSAND"
+        
+        from app.models import Job
+        job = db.query(Job).one()
+        assert job.payload["shipping_group_id"] == str(sg.id)
     
     def test_freigeben_already_versendet(self, client, admin_token, db, supplier):
         """Bereits versendet → Fehler"""
@@ -284,7 +359,7 @@ class TestFreigebenShippingGroup:
         
         assert response.status_code == 200
         data = response.json()
-        assert data["status"] == "VERSENDET"
+        assert data["status"] == "IN_VERSAND"
     
     def test_freigeben_bedarfsmelder_not_allowed(self, client, bedarfsmelder_token, db, supplier):
         """Bedarfsmelder kann nicht freigeben → 403"""
@@ -301,4 +376,231 @@ class TestFreigebenShippingGroup:
             headers=auth_header(bedarfsmelder_token)
         )
         
-        assert response.status_code == 403
\ No newline at end of file
+        assert response.status_code == 403
+
+class TestShippingGroupPdfData:
+    """Tests für das vorab geladene PDF-Datenbündel"""
+
+    def test_build_pdf_data_prefetches_numbers(self, db, admin_user, department, supplier, article):
+        """Artikel- und Kundennummern landen im Bündel, Rendering ohne DB"""
+        from sqlalchemy.orm import joinedload
+        from app.models import ArticleSupplier, DepartmentSupplier
+        from app.services.pdf_service import build_pdf_data, render_shipping_group_pdf
+
+        db.add(ArticleSupplier(article_id=article.id, supplier_id=supplier.id, unit="kg", article_number_supplier="A-42"))
+        db.add(DepartmentSupplier(department_id=department.id, supplier_id=supplier.id, customer_number="K-7"))
+
+        sg = ShippingGroup(id=uuid4(), supplier_id=supplier.id, delivery_date=date.today() + timedelta(days=1))
+        order = Order(id=uuid4(), department_id=department.id, creator_id=admin_user.id, delivery_notes="Hintereingang")
+        db.add_all([sg, order])
+        db.flush()
+        db.add(OrderItem(order_id=order.id, article_id=article.id, supplier_id=supplier.id, shipping_group_id=sg.id, amount=Decimal("2.5")))
+        db.commit()
+
+        shipping_group = db.query(ShippingGroup).options(
+            joinedload(ShippingGroup.supplier),
+            joinedload(ShippingGroup.items).joinedload(OrderItem.article),
+            joinedload(ShippingGroup.items).joinedload(OrderItem.order).joinedload(Order.department)
+        ).filter(ShippingGroup.id == sg.id).first()
+
+        data = build_pdf_data(db, shipping_group, approved_by="Test Admin")
+
+        assert len(data.departments) == 1
+        block = data.departments[0]
+        assert block.customer_number == "K-7"
+        assert block.notes == ["Hintereingang"]
+        assert block.lines[0].article_number == "A-42"
+
+        assert render_shipping_group_pdf(data).startswith(b"%PDF")
+
+
+class TestShippingGroupSendJob:
+    """Tests für den Versand-Job (Worker)"""
+
+    @pytest.fixture
+    def released_group(self, client, admin_token, db, supplier, tmp_path, monkeypatch):
+        """Freigegebene ShippingGroup, PDFs landen im tmp-Verzeichnis"""
+        from app.services import shipping_group_service
+        monkeypatch.setattr(shipping_group_service, "PDF_STORAGE_DIR", str(tmp_path))
+
+        sg = ShippingGroup(
+            id=uuid4(),
+            supplier_id=supplier.id,
+            delivery_date=date.today() + timedelta(days=1),
+            status=ShippingGroupStatus.OFFEN
+        )
+        db.add(sg)
+        db.commit()
+
+        response = client.post(f"/shipping-groups/{sg.id}/freigeben", headers=auth_header(admin_token))
+        assert response.status_code == 200
+        return sg
+
+    def test_job_sends_and_marks_versendet(self, db, released_group, monkeypatch):
+        """Erfolgreicher Job: PDF gespeichert, Email raus, VERSENDET"""
+        from app.services import shipping_group_service
+        from app.services.job_service import run_pending_jobs
+
+        async def fake_send(**kwargs):
+            return {"success": True, "error": None}
+        monkeypatch.setattr(shipping_group_service, "send_order_email", fake_send)
+
+        assert run_pending_jobs(db) == 1
+
+        db.refresh(released_group)
+        assert released_group.status == ShippingGroupStatus.VERSENDET
+        assert released_group.email_sent is True
+        assert released_group.pdf_path
+
+    def test_job_retries_with_backoff(self, db, released_group, monkeypatch):
+        """Email-Fehler: Job wird mit Backoff erneut eingeplant"""
+        from app.models import Job, JobStatus
+        from app.services import shipping_group_service
+        from app.services.job_service import run_pending_jobs
+
+        async def failing_send(**kwargs):
+            return {"success": False, "error": "SMTP down"}
+        monkeypatch.setattr(shipping_group_service, "send_order_email", failing_send)
+
+        assert run_pending_jobs(db) == 1
+
+        job = db.query(Job).one()
+        assert job.status == JobStatus.WARTEND
+        assert job.attempts == 1
+        assert "SMTP down" in job.last_error
+
+        db.refresh(released_group)
+        assert released_group.status == ShippingGroupStatus.IN_VERSAND
+        assert released_group.email_error == "SMTP down"
+
+
+class TestFreigebenBatch:
+    """Tests für POST /shipping-groups/freigeben-batch"""
+
+    @pytest.fixture
+    def open_groups(self, db, supplier):
+        """Drei offene Gruppen für morgen bei verschiedenen Lieferanten"""
+        tomorrow = date.today() + timedelta(days=1)
+        suppliers = [supplier] + [
+            Supplier(id=uuid4(), name=f"Lieferant {i}", email=f"l{i}@test.de", is_active=True, fixed_delivery_days=False)
+            for i in range(2)
+        ]
+        db.add_all(suppliers[1:])
+        groups = [
+            ShippingGroup(id=uuid4(), supplier_id=sup.id, delivery_date=tomorrow, status=ShippingGroupStatus.OFFEN)
+            for sup in suppliers
+        ]
+        db.add_all(groups)
+        db.commit()
+        return groups
+
+    def test_batch_by_delivery_date(self, client, admin_token, db, open_groups):
+        """Alle offenen Gruppen des Tages werden freigegeben, ein Job"""
+        from app.models import Job
+
+        response = client.post(
+            "/shipping-groups/freigeben-batch",
+            json={"delivery_date": str(date.today() + timedelta(days=1))},
+            headers=auth_header(admin_token)
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["released"] == 3
+        assert data["failed"] == 0
+        assert all(r["status"] == "IN_VERSAND" for r in data["results"])
+
+        jobs = db.query(Job).all()
+        assert len(jobs) == 1
+        assert len(jobs[0].payload["shipping_group_ids"]) == 3
+
+    def test_batch_reports_per_group(self, client, freigeber_token, db, freigeber_user, supplier, open_groups):
+        """Freigeber: eigene Gruppe ok, fremde und unbekannte mit Fehler"""
+        db.add(ApproverSupplier(user_id=freigeber_user.id, supplier_id=supplier.id))
+        db.commit()
+        unknown = uuid4()
+
+        response = client.post(
+            "/shipping-groups/freigeben-batch",
+            json={"ids": [str(open_groups[0].id), str(open_groups[1].id), str(unknown)]},
+            headers=auth_header(freigeber_token)
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["released"] == 1
+        assert data["failed"] == 2
+        by_id = {r["id"]: r for r in data["results"]}
+        assert by_id[str(open_groups[0].id)]["success"] is True
+        assert "Berechtigung" in by_id[str(open_groups[1].id)]["error"]
+        assert by_id[str(unknown)]["error"] == "Versandgruppe nicht gefunden"
+
+        db.refresh(open_groups[1])
+        assert open_groups[1].status == ShippingGroupStatus.OFFEN
+
+    def test_batch_waits_for_concurrent_release(self, client, admin_token, db, open_groups):
+        """Parallel freigegebene Gruppe: Batch wartet auf deren Commit und gibt sie nicht erneut frei"""
+        from app.models import Job
+
+        other = TestingSessionLocal()
+        try:
+            locked = other.get(ShippingGroup, open_groups[0].id, with_for_update=True)
+            locked.status = ShippingGroupStatus.IN_VERSAND
+            other.flush()
+            commit = threading.Timer(0.5, other.commit)
+            commit.start()
+
+            response = client.post(
+                "/shipping-groups/freigeben-batch",
+                json={"delivery_date": str(date.today() + timedelta(days=1))},
+                headers=auth_header(admin_token)
+            )
+            commit.join()
+        finally:
+            other.close()
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["released"] == 2
+        assert str(open_groups[0].id) not in {r["id"] for r in data["results"]}
+        assert len(db.query(Job).one().payload["shipping_group_ids"]) == 2
+
+    def test_batch_requires_selection(self, client, admin_token):
+        """Weder Datum noch IDs → 422"""
+        response = client.post("/shipping-groups/freigeben-batch", json={}, headers=auth_header(admin_token))
+        assert response.status_code == 422
+
+    def test_batch_job_one_smtp_session(self, client, admin_token, db, open_groups, tmp_path, monkeypatch):
+        """Worker: ein Aufruf für alle Mails, fehlgeschlagene als Einzel-Job"""
+        from app.models import Job, JobStatus
+        from app.services import shipping_group_service
+        from app.services.job_service import claim_next_job, run_job
+        monkeypatch.setattr(shipping_group_service, "PDF_STORAGE_DIR", str(tmp_path))
+
+        calls = []
+
+        async def fake_batch(mails):
+            calls.append(mails)
+            return [{"success": i > 0, "error": None if i > 0 else "Postfach voll"} for i in range(len(mails))]
+        monkeypatch.setattr(shipping_group_service, "send_order_emails_batch", fake_batch)
+
+        client.post(
+            "/shipping-groups/freigeben-batch",
+            json={"delivery_date": str(date.today() + timedelta(days=1))},
+            headers=auth_header(admin_token)
+        )
+        run_job(db, claim_next_job(db))
+
+        assert len(calls) == 1
+        assert len(calls[0]) == 3
+
+        statuses = []
+        for sg in open_groups:
+            db.refresh(sg)
+            assert sg.pdf_path
+            statuses.append(sg.status)
+        assert statuses.count(ShippingGroupStatus.VERSENDET) == 2
+        assert statuses.count(ShippingGroupStatus.IN_VERSAND) == 1
+
+        retry = db.query(Job).filter(Job.status == JobStatus.WARTEND).one()
+        assert retry.job_type == shipping_group_service.SEND_SHIPPING_GROUP_JOB